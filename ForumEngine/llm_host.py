@@ -8,7 +8,6 @@
 5. 推动分析流程向目标高效推进
 """
 
-from openai import OpenAI
 import sys
 import os
 from typing import List, Dict, Any, Optional
@@ -20,6 +19,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # 使用统一的配置热重载工具
 from utils.config_reloader import get_config_value
+from utils.async_llm_client import AsyncLLMClient
 
 # 添加utils目录到Python路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -60,10 +60,8 @@ class ForumHost:
 
         self.base_url = base_url or get_config_value('LLM_BASE_URL')
 
-        self.client = OpenAI(
-            api_key=self.api_key,
-            base_url=self.base_url
-        )
+        # 与各Engine共享同一Base URL的连接池
+        self.client = AsyncLLMClient.shared(api_key=self.api_key, base_url=self.base_url)
         self.model = model_name or get_config_value('DEFAULT_MODEL_NAME', 'qwen-plus-latest')
 
         # Track previous summaries to avoid duplicates
@@ -275,7 +273,7 @@ class ForumHost:
     def _call_qwen_api(self, system_prompt: str, user_prompt: str) -> Dict[str, Any]:
         """调用Qwen API"""
         try:
-            response = self.client.chat.completions.create(
+            content = self.client.complete(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -285,8 +283,7 @@ class ForumHost:
                 top_p=0.9,
             )
 
-            if response.choices:
-                content = response.choices[0].message.content
+            if content is not None:
                 return {"success": True, "content": content}
             else:
                 return {"success": False, "error": "API返回格式异常"}
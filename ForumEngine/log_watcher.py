@@ -0,0 +1,212 @@
+"""
+日志追加监听器 - 按字节偏移增量读取Agent日志
+
+Linux下通过inotify等待日志目录中被监听文件的写入事件，其他平台退化为按间隔stat轮询。
+两种方式都只记录每个文件的字节偏移并读取新追加的字节，空闲时不会重读整个文件。
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# inotify事件掩码 (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+@dataclass
+class LogChange:
+    """单个日志文件在一次轮询中的变化"""
+    lines: List[str] = field(default_factory=list)  # 新追加的完整行(已去除空行)
+    truncated: bool = False                          # 文件被清空/截断/替换
+
+
+class _Inotify:
+    """基于ctypes的最小inotify封装，只关心指定文件名的事件"""
+
+    def __init__(self, directory: Path, names: List[str]):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("找不到libc")
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+
+        self._names = {name.encode("utf-8") for name in names}
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1失败")
+
+        wd = libc.inotify_add_watch(self._fd, str(directory).encode("utf-8"), _WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch失败: {directory}")
+
+    def wait(self, timeout: float) -> bool:
+        """
+        等待被监听文件的事件，返回是否有相关事件
+
+        同目录下其他文件(如forum.log)的事件会被读出丢弃并继续等待，直到相关事件或超时
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            readable, _, _ = select.select([self._fd], [], [], remaining)
+            if not readable:
+                return False
+            if self._drain():
+                return True
+
+    def _drain(self) -> bool:
+        relevant = False
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+                name = data[offset + _EVENT_HEADER.size: offset + _EVENT_HEADER.size + name_len].rstrip(b"\0")
+                offset += _EVENT_HEADER.size + name_len
+                if mask & _IN_Q_OVERFLOW or name in self._names:
+                    relevant = True
+        return relevant
+
+    def close(self):
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+
+class LogFileWatcher:
+    """
+    多日志文件的增量读取器
+
+    使用方式:
+        watcher = LogFileWatcher({'insight': Path('logs/insight.log')})
+        watcher.start_at_end()
+        while running:
+            watcher.wait(1.0)
+            for name, change in watcher.poll().items():
+                ...
+    """
+
+    def __init__(self, files: Dict[str, Path], use_inotify: bool = True):
+        self.files = files
+        self._offsets: Dict[str, int] = {}
+        self._inodes: Dict[str, Optional[int]] = {}
+        self._partial: Dict[str, bytes] = {}  # 尚未以换行结尾的残余字节
+        self._inotify: Optional[_Inotify] = None
+
+        directories = {path.parent for path in files.values()}
+        if use_inotify and sys.platform.startswith("linux") and len(directories) == 1:
+            try:
+                self._inotify = _Inotify(directories.pop(), [path.name for path in files.values()])
+            except (OSError, AttributeError) as e:
+                print(f"ForumEngine: inotify不可用，改用轮询监听日志: {e}")
+                self._inotify = None
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self._inotify else "polling"
+
+    @staticmethod
+    def _stat(path: Path) -> Tuple[int, Optional[int]]:
+        try:
+            stat = path.stat()
+            return stat.st_size, stat.st_ino
+        except OSError:
+            return 0, None
+
+    def start_at_end(self):
+        """以各文件当前末尾作为基线，只读取之后追加的内容"""
+        for name, path in self.files.items():
+            size, inode = self._stat(path)
+            self._offsets[name] = size
+            self._inodes[name] = inode
+            self._partial[name] = b""
+
+    def wait(self, timeout: float) -> bool:
+        """
+        等待日志变化
+
+        inotify模式下阻塞到相关事件或超时；轮询模式下休眠timeout后返回True(需要poll检查)。
+        """
+        if self._inotify is None:
+            time.sleep(timeout)
+            return True
+        try:
+            return self._inotify.wait(timeout)
+        except OSError as e:
+            print(f"ForumEngine: inotify等待失败，改用轮询监听日志: {e}")
+            self._inotify.close()
+            self._inotify = None
+            return True
+
+    def poll(self) -> Dict[str, LogChange]:
+        """检查所有文件，返回有变化的文件及其新增行"""
+        changes: Dict[str, LogChange] = {}
+        for name, path in self.files.items():
+            change = self._poll_file(name, path)
+            if change is not None:
+                changes[name] = change
+        return changes
+
+    def _poll_file(self, name: str, path: Path) -> Optional[LogChange]:
+        size, inode = self._stat(path)
+        offset = self._offsets.get(name, 0)
+        known_inode = self._inodes.get(name)
+
+        # 文件被截断或替换: 以新文件末尾作为基线
+        if size < offset or (known_inode is not None and inode is not None and inode != known_inode):
+            self._offsets[name] = size
+            self._inodes[name] = inode
+            self._partial[name] = b""
+            return LogChange(truncated=True)
+
+        self._inodes[name] = inode
+        if size == offset:
+            return None
+
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read(size - offset)
+        except OSError as e:
+            print(f"ForumEngine: 读取{name}日志失败: {e}")
+            return None
+
+        self._offsets[name] = offset + len(data)
+        data = self._partial.get(name, b"") + data
+        complete, _, remainder = data.rpartition(b"\n")
+        self._partial[name] = remainder
+        if not complete:
+            return LogChange()
+
+        text = complete.decode("utf-8", errors="replace")
+        lines = [line.strip() for line in text.split("\n") if line.strip()]
+        return LogChange(lines=lines)
+
+    def close(self):
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
@@ -1,16 +1,24 @@
 """
 总教练协调器 - 实时收集三个Agent的分析报告,统筹决策并引导团队方向
+
+Agent的总结内容通过事件总线(utils.event_bus)以SummaryProduced事件送达，
+Agent日志只用于判断协调会话的开始与结束。
 """
 
 import os
+import sys
 import time
+import queue
 import threading
 from pathlib import Path
 from datetime import datetime
-import re
-import json
 from typing import Dict, Optional, List
-from threading import Lock
+from threading import Lock, RLock
+
+from .log_watcher import LogFileWatcher
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.event_bus import EventListener, SummaryProduced
 
 # 导入总教练模块
 try:
@@ -38,27 +46,25 @@ class LogMonitor:
         # 总教练协调状态
         self.is_monitoring = False
         self.monitor_thread = None
-        self.file_positions = {}  # 记录每个文件的读取位置
-        self.file_line_counts = {}  # 记录每个文件的行数
+        self.watcher: Optional[LogFileWatcher] = None  # 按字节偏移增量读取日志
+        self.event_listener = EventListener(self.log_dir)  # 接收Agent的SummaryProduced事件
+        # 只订阅一次，停止后重新启动不会重复写入总结
+        self.event_listener.subscribe(self._on_summary_event)
+        self.session_lock = RLock()  # 日志线程与事件线程共享协调会话状态
         self.is_searching = False  # 是否正在分析
-        self.search_inactive_count = 0  # 分析非活跃计数器
+        self.last_activity_time = time.monotonic()  # 协调会话最近一次活动的时刻(单调时钟)
+        self.session_idle_timeout = 900  # 15分钟无活动才结束协调会话(秒)
         self.write_lock = Lock()  # 写入锁，防止并发写入冲突
 
         # 总教练协调状态
         self.agent_speeches_buffer = []  # Agent分析报告缓冲区
         self.host_speech_threshold = 5  # 每5条Agent报告触发一次总教练决策
         self.is_host_generating = False  # 总教练是否正在生成决策
-       
-        # 目标节点名称 - 直接匹配字符串
-        self.target_nodes = [
-            'FirstSummaryNode',
-            'ReflectionSummaryNode'
-        ]
-        
-        # 多行内容捕获状态
-        self.capturing_json = {}  # 每个app的JSON捕获状态
-        self.json_buffer = {}     # 每个app的JSON缓冲区
-        self.json_start_line = {} # 每个app的JSON开始行
+        # 总教练决策在独立工作线程中生成，队列只保存一个待处理信号:
+        # 生成期间多次达到阈值时合并为一次调用，不阻塞日志与事件处理
+        self.host_queue: "queue.Queue[int]" = queue.Queue(maxsize=1)
+        self.host_thread = None
+        self.session_generation = 0  # 会话代数，会话切换后丢弃过期的总教练决策
        
         # 确保logs目录存在
         self.log_dir.mkdir(exist_ok=True)
@@ -78,14 +84,8 @@ class LogMonitor:
 
             print(f"ForumEngine: forum.log 已清空并初始化")
 
-            # 重置JSON捕获状态
-            self.capturing_json = {}
-            self.json_buffer = {}
-            self.json_start_line = {}
-
             # 重置总教练协调状态
-            self.agent_speeches_buffer = []
-            self.is_host_generating = False
+            self._reset_host_state()
 
         except Exception as e:
             print(f"ForumEngine: 清空forum.log失败: {e}")
@@ -107,464 +107,159 @@ class LogMonitor:
         except Exception as e:
             print(f"ForumEngine: 写入forum.log失败: {e}")
    
-    def is_target_log_line(self, line: str) -> bool:
-        """检查是否是目标日志行（SummaryNode）"""
-        # 简单字符串包含检查，更可靠
-        for node_name in self.target_nodes:
-            if node_name in line:
-                return True
-        return False
-    
-    def is_valuable_content(self, line: str) -> bool:
-        """判断是否是有价值的内容（排除短小的提示信息和错误信息）"""
-        # 如果包含"清理后的输出"，则认为是有价值的
-        if "清理后的输出" in line:
-            return True
-        
-        # 排除常见的短小提示信息和错误信息
-        exclude_patterns = [
-            "JSON解析失败",
-            "JSON修复失败",
-            "直接使用清理后的文本",
-            "JSON解析成功",
-            "成功生成",
-            "已更新段落",
-            "正在生成",
-            "开始处理",
-            "处理完成",
-            "已读取HOST发言",
-            "读取HOST发言失败",
-            "未找到HOST发言",
-            "调试输出",
-            "信息记录"
-        ]
-        
-        for pattern in exclude_patterns:
-            if pattern in line:
-                return False
-        
-        # 如果行长度过短，也认为不是有价值的内容
-        clean_line = re.sub(r'\[\d{2}:\d{2}:\d{2}\]', '', line).strip()
-        if len(clean_line) < 30:  # 阈值可以调整
-            return False
-            
-        return True
-    
-    def is_json_start_line(self, line: str) -> bool:
-        """判断是否是JSON开始行"""
-        return "清理后的输出: {" in line
-    
-    def is_json_end_line(self, line: str) -> bool:
-        """判断是否是JSON结束行"""
-        stripped = line.strip()
-        return stripped == "}" or (stripped.startswith("[") and stripped.endswith("] }"))
-    
-    def extract_json_content(self, json_lines: List[str]) -> Optional[str]:
-        """从多行中提取并解析JSON内容"""
-        try:
-            # 找到JSON开始的位置
-            json_start_idx = -1
-            for i, line in enumerate(json_lines):
-                if "清理后的输出: {" in line:
-                    json_start_idx = i
-                    break
-            
-            if json_start_idx == -1:
-                return None
-            
-            # 提取JSON部分
-            first_line = json_lines[json_start_idx]
-            json_start_pos = first_line.find("清理后的输出: {")
-            if json_start_pos == -1:
-                return None
-            
-            json_part = first_line[json_start_pos + len("清理后的输出: "):]
-            
-            # 如果第一行就包含完整JSON，直接处理
-            if json_part.strip().endswith("}") and json_part.count("{") == json_part.count("}"):
-                try:
-                    json_obj = json.loads(json_part.strip())
-                    return self.format_json_content(json_obj)
-                except json.JSONDecodeError:
-                    # 单行JSON解析失败，尝试修复
-                    fixed_json = self.fix_json_string(json_part.strip())
-                    if fixed_json:
-                        try:
-                            json_obj = json.loads(fixed_json)
-                            return self.format_json_content(json_obj)
-                        except json.JSONDecodeError:
-                            pass
-                    return None
-            
-            # 处理多行JSON
-            json_text = json_part
-            for line in json_lines[json_start_idx + 1:]:
-                # 移除时间戳
-                clean_line = re.sub(r'^\[\d{2}:\d{2}:\d{2}\]\s*', '', line)
-                json_text += clean_line
-            
-            # 尝试解析JSON
-            try:
-                json_obj = json.loads(json_text.strip())
-                return self.format_json_content(json_obj)
-            except json.JSONDecodeError:
-                # 多行JSON解析失败，尝试修复
-                fixed_json = self.fix_json_string(json_text.strip())
-                if fixed_json:
-                    try:
-                        json_obj = json.loads(fixed_json)
-                        return self.format_json_content(json_obj)
-                    except json.JSONDecodeError:
-                        pass
-                return None
-            
-        except Exception as e:
-            # 其他异常也不打印错误信息，直接返回None
-            return None
-    
-    def format_json_content(self, json_obj: dict) -> str:
-        """格式化JSON内容为可读形式"""
-        try:
-            # 提取主要内容，优先选择反思总结，其次是首次总结
-            content = None
-            
-            if "updated_paragraph_latest_state" in json_obj:
-                content = json_obj["updated_paragraph_latest_state"]
-            elif "paragraph_latest_state" in json_obj:
-                content = json_obj["paragraph_latest_state"]
-            
-            # 如果找到了内容，直接返回（保持换行符为\n）
-            if content:
-                return content
-            
-            # 如果没有找到预期的字段，返回整个JSON的字符串表示
-            return f"清理后的输出: {json.dumps(json_obj, ensure_ascii=False, indent=2)}"
-            
-        except Exception as e:
-            print(f"ForumEngine: 格式化JSON时出错: {e}")
-            return f"清理后的输出: {json.dumps(json_obj, ensure_ascii=False, indent=2)}"
-
-    def extract_node_content(self, line: str) -> Optional[str]:
-        """提取节点内容，去除时间戳、节点名称等前缀"""
-        # 移除时间戳部分
-        # 格式: [HH:MM:SS] [NodeName] message
-        match = re.search(r'\[\d{2}:\d{2}:\d{2}\]\s*(.+)', line)
-        if match:
-            content = match.group(1).strip()
-            
-            # 移除所有的方括号标签（包括节点名称和应用名称）
-            content = re.sub(r'^\[.*?\]\s*', '', content)
-            
-            # 继续移除可能的多个连续标签
-            while re.match(r'^\[.*?\]\s*', content):
-                content = re.sub(r'^\[.*?\]\s*', '', content)
-            
-            # 移除常见前缀（如"首次总结: "、"反思总结: "等）
-            prefixes_to_remove = [
-                "首次总结: ",
-                "反思总结: ",
-                "清理后的输出: "
-            ]
-            
-            for prefix in prefixes_to_remove:
-                if content.startswith(prefix):
-                    content = content[len(prefix):]
-                    break
-            
-            # 移除可能存在的应用名标签（不在方括号内的）
-            app_names = ['INSIGHT', 'MEDIA', 'QUERY']
-            for app_name in app_names:
-                # 移除单独的APP_NAME（在行首）
-                content = re.sub(rf'^{app_name}\s+', '', content, flags=re.IGNORECASE)
-            
-            # 清理多余的空格
-            content = re.sub(r'\s+', ' ', content)
-            
-            return content.strip()
-        return line.strip()
-   
-    def get_file_size(self, file_path: Path) -> int:
-        """获取文件大小"""
+    def _reset_host_state(self):
+        """重置总教练协调状态，正在生成的决策完成后会被丢弃(调用方需持有session_lock)"""
+        self.agent_speeches_buffer = []
+        self.session_generation += 1
         try:
-            return file_path.stat().st_size if file_path.exists() else 0
-        except:
-            return 0
-   
-    def get_file_line_count(self, file_path: Path) -> int:
-        """获取文件行数"""
-        try:
-            if not file_path.exists():
-                return 0
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return sum(1 for _ in f)
-        except:
-            return 0
-   
-    def read_new_lines(self, file_path: Path, app_name: str) -> List[str]:
-        """读取文件中的新行"""
-        new_lines = []
-       
-        try:
-            if not file_path.exists():
-                return new_lines
-           
-            current_size = self.get_file_size(file_path)
-            last_position = self.file_positions.get(app_name, 0)
-           
-            # 如果文件变小了，说明被清空了，重新从头开始
-            if current_size < last_position:
-                last_position = 0
-                # 重置JSON捕获状态
-                self.capturing_json[app_name] = False
-                self.json_buffer[app_name] = []
-           
-            if current_size > last_position:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    f.seek(last_position)
-                    new_content = f.read()
-                    new_lines = new_content.split('\n')
-                   
-                    # 更新位置
-                    self.file_positions[app_name] = f.tell()
-                   
-                    # 过滤空行
-                    new_lines = [line.strip() for line in new_lines if line.strip()]
-                   
-        except Exception as e:
-            print(f"ForumEngine: 读取{app_name}日志失败: {e}")
-       
-        return new_lines
-   
-    def process_lines_for_json(self, lines: List[str], app_name: str) -> List[str]:
-        """处理行以捕获多行JSON内容"""
-        captured_contents = []
-        
-        # 初始化状态
-        if app_name not in self.capturing_json:
-            self.capturing_json[app_name] = False
-            self.json_buffer[app_name] = []
-        
-        for line in lines:
-            if not line.strip():
-                continue
-                
-            # 检查是否是目标节点行
-            if self.is_target_log_line(line):
-                if self.is_json_start_line(line):
-                    # 开始捕获JSON
-                    self.capturing_json[app_name] = True
-                    self.json_buffer[app_name] = [line]
-                    self.json_start_line[app_name] = line
-                    
-                    # 检查是否是单行JSON
-                    if line.strip().endswith("}"):
-                        # 单行JSON，立即处理
-                        content = self.extract_json_content([line])
-                        if content:  # 只有成功解析的内容才会被记录
-                            # 去除重复的标签和格式化
-                            clean_content = self._clean_content_tags(content, app_name)
-                            captured_contents.append(f"{clean_content}")
-                        self.capturing_json[app_name] = False
-                        self.json_buffer[app_name] = []
-                        
-                elif self.is_valuable_content(line):
-                    # 其他有价值的SummaryNode内容
-                    clean_content = self._clean_content_tags(self.extract_node_content(line), app_name)
-                    captured_contents.append(f"{clean_content}")
-                    
-            elif self.capturing_json[app_name]:
-                # 正在捕获JSON的后续行
-                self.json_buffer[app_name].append(line)
-                
-                # 检查是否是JSON结束
-                if self.is_json_end_line(line):
-                    # JSON结束，处理完整的JSON
-                    content = self.extract_json_content(self.json_buffer[app_name])
-                    if content:  # 只有成功解析的内容才会被记录
-                        # 去除重复的标签和格式化
-                        clean_content = self._clean_content_tags(content, app_name)
-                        captured_contents.append(f"{clean_content}")
-                    
-                    # 重置状态
-                    self.capturing_json[app_name] = False
-                    self.json_buffer[app_name] = []
-        
-        return captured_contents
-    
+            while True:
+                self.host_queue.get_nowait()
+        except queue.Empty:
+            pass
+
     def _trigger_host_speech(self):
-        """触发总教练决策（同步执行）"""
-        if not HOST_AVAILABLE or self.is_host_generating:
+        """触发总教练决策（异步执行，调用方需持有session_lock）"""
+        if not HOST_AVAILABLE:
             return
 
         try:
-            # 设置生成标志
-            self.is_host_generating = True
+            self.host_queue.put_nowait(self.session_generation)
+        except queue.Full:
+            # 已有待处理信号，本次与之合并
+            pass
+
+    def _host_worker(self):
+        """总教练决策工作线程 - 取出缓冲区中全部待处理报告，生成一次决策"""
+        while self.is_monitoring:
+            try:
+                generation = self.host_queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
 
-            # 获取缓冲区的5条Agent报告
-            recent_speeches = self.agent_speeches_buffer[:5]
-            if len(recent_speeches) < 5:
+            with self.session_lock:
+                if generation != self.session_generation or len(self.agent_speeches_buffer) < self.host_speech_threshold:
+                    continue
+                # 生成期间累积的多批报告合并为一次调用
+                recent_speeches = self.agent_speeches_buffer
+                self.agent_speeches_buffer = []
+                self.is_host_generating = True
+
+            try:
+                print(f"ForumEngine: 总教练正在统筹决策（{len(recent_speeches)}条Agent报告）...")
+
+                # 在锁外调用总教练生成决策，期间Agent报告照常写入forum.log
+                host_speech = generate_host_speech(recent_speeches)
+            except Exception as e:
+                print(f"ForumEngine: 触发总教练决策时出错: {e}")
+                host_speech = None
+
+            with self.session_lock:
                 self.is_host_generating = False
-                return
+                if generation != self.session_generation:
+                    print("ForumEngine: 协调会话已切换，丢弃过期的总教练决策")
+                    continue
 
-            print("ForumEngine: 总教练正在统筹决策...")
+                if host_speech:
+                    # 写入总教练决策到forum.log
+                    self.write_to_forum_log(host_speech, "HOST")
+                    print(f"ForumEngine: 总教练决策已记录")
+                else:
+                    print("ForumEngine: 总教练决策生成失败")
+                    # 放回缓冲区，下次达到阈值时重试
+                    self.agent_speeches_buffer = recent_speeches + self.agent_speeches_buffer
+    
+    def _start_session(self, app_name: str):
+        """开始新的协调会话(调用方需持有session_lock)"""
+        print(f"ForumEngine: 在{app_name}中检测到Agent首次分析报告")
+        self.is_searching = True
+        self.last_activity_time = time.monotonic()
+        # 清空forum.log开始新的协调会话
+        self.clear_forum_log()
+
+    def _on_summary_event(self, event: SummaryProduced):
+        """事件总线回调: 记录Agent总结并按阈值触发总教练决策"""
+        if not event.content:
+            return
 
-            # 调用总教练生成决策（传入最近5条Agent报告）
-            host_speech = generate_host_speech(recent_speeches)
+        with self.session_lock:
+            if not self.is_searching:
+                self._start_session(event.source)
 
-            if host_speech:
-                # 写入总教练决策到forum.log
-                self.write_to_forum_log(host_speech, "HOST")
-                print(f"ForumEngine: 总教练决策已记录")
+            # 将来源转换为大写作为标签（如 insight -> INSIGHT）
+            source_tag = event.source.upper()
+            self.write_to_forum_log(event.content, source_tag)
+            self.last_activity_time = time.monotonic()
 
-                # 清空已处理的5条报告
-                self.agent_speeches_buffer = self.agent_speeches_buffer[5:]
-            else:
-                print("ForumEngine: 总教练决策生成失败")
+            # 将Agent报告添加到缓冲区（格式化为完整的日志行）
+            timestamp = datetime.now().strftime('%H:%M:%S')
+            log_line = f"[{timestamp}] [{source_tag}] {event.content}"
+            self.agent_speeches_buffer.append(log_line)
 
-            # 重置生成标志
-            self.is_host_generating = False
+            # 检查是否需要触发总教练决策（正在生成时会合并到下一次调用）
+            if len(self.agent_speeches_buffer) >= self.host_speech_threshold:
+                self._trigger_host_speech()
 
-        except Exception as e:
-            print(f"ForumEngine: 触发总教练决策时出错: {e}")
-            self.is_host_generating = False
-    
-    def _clean_content_tags(self, content: str, app_name: str) -> str:
-        """清理内容中的重复标签和多余前缀"""
-        if not content:
-            return content
-            
-        # 先去除所有可能的标签格式（包括 [INSIGHT]、[MEDIA]、[QUERY] 等）
-        # 使用更强力的清理方式
-        all_app_names = ['INSIGHT', 'MEDIA', 'QUERY']
-        
-        for name in all_app_names:
-            # 去除 [APP_NAME] 格式（大小写不敏感）
-            content = re.sub(rf'\[{name}\]\s*', '', content, flags=re.IGNORECASE)
-            # 去除单独的 APP_NAME 格式
-            content = re.sub(rf'^{name}\s+', '', content, flags=re.IGNORECASE)
-        
-        # 去除任何其他的方括号标签
-        content = re.sub(r'^\[.*?\]\s*', '', content)
-        
-        # 去除可能的重复空格
-        content = re.sub(r'\s+', ' ', content)
-        
-        return content.strip()
-   
     def monitor_logs(self):
         """总教练协调系统 - 智能收集Agent分析报告"""
         print("ForumEngine: 总教练协调系统启动中...")
 
-        # 初始化文件行数和位置 - 记录当前状态作为基线
-        for app_name, log_file in self.monitored_logs.items():
-            self.file_line_counts[app_name] = self.get_file_line_count(log_file)
-            self.file_positions[app_name] = self.get_file_size(log_file)
-            self.capturing_json[app_name] = False
-            self.json_buffer[app_name] = []
-            # print(f"ForumEngine: {app_name} 基线行数: {self.file_line_counts[app_name]}")
+        # 以当前文件末尾作为基线，之后只读取新追加的字节
+        self.watcher = LogFileWatcher(self.monitored_logs)
+        self.watcher.start_at_end()
+        print(f"ForumEngine: 日志监听模式: {self.watcher.mode}, 事件总线模式: {self.event_listener.mode}")
        
         while self.is_monitoring:
             try:
-                # 同时检测三个log文件的变化
-                any_growth = False
-                any_shrink = False
-                captured_any = False
-               
-                # 为每个log文件独立处理
-                for app_name, log_file in self.monitored_logs.items():
-                    current_lines = self.get_file_line_count(log_file)
-                    previous_lines = self.file_line_counts.get(app_name, 0)
-                   
-                    if current_lines > previous_lines:
-                        any_growth = True
-                        # 立即读取新增内容
-                        new_lines = self.read_new_lines(log_file, app_name)
-                       
-                        # 先检查是否需要触发分析（只触发一次）
-                        if not self.is_searching:
-                            for line in new_lines:
-                                if line.strip() and 'FirstSummaryNode' in line:
-                                    print(f"ForumEngine: 在{app_name}中检测到Agent首次分析报告")
-                                    self.is_searching = True
-                                    self.search_inactive_count = 0
-                                    # 清空forum.log开始新的协调会话
-                                    self.clear_forum_log()
-                                    break  # 找到一个就够了，跳出循环
-
-                        # 处理所有新增内容（如果正在分析状态）
-                        if self.is_searching:
-                            # 使用新的处理逻辑
-                            captured_contents = self.process_lines_for_json(new_lines, app_name)
-                            
-                            for content in captured_contents:
-                                # 将app_name转换为大写作为标签（如 insight -> INSIGHT）
-                                source_tag = app_name.upper()
-                                self.write_to_forum_log(content, source_tag)
-                                # print(f"ForumEngine: 捕获Agent分析 - {content}")
-                                captured_any = True
-
-                                # 将Agent报告添加到缓冲区（格式化为完整的日志行）
-                                timestamp = datetime.now().strftime('%H:%M:%S')
-                                log_line = f"[{timestamp}] [{source_tag}] {content}"
-                                self.agent_speeches_buffer.append(log_line)
-
-                                # 检查是否需要触发总教练决策
-                                if len(self.agent_speeches_buffer) >= self.host_speech_threshold and not self.is_host_generating:
-                                    # 同步触发总教练决策
-                                    self._trigger_host_speech()
-                   
-                    elif current_lines < previous_lines:
-                        any_shrink = True
-                        # print(f"ForumEngine: 检测到 {app_name} 日志缩短，将重置基线")
-                        # 重置文件位置到新的文件末尾
-                        self.file_positions[app_name] = self.get_file_size(log_file)
-                        # 重置JSON捕获状态
-                        self.capturing_json[app_name] = False
-                        self.json_buffer[app_name] = []
-                   
-                    # 更新行数记录
-                    self.file_line_counts[app_name] = current_lines
-               
-                # 检查是否应该结束当前协调会话
-                if self.is_searching:
-                    if any_shrink:
-                        # log变短，结束当前协调会话，重置为等待状态
-                        # print("ForumEngine: 日志缩短，结束当前协调会话，回到等待状态")
-                        self.is_searching = False
-                        self.search_inactive_count = 0
-                        # 重置总教练协调状态
-                        self.agent_speeches_buffer = []
-                        self.is_host_generating = False
-                        # 写入结束标记
-                        end_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        self.write_to_forum_log(f"=== ForumEngine 协调会话结束 - {end_time} ===", "SYSTEM")
-                        # print("ForumEngine: 已重置基线，等待下次Agent首次分析报告")
-                    elif not any_growth and not captured_any:
-                        # 没有增长也没有捕获内容，增加非活跃计数
-                        self.search_inactive_count += 1
-                        if self.search_inactive_count >= 900:  # 15分钟无活动才结束
-                            print("ForumEngine: 长时间无活动，结束协调会话")
-                            self.is_searching = False
-                            self.search_inactive_count = 0
-                            # 重置总教练协调状态
-                            self.agent_speeches_buffer = []
-                            self.is_host_generating = False
-                            # 写入结束标记
-                            end_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                            self.write_to_forum_log(f"=== ForumEngine 协调会话结束 - {end_time} ===", "SYSTEM")
-                    else:
-                        self.search_inactive_count = 0  # 重置计数器
-               
-                # 短暂休眠
-                time.sleep(1)
-               
+                # 等待日志变化(最多1秒)，无活动的时长按单调时钟计算，与唤醒次数无关
+                changes = self.watcher.poll() if self.watcher.wait(1.0) else {}
+                any_growth = any(not change.truncated for change in changes.values())
+                any_shrink = any(change.truncated for change in changes.values())
+
+                with self.session_lock:
+                    # 检查是否需要开始协调会话（只触发一次）
+                    if not self.is_searching:
+                        for app_name, change in changes.items():
+                            if any('FirstSummaryNode' in line for line in change.lines):
+                                self._start_session(app_name)
+                                break
+
+                    self._update_session_activity(any_growth, any_shrink)
+
             except Exception as e:
                 print(f"ForumEngine: 协调记录中出错: {e}")
                 import traceback
                 traceback.print_exc()
                 time.sleep(2)
 
+        self.watcher.close()
         print("ForumEngine: 停止总教练协调系统")
+
+    def _update_session_activity(self, any_growth: bool, any_shrink: bool):
+        """根据日志活动决定是否结束当前协调会话(调用方需持有session_lock)"""
+        # 检查是否应该结束当前协调会话
+        if self.is_searching:
+            if any_shrink:
+                # log变短，结束当前协调会话，重置为等待状态
+                # print("ForumEngine: 日志缩短，结束当前协调会话，回到等待状态")
+                self.is_searching = False
+                # 重置总教练协调状态
+                self._reset_host_state()
+                # 写入结束标记
+                end_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                self.write_to_forum_log(f"=== ForumEngine 协调会话结束 - {end_time} ===", "SYSTEM")
+                # print("ForumEngine: 已重置基线，等待下次Agent首次分析报告")
+            elif not any_growth:
+                # 没有日志增长，检查距最近一次活动的时长
+                if time.monotonic() - self.last_activity_time >= self.session_idle_timeout:
+                    print("ForumEngine: 长时间无活动，结束协调会话")
+                    self.is_searching = False
+                    # 重置总教练协调状态
+                    self._reset_host_state()
+                    # 写入结束标记
+                    end_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    self.write_to_forum_log(f"=== ForumEngine 协调会话结束 - {end_time} ===", "SYSTEM")
+            else:
+                self.last_activity_time = time.monotonic()  # 记录最近一次活动
    
     def start_monitoring(self):
         """启动总教练协调系统"""
@@ -573,10 +268,15 @@ class LogMonitor:
             return False
 
         try:
+            # 启动事件总线监听，Agent总结通过SummaryProduced事件送达(回调已在__init__中订阅)
+            self.event_listener.start()
+
             # 启动总教练协调系统
             self.is_monitoring = True
             self.monitor_thread = threading.Thread(target=self.monitor_logs, daemon=True)
             self.monitor_thread.start()
+            self.host_thread = threading.Thread(target=self._host_worker, name="forum-host", daemon=True)
+            self.host_thread.start()
 
             print("ForumEngine: 总教练协调系统已启动")
             return True
@@ -597,6 +297,10 @@ class LogMonitor:
 
             if self.monitor_thread and self.monitor_thread.is_alive():
                 self.monitor_thread.join(timeout=2)
+            if self.host_thread and self.host_thread.is_alive():
+                # 正在进行的LLM调用不等待完成，工作线程为守护线程
+                self.host_thread.join(timeout=2)
+            self.event_listener.stop()
 
             # 写入结束标记
             end_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
@@ -620,87 +324,6 @@ class LogMonitor:
             print(f"ForumEngine: 读取forum.log失败: {e}")
             return []
 
-    def fix_json_string(self, json_text: str) -> str:
-        """修复JSON字符串中的常见问题，特别是未转义的双引号"""
-        try:
-            # 尝试直接解析，如果成功则返回原文本
-            json.loads(json_text)
-            return json_text
-        except json.JSONDecodeError:
-            pass
-        
-        # 修复未转义的双引号问题
-        # 这是一个更智能的修复方法，专门处理字符串值中的双引号
-        
-        try:
-            # 使用状态机方法修复JSON
-            # 遍历字符，跟踪是否在字符串值内部
-            
-            fixed_text = ""
-            i = 0
-            in_string = False
-            escape_next = False
-            
-            while i < len(json_text):
-                char = json_text[i]
-                
-                if escape_next:
-                    # 处理转义字符
-                    fixed_text += char
-                    escape_next = False
-                    i += 1
-                    continue
-                
-                if char == '\\':
-                    # 转义字符
-                    fixed_text += char
-                    escape_next = True
-                    i += 1
-                    continue
-                
-                if char == '"' and not escape_next:
-                    # 遇到双引号
-                    if in_string:
-                        # 在字符串内部，检查下一个字符
-                        # 如果下一个字符是冒号或者逗号或者大括号，说明这是字符串结束
-                        next_char_pos = i + 1
-                        while next_char_pos < len(json_text) and json_text[next_char_pos].isspace():
-                            next_char_pos += 1
-                        
-                        if next_char_pos < len(json_text):
-                            next_char = json_text[next_char_pos]
-                            if next_char in [':', ',', '}']:
-                                # 这是字符串结束，退出字符串状态
-                                in_string = False
-                                fixed_text += char
-                            else:
-                                # 这是字符串内部的引号，需要转义
-                                fixed_text += '\\"'
-                        else:
-                            # 文件结束，退出字符串状态
-                            in_string = False
-                            fixed_text += char
-                    else:
-                        # 字符串开始
-                        in_string = True
-                        fixed_text += char
-                else:
-                    # 其他字符
-                    fixed_text += char
-                
-                i += 1
-            
-            # 尝试解析修复后的JSON
-            try:
-                json.loads(fixed_text)
-                return fixed_text
-            except json.JSONDecodeError:
-                # 修复失败，返回None
-                return None
-                
-        except Exception:
-            return None
-
 # 全局监控器实例
 _monitor_instance = None
 
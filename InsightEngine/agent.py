@@ -7,8 +7,9 @@ Sports Scientist Agent (运动科学家Agent)主类
 import json
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Tuple, Union, Callable
 
 from .llms import LLMClient
 from .nodes import (
@@ -20,8 +21,11 @@ from .nodes import (
     ReportFormattingNode
 )
 from .state import State
-from .tools import create_training_data_search, DBResponse
-from .utils import Config, load_config, format_search_results_for_prompt
+from .tools import get_training_data_search, DBResponse
+from .utils import (
+    Config, load_config, format_search_results_for_prompt,
+    encode_training_records, encode_statistics
+)
 
 
 class SportsScientistAgent:
@@ -72,7 +76,7 @@ class SportsScientistAgent:
             os.environ["DB_CHARSET"] = self.config.db_charset
         
         # 初始化搜索工具集 (根据config.py的TRAINING_DATA_SOURCE自动选择)
-        self.search_agency = create_training_data_search()
+        self.search_agency = get_training_data_search()
         self._current_data_source = self.search_agency.data_source  # 记录当前数据源
 
         # 初始化节点
@@ -81,6 +85,12 @@ class SportsScientistAgent:
         # 状态
         self.state = State()
 
+        # 流式输出回调: (段落索引, 增量文本)，最终报告的段落索引为None
+        self.stream_callback: Optional[Callable[[Optional[int], str], None]] = None
+
+        # 状态检查点文件路径，生成报告结构或从检查点恢复时设置
+        self.checkpoint_path: Optional[str] = None
+
         # 确保输出目录存在
         os.makedirs(self.config.output_dir, exist_ok=True)
 
@@ -97,35 +107,43 @@ class SportsScientistAgent:
 
     def _refresh_search_agency_if_needed(self):
         """
-        🔥 热更新机制: 检查配置是否变化,如果变化则重新创建搜索工具
+        🔥 热更新机制: 从搜索工具注册表获取当前配置对应的工具实例
 
-        每次执行查询前调用此方法,确保使用最新的数据源配置
+        每次执行查询前调用此方法。config.py未变化时注册表直接返回缓存实例,
+        只有数据源或数据库配置变化时才会切换到新实例
         """
         try:
-            # 重新创建搜索工具 (内部会通过importlib.reload读取最新配置)
-            new_agency = create_training_data_search()
+            new_agency = get_training_data_search()
+            if new_agency is self.search_agency:
+                return
+
             new_data_source = new_agency.data_source
 
             # 检查数据源是否变化
             if new_data_source != self._current_data_source:
                 print(f"🔄 检测到数据源变化: {self._current_data_source.upper()} → {new_data_source.upper()}")
-                self.search_agency = new_agency
-                self._current_data_source = new_data_source
 
                 # 输出新数据源的能力描述
                 if new_data_source == 'keep':
                     print(f"✅ 已切换到Keep数据源 - 支持: 心率、配速、距离、时长等基础指标")
                 elif new_data_source == 'garmin':
                     print(f"✅ 已切换到Garmin数据源 - 支持: 心率区间、步频步幅、功率、训练效果、训练负荷等专业指标")
-                print(f"✅ 新工具集: {', '.join(self.search_agency.get_supported_tools())}")
-            else:
-                # 即使数据源未变化,也要更新引用以防止其他配置变化
-                self.search_agency = new_agency
+                print(f"✅ 新工具集: {', '.join(new_agency.get_supported_tools())}")
+
+            self.search_agency = new_agency
+            self._current_data_source = new_data_source
 
         except Exception as e:
             print(f"⚠️  刷新搜索工具失败: {e}")
             print(f"⚠️  继续使用当前数据源: {self._current_data_source.upper()}")
     
+    def _stream_callback_for(self, paragraph_index: Optional[int]) -> Optional[Callable[[str], None]]:
+        """将stream_callback绑定到指定段落，供节点流式输出时回调"""
+        if self.stream_callback is None:
+            return None
+        callback = self.stream_callback
+        return lambda delta: callback(paragraph_index, delta)
+
     def _initialize_llm(self) -> LLMClient:
         """初始化LLM客户端"""
         return LLMClient(
@@ -166,7 +184,260 @@ class SportsScientistAgent:
             return True
         except ValueError:
             return False
-    
+
+    @staticmethod
+    def _default_search_kwargs():
+        """工具参数缺失或无效时的回退查询: 最近30天训练记录"""
+        return "search_recent_trainings", {"days": 30, "limit": 50}
+
+    def _build_search_kwargs(self, search_tool: str, tool_output: Dict[str, Any],
+                             indent: str = "  ") -> Tuple[str, Dict[str, Any]]:
+        """
+        将搜索/反思节点输出的工具参数整理为execute_search_tool的关键字参数
+
+        首次搜索和反思搜索共用；参数缺失或无效时回退到search_recent_trainings
+
+        Args:
+            search_tool: 节点选择的工具名
+            tool_output: 节点输出(包含各工具参数)
+            indent: 日志缩进
+
+        Returns:
+            (实际执行的工具名, 关键字参数)
+        """
+        search_kwargs = {}
+
+        # search_recent_trainings: 需要days参数
+        if search_tool == "search_recent_trainings":
+            days = tool_output.get("days")
+            if not days:
+                print(f"{indent}  ⚠️ search_recent_trainings工具缺少days参数,默认使用30天")
+                days = 30
+            search_kwargs["days"] = days
+            search_kwargs["limit"] = tool_output.get("limit") or 50
+            print(f"{indent}- 查询最近 {days} 天训练记录")
+
+        # search_by_date_range: 需要start_date和end_date
+        elif search_tool == "search_by_date_range":
+            start_date = tool_output.get("start_date")
+            end_date = tool_output.get("end_date")
+
+            if start_date and end_date:
+                if self._validate_date_format(start_date) and self._validate_date_format(end_date):
+                    search_kwargs["start_date"] = start_date
+                    search_kwargs["end_date"] = end_date
+                    search_kwargs["limit"] = tool_output.get("limit") or 100
+                    print(f"{indent}- 时间范围: {start_date} 到 {end_date}")
+                else:
+                    print(f"{indent}  ⚠️ 日期格式错误,改用search_recent_trainings")
+                    return self._default_search_kwargs()
+            else:
+                print(f"{indent}  ⚠️ 缺少日期参数,改用search_recent_trainings")
+                return self._default_search_kwargs()
+
+        # get_training_stats: 可选start_date和end_date
+        elif search_tool == "get_training_stats":
+            start_date = tool_output.get("start_date")
+            end_date = tool_output.get("end_date")
+            if start_date and self._validate_date_format(start_date):
+                search_kwargs["start_date"] = start_date
+            if end_date and self._validate_date_format(end_date):
+                search_kwargs["end_date"] = end_date
+            print(f"{indent}- 获取训练统计数据")
+
+        # search_by_distance_range: 需要min_distance_km
+        elif search_tool == "search_by_distance_range":
+            min_distance_km = tool_output.get("min_distance_km")
+            if min_distance_km is not None:
+                search_kwargs["min_distance_km"] = min_distance_km
+                search_kwargs["max_distance_km"] = tool_output.get("max_distance_km")
+                search_kwargs["limit"] = tool_output.get("limit") or 50
+                print(f"{indent}- 距离范围: {min_distance_km}km+")
+            else:
+                print(f"{indent}  ⚠️ 缺少min_distance_km参数,改用search_recent_trainings")
+                return self._default_search_kwargs()
+
+        # search_by_heart_rate: 需要min_avg_hr
+        elif search_tool == "search_by_heart_rate":
+            min_avg_hr = tool_output.get("min_avg_hr")
+            if min_avg_hr is not None:
+                search_kwargs["min_avg_hr"] = min_avg_hr
+                search_kwargs["max_avg_hr"] = tool_output.get("max_avg_hr")
+                search_kwargs["limit"] = tool_output.get("limit") or 50
+                print(f"{indent}- 心率范围: {min_avg_hr}bpm+")
+            else:
+                print(f"{indent}  ⚠️ 缺少min_avg_hr参数,改用search_recent_trainings")
+                return self._default_search_kwargs()
+
+        # search_by_training_load: 需要min_load (Garmin专属)
+        elif search_tool == "search_by_training_load":
+            min_load = tool_output.get("min_load")
+            if min_load is not None:
+                search_kwargs["min_load"] = min_load
+                search_kwargs["max_load"] = tool_output.get("max_load")
+                search_kwargs["limit"] = tool_output.get("limit") or 50
+                print(f"{indent}- 训练负荷范围: {min_load}+")
+            else:
+                print(f"{indent}  ⚠️ 缺少min_load参数,改用search_recent_trainings")
+                return self._default_search_kwargs()
+
+        # search_by_power_zone: 需要min_avg_power (Garmin专属)
+        elif search_tool == "search_by_power_zone":
+            min_avg_power = tool_output.get("min_avg_power")
+            if min_avg_power is not None:
+                search_kwargs["min_avg_power"] = min_avg_power
+                search_kwargs["max_avg_power"] = tool_output.get("max_avg_power")
+                search_kwargs["limit"] = tool_output.get("limit") or 50
+                print(f"{indent}- 功率范围: {min_avg_power}W+")
+            else:
+                print(f"{indent}  ⚠️ 缺少min_avg_power参数,改用search_recent_trainings")
+                return self._default_search_kwargs()
+
+        # get_training_effect_analysis: 可选start_date和end_date (Garmin专属)
+        elif search_tool == "get_training_effect_analysis":
+            start_date = tool_output.get("start_date")
+            end_date = tool_output.get("end_date")
+            if start_date and self._validate_date_format(start_date):
+                search_kwargs["start_date"] = start_date
+            if end_date and self._validate_date_format(end_date):
+                search_kwargs["end_date"] = end_date
+            print(f"{indent}- 获取训练效果分析")
+
+        # analyze_heart_rate_series: 全部可选 (Keep专属)
+        elif search_tool == "analyze_heart_rate_series":
+            start_date = tool_output.get("start_date")
+            end_date = tool_output.get("end_date")
+            if start_date and self._validate_date_format(start_date):
+                search_kwargs["start_date"] = start_date
+            if end_date and self._validate_date_format(end_date):
+                search_kwargs["end_date"] = end_date
+            search_kwargs["limit"] = tool_output.get("limit") or 50
+            search_kwargs["max_hr"] = tool_output.get("max_hr")
+            search_kwargs["resting_hr"] = tool_output.get("resting_hr")
+            print(f"{indent}- 分析逐秒心率序列")
+
+        # batch_query: 需要queries子查询列表
+        elif search_tool == "batch_query":
+            queries = [q for q in (tool_output.get("queries") or []) if isinstance(q, dict) and q.get("tool")]
+            if queries:
+                search_kwargs["queries"] = queries
+                print(f"{indent}- 批量查询: {', '.join(q['tool'] for q in queries)}")
+            else:
+                print(f"{indent}  ⚠️ 缺少queries参数,改用search_recent_trainings")
+                return self._default_search_kwargs()
+
+        else:
+            print(f"{indent}  ⚠️ 未知工具 {search_tool},使用search_recent_trainings")
+            return self._default_search_kwargs()
+
+        return search_tool, search_kwargs
+
+    @staticmethod
+    def _format_hr_analysis(analysis: Optional[Dict[str, Any]]) -> str:
+        """将analyze_heart_rate_series计算的心率序列指标格式化为记录描述的附加行"""
+        if not analysis:
+            return ""
+        zones = analysis['zone_seconds']
+        zone_text = " / ".join(f"Z{i + 1} {zones[name] // 60}分" for i, name in enumerate(zones))
+        drift = analysis.get('cardiac_drift_pct')
+        decoupling = analysis.get('decoupling_pct')
+        return (
+            f"\n心率区间时长: {zone_text}\n"
+            f"心率漂移: {f'{drift}%' if drift is not None else '未知'}\n"
+            f"有氧解耦: {f'{decoupling}%' if decoupling is not None else '未知'}\n"
+            f"TRIMP: {analysis.get('trimp') or '未知'}"
+        )
+
+    def _build_search_results(self, search_response: Optional[DBResponse]) -> List[Dict[str, Any]]:
+        """
+        将查询结果转换为提供给总结节点的搜索结果列表
+
+        compact_search_results开启时所有记录编码为一张紧凑表格(附带工具统计结果)，作为单条搜索结果；
+        关闭时沿用每条记录一段文字描述的格式。
+        """
+        if not self.config.compact_search_results:
+            return self._build_search_results_verbose(search_response)
+
+        if not search_response or (not search_response.results and not search_response.statistics):
+            return []
+
+        records = search_response.results
+        # 使用配置文件控制传递给LLM的结果数量，0表示不限制
+        if self.config.max_search_results_for_llm > 0:
+            records = records[:self.config.max_search_results_for_llm]
+
+        sections = []
+        statistics_text = encode_statistics(search_response.statistics)
+        if statistics_text:
+            sections.append(f"统计结果:\n{statistics_text}")
+        records_text = encode_training_records(records, self.config.search_results_token_budget)
+        if records_text:
+            sections.append(records_text)
+        content = "\n\n".join(sections)
+
+        start_times = [getattr(r, 'start_time', None) or getattr(r, 'start_time_gmt', None) for r in records]
+        latest = max((t for t in start_times if t), default=None)
+        return [{
+            'title': f"[{search_response.tool_name}] {len(search_response.results)}条训练记录",
+            'url': "",
+            'content': content,
+            'score': len(search_response.results),
+            'raw_content': content,
+            'published_date': latest.isoformat() if latest else None,
+            'platform': "训练记录数据库",
+            'content_type': search_response.tool_name,
+            'author': search_response.data_source,
+            'engagement': 0
+        }]
+
+    def _build_search_results_verbose(self, search_response: Optional[DBResponse]) -> List[Dict[str, Any]]:
+        """每条训练记录转换为一段文字描述(关闭compact_search_results时使用)"""
+        search_results = []
+        if search_response and search_response.results:
+            # 使用配置文件控制传递给LLM的结果数量，0表示不限制
+            if self.config.max_search_results_for_llm > 0:
+                max_results = min(len(search_response.results), self.config.max_search_results_for_llm)
+            else:
+                max_results = len(search_response.results)  # 不限制，传递所有结果
+            for result in search_response.results[:max_results]:
+                # 构建训练记录描述
+                distance_km = f"{float(result.distance_meters)/1000:.2f}km" if result.distance_meters else "未知距离"
+                duration_min = f"{int(result.duration_seconds)//60}分{int(result.duration_seconds)%60}秒"
+                pace_str = f"{int(result.pace_per_km//60)}'{int(result.pace_per_km%60):02d}\"/km" if result.pace_per_km else "未知配速"
+
+                # 兼容Keep和Garmin数据源的字段差异
+                sport_type = getattr(result, 'exercise_type', None) or getattr(result, 'sport_type', '未知')
+                start_time = getattr(result, 'start_time', None) or getattr(result, 'start_time_gmt', None)
+                calories = getattr(result, 'calories', None) or getattr(result, 'activity_calories', None)
+
+                title = f"[{sport_type}] {start_time.strftime('%Y-%m-%d %H:%M')} - {distance_km}"
+                content = (
+                    f"运动类型: {sport_type}\n"
+                    f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                    f"持续时间: {duration_min}\n"
+                    f"距离: {distance_km}\n"
+                    f"配速: {pace_str}\n"
+                    f"平均心率: {result.avg_heart_rate or '未知'}bpm\n"
+                    f"最大心率: {result.max_heart_rate or '未知'}bpm\n"
+                    f"卡路里: {calories or '未知'}kcal"
+                )
+                content += self._format_hr_analysis(getattr(result, 'hr_analysis', None))
+
+                search_results.append({
+                    'title': title,
+                    'url': "",
+                    'content': content,
+                    'score': result.avg_heart_rate or 0,  # 使用心率作为评分
+                    'raw_content': content,
+                    'published_date': start_time.isoformat(),
+                    'platform': "训练记录数据库",
+                    'content_type': sport_type,
+                    'author': result.user_id,
+                    'engagement': calories or 0
+                })
+
+        return search_results
+
     def execute_search_tool(self, tool_name: str, query: str, **kwargs) -> DBResponse:
         """
         执行指定的训练数据库查询工具
@@ -181,6 +452,8 @@ class SportsScientistAgent:
                 - "search_by_training_load": 按训练负荷查询 (Garmin专属)
                 - "search_by_power_zone": 按功率区间查询 (Garmin专属)
                 - "get_training_effect_analysis": 训练效果分析 (Garmin专属)
+                - "analyze_heart_rate_series": 逐秒心率序列分析 (Keep专属)
+                - "batch_query": 在同一数据库会话中一次执行多个上述工具
             query: 查询描述（用于日志记录）
             **kwargs: 额外参数：
                 - days: 最近天数
@@ -189,6 +462,8 @@ class SportsScientistAgent:
                 - min_avg_hr, max_avg_hr: 心率范围
                 - min_load, max_load: 训练负荷范围 (Garmin)
                 - min_avg_power, max_avg_power: 功率范围 (Garmin)
+                - max_hr, resting_hr: 最大/静息心率 (Keep心率序列分析)
+                - queries: 子查询列表 (batch_query)，每项为 {"tool": 工具名, ...参数}
                 - limit: 结果数量限制
 
         Returns:
@@ -304,6 +579,23 @@ class SportsScientistAgent:
                     end_date=end_date
                 )
 
+            elif tool_name == "analyze_heart_rate_series":
+                # Keep专属: 逐秒心率序列分析
+                response = self.search_agency.analyze_heart_rate_series(
+                    start_date=kwargs.get("start_date"),
+                    end_date=kwargs.get("end_date"),
+                    limit=kwargs.get("limit", 50),
+                    max_hr=kwargs.get("max_hr"),
+                    resting_hr=kwargs.get("resting_hr")
+                )
+
+            elif tool_name == "batch_query":
+                queries = kwargs.get("queries")
+                if not queries:
+                    raise ValueError("batch_query工具需要queries参数")
+
+                response = self.search_agency.batch_query(queries=queries)
+
             else:
                 print(f"    ⚠️ 未知的查询工具: {tool_name}")
                 raise ValueError(f"不支持的工具类型: {tool_name}")
@@ -321,13 +613,14 @@ class SportsScientistAgent:
             raise
     
     
-    def research(self, query: str, save_report: bool = True) -> str:
+    def research(self, query: str, save_report: bool = True, resume_from: Optional[str] = None) -> str:
         """
         执行训练数据科学分析
 
         Args:
             query: 分析查询 (例如: "分析我最近的训练状态和进步趋势")
             save_report: 是否保存分析报告到文件
+            resume_from: 检查点文件路径，提供时从该状态继续，跳过已完成的段落与反思
 
         Returns:
             最终分析报告内容 (基于科学数据的训练建议)
@@ -338,14 +631,21 @@ class SportsScientistAgent:
         print(f"{'='*60}")
         
         try:
+            if resume_from:
+                self._resume_from_checkpoint(resume_from)
+
             # Step 1: 生成报告结构
-            self._generate_report_structure(query)
+            if not (resume_from and self.state.paragraphs):
+                self._generate_report_structure(query)
             
             # Step 2: 处理每个段落
             self._process_paragraphs()
             
             # Step 3: 生成最终报告
-            final_report = self._generate_final_report()
+            if resume_from and self.state.is_completed and self.state.final_report:
+                final_report = self.state.final_report
+            else:
+                final_report = self._generate_final_report()
             
             # Step 4: 保存报告
             if save_report:
@@ -370,34 +670,83 @@ class SportsScientistAgent:
         
         # 生成结构并更新状态
         self.state = report_structure_node.mutate_state(state=self.state)
+        self.checkpoint_path = self._new_checkpoint_path(query)
+        self._checkpoint()
 
         print(f"分析框架已生成，共 {len(self.state.paragraphs)} 个数据模块:")
         for i, paragraph in enumerate(self.state.paragraphs, 1):
             print(f"  {i}. {paragraph.title}")
     
-    def _process_paragraphs(self):
-        """处理所有数据分析模块"""
+    def _process_paragraphs(self, progress_callback: Optional[Callable[[int, int, int], None]] = None):
+        """
+        处理所有数据分析模块
+
+        paragraph_concurrency > 1 时各模块在线程池中并行分析,
+        模块顺序由state.paragraphs的索引决定,与完成先后无关
+
+        Args:
+            progress_callback: 每个模块完成后在调用线程中回调 (模块索引, 已完成数, 总数)
+        """
         total_paragraphs = len(self.state.paragraphs)
+        concurrency = max(1, min(self.config.paragraph_concurrency, total_paragraphs))
 
-        for i in range(total_paragraphs):
-            print(f"\n[步骤 2.{i+1}] 数据模块分析: {self.state.paragraphs[i].title}")
-            print("-" * 50)
-            
-            # 初始搜索和总结
-            self._initial_search_and_summary(i)
-            
-            # 反思循环
-            self._reflection_loop(i)
-            
-            # 标记模块完成
-            self.state.paragraphs[i].research.mark_completed()
+        if concurrency == 1:
+            for i in range(total_paragraphs):
+                self._process_single_paragraph(i)
+
+                progress = (i + 1) / total_paragraphs * 100
+                print(f"数据模块分析完成 ({progress:.1f}%)")
+                if progress_callback:
+                    progress_callback(i, i + 1, total_paragraphs)
+            return
 
-            progress = (i + 1) / total_paragraphs * 100
-            print(f"数据模块分析完成 ({progress:.1f}%)")
+        print(f"\n[步骤 2] 并行分析 {total_paragraphs} 个数据模块 (并发数: {concurrency})")
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="insight-paragraph")
+        try:
+            futures = {
+                executor.submit(self._process_single_paragraph, i): i
+                for i in range(total_paragraphs)
+            }
+            completed = 0
+            for future in as_completed(futures):
+                i = futures[future]
+                future.result()
+                completed += 1
+
+                progress = completed / total_paragraphs * 100
+                print(f"数据模块 {i+1} 分析完成 ({progress:.1f}%)")
+                if progress_callback:
+                    progress_callback(i, completed, total_paragraphs)
+        finally:
+            # 任一模块失败时取消尚未开始的模块
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _process_single_paragraph(self, paragraph_index: int):
+        """分析单个数据模块: 初始查询总结 + 反思循环"""
+        if self.state.paragraphs[paragraph_index].is_completed():
+            print(f"\n[步骤 2.{paragraph_index+1}] 检查点中已完成，跳过: {self.state.paragraphs[paragraph_index].title}")
+            return
+
+        print(f"\n[步骤 2.{paragraph_index+1}] 数据模块分析: {self.state.paragraphs[paragraph_index].title}")
+        print("-" * 50)
+
+        # 初始搜索和总结
+        self._initial_search_and_summary(paragraph_index)
+
+        # 反思循环
+        self._reflection_loop(paragraph_index)
+
+        # 标记模块完成
+        with self.state.lock:
+            self.state.paragraphs[paragraph_index].research.mark_completed()
+        self._checkpoint()
     
     def _initial_search_and_summary(self, paragraph_index: int):
         """执行初始数据查询和量化分析"""
         paragraph = self.state.paragraphs[paragraph_index]
+        if paragraph.research.latest_summary:
+            print("  - 检查点中已有初始总结，跳过")
+            return
 
         # 准备搜索输入
         search_input = {
@@ -419,162 +768,12 @@ class SportsScientistAgent:
         # 执行数据查询
         print("  - 从训练数据库提取数据...")
 
-        # 处理训练数据工具参数
-        search_kwargs = {}
-
-        # search_recent_trainings: 需要days参数
-        if search_tool == "search_recent_trainings":
-            days = search_output.get("days")
-            if not days:
-                print(f"    ⚠️ search_recent_trainings工具缺少days参数,默认使用30天")
-                days = 30
-            search_kwargs["days"] = days
-            search_kwargs["limit"] = search_output.get("limit") or 50
-            print(f"  - 查询最近 {days} 天训练记录")
-
-        # search_by_date_range: 需要start_date和end_date
-        elif search_tool == "search_by_date_range":
-            start_date = search_output.get("start_date")
-            end_date = search_output.get("end_date")
-
-            if start_date and end_date:
-                if self._validate_date_format(start_date) and self._validate_date_format(end_date):
-                    search_kwargs["start_date"] = start_date
-                    search_kwargs["end_date"] = end_date
-                    search_kwargs["limit"] = search_output.get("limit") or 100
-                    print(f"  - 时间范围: {start_date} 到 {end_date}")
-                else:
-                    print(f"    ⚠️ 日期格式错误,改用search_recent_trainings")
-                    search_tool = "search_recent_trainings"
-                    search_kwargs = {"days": 30, "limit": 50}
-            else:
-                print(f"    ⚠️ 缺少日期参数,改用search_recent_trainings")
-                search_tool = "search_recent_trainings"
-                search_kwargs = {"days": 30, "limit": 50}
-
-        # get_training_stats: 可选start_date和end_date
-        elif search_tool == "get_training_stats":
-            start_date = search_output.get("start_date")
-            end_date = search_output.get("end_date")
-            if start_date and self._validate_date_format(start_date):
-                search_kwargs["start_date"] = start_date
-            if end_date and self._validate_date_format(end_date):
-                search_kwargs["end_date"] = end_date
-            print(f"  - 获取训练统计数据")
-
-        # search_by_distance_range: 需要min_distance_km
-        elif search_tool == "search_by_distance_range":
-            min_distance_km = search_output.get("min_distance_km")
-            if min_distance_km is not None:
-                search_kwargs["min_distance_km"] = min_distance_km
-                search_kwargs["max_distance_km"] = search_output.get("max_distance_km")
-                search_kwargs["limit"] = search_output.get("limit") or 50
-                print(f"  - 距离范围: {min_distance_km}km+")
-            else:
-                print(f"    ⚠️ 缺少min_distance_km参数,改用search_recent_trainings")
-                search_tool = "search_recent_trainings"
-                search_kwargs = {"days": 30, "limit": 50}
-
-        # search_by_heart_rate: 需要min_avg_hr
-        elif search_tool == "search_by_heart_rate":
-            min_avg_hr = search_output.get("min_avg_hr")
-            if min_avg_hr is not None:
-                search_kwargs["min_avg_hr"] = min_avg_hr
-                search_kwargs["max_avg_hr"] = search_output.get("max_avg_hr")
-                search_kwargs["limit"] = search_output.get("limit") or 50
-                print(f"  - 心率范围: {min_avg_hr}bpm+")
-            else:
-                print(f"    ⚠️ 缺少min_avg_hr参数,改用search_recent_trainings")
-                search_tool = "search_recent_trainings"
-                search_kwargs = {"days": 30, "limit": 50}
-
-        # search_by_training_load: 需要min_load (Garmin专属)
-        elif search_tool == "search_by_training_load":
-            min_load = search_output.get("min_load")
-            if min_load is not None:
-                search_kwargs["min_load"] = min_load
-                search_kwargs["max_load"] = search_output.get("max_load")
-                search_kwargs["limit"] = search_output.get("limit") or 50
-                print(f"  - 训练负荷范围: {min_load}+")
-            else:
-                print(f"    ⚠️ 缺少min_load参数,改用search_recent_trainings")
-                search_tool = "search_recent_trainings"
-                search_kwargs = {"days": 30, "limit": 50}
-
-        # search_by_power_zone: 需要min_avg_power (Garmin专属)
-        elif search_tool == "search_by_power_zone":
-            min_avg_power = search_output.get("min_avg_power")
-            if min_avg_power is not None:
-                search_kwargs["min_avg_power"] = min_avg_power
-                search_kwargs["max_avg_power"] = search_output.get("max_avg_power")
-                search_kwargs["limit"] = search_output.get("limit") or 50
-                print(f"  - 功率范围: {min_avg_power}W+")
-            else:
-                print(f"    ⚠️ 缺少min_avg_power参数,改用search_recent_trainings")
-                search_tool = "search_recent_trainings"
-                search_kwargs = {"days": 30, "limit": 50}
-
-        # get_training_effect_analysis: 可选start_date和end_date (Garmin专属)
-        elif search_tool == "get_training_effect_analysis":
-            start_date = search_output.get("start_date")
-            end_date = search_output.get("end_date")
-            if start_date and self._validate_date_format(start_date):
-                search_kwargs["start_date"] = start_date
-            if end_date and self._validate_date_format(end_date):
-                search_kwargs["end_date"] = end_date
-            print(f"  - 获取训练效果分析")
-
-        else:
-            print(f"    ⚠️ 未知工具 {search_tool},使用search_recent_trainings")
-            search_tool = "search_recent_trainings"
-            search_kwargs = {"days": 30, "limit": 50}
-
+        search_tool, search_kwargs = self._build_search_kwargs(search_tool, search_output)
         search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
         
         # 转换为兼容格式
-        search_results = []
-        if search_response and search_response.results:
-            # 使用配置文件控制传递给LLM的结果数量，0表示不限制
-            if self.config.max_search_results_for_llm > 0:
-                max_results = min(len(search_response.results), self.config.max_search_results_for_llm)
-            else:
-                max_results = len(search_response.results)  # 不限制，传递所有结果
-            for result in search_response.results[:max_results]:
-                # 构建训练记录描述
-                distance_km = f"{float(result.distance_meters)/1000:.2f}km" if result.distance_meters else "未知距离"
-                duration_min = f"{int(result.duration_seconds)//60}分{int(result.duration_seconds)%60}秒"
-                pace_str = f"{int(result.pace_per_km//60)}'{int(result.pace_per_km%60):02d}\"/km" if result.pace_per_km else "未知配速"
-
-                # 兼容Keep和Garmin数据源的字段差异
-                sport_type = getattr(result, 'exercise_type', None) or getattr(result, 'sport_type', '未知')
-                start_time = getattr(result, 'start_time', None) or getattr(result, 'start_time_gmt', None)
-                calories = getattr(result, 'calories', None) or getattr(result, 'activity_calories', None)
-
-                title = f"[{sport_type}] {start_time.strftime('%Y-%m-%d %H:%M')} - {distance_km}"
-                content = (
-                    f"运动类型: {sport_type}\n"
-                    f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                    f"持续时间: {duration_min}\n"
-                    f"距离: {distance_km}\n"
-                    f"配速: {pace_str}\n"
-                    f"平均心率: {result.avg_heart_rate or '未知'}bpm\n"
-                    f"最大心率: {result.max_heart_rate or '未知'}bpm\n"
-                    f"卡路里: {calories or '未知'}kcal"
-                )
+        search_results = self._build_search_results(search_response)
 
-                search_results.append({
-                    'title': title,
-                    'url': "",
-                    'content': content,
-                    'score': result.avg_heart_rate or 0,  # 使用心率作为评分
-                    'raw_content': content,
-                    'published_date': start_time.isoformat(),
-                    'platform': "训练记录数据库",
-                    'content_type': sport_type,
-                    'author': result.user_id,
-                    'engagement': calories or 0
-                })
-        
         if search_results:
             print(f"  - 找到 {len(search_results)} 个搜索结果")
             for j, result in enumerate(search_results, 1):
@@ -584,7 +783,7 @@ class SportsScientistAgent:
             print("  - 未找到搜索结果")
         
         # 更新状态中的搜索历史
-        paragraph.research.add_search_results(search_query, search_results)
+        paragraph.research.add_search_results(search_query, search_results, search_round=0)
         
         # 生成初始总结
         print("  - 生成初始总结...")
@@ -599,16 +798,18 @@ class SportsScientistAgent:
         
         # 更新状态
         self.state = self.first_summary_node.mutate_state(
-            summary_input, self.state, paragraph_index
+            summary_input, self.state, paragraph_index,
+            stream_callback=self._stream_callback_for(paragraph_index),
         )
         
         print("  - 初始总结完成")
+        self._checkpoint()
     
     def _reflection_loop(self, paragraph_index: int):
         """执行反思循环"""
         paragraph = self.state.paragraphs[paragraph_index]
         
-        for reflection_i in range(self.config.max_reflections):
+        for reflection_i in range(paragraph.research.reflection_iteration, self.config.max_reflections):
             print(f"  - 反思 {reflection_i + 1}/{self.config.max_reflections}...")
             
             # 准备反思输入
@@ -629,162 +830,12 @@ class SportsScientistAgent:
             print(f"    反思推理: {reasoning}")
             
             # 执行反思搜索
-            # 处理训练数据工具参数
-            search_kwargs = {}
-
-            # search_recent_trainings: 需要days参数
-            if search_tool == "search_recent_trainings":
-                days = reflection_output.get("days")
-                if not days:
-                    print(f"      ⚠️ search_recent_trainings工具缺少days参数,默认使用30天")
-                    days = 30
-                search_kwargs["days"] = days
-                search_kwargs["limit"] = reflection_output.get("limit") or 50
-                print(f"    查询最近 {days} 天训练记录")
-
-            # search_by_date_range: 需要start_date和end_date
-            elif search_tool == "search_by_date_range":
-                start_date = reflection_output.get("start_date")
-                end_date = reflection_output.get("end_date")
-
-                if start_date and end_date:
-                    if self._validate_date_format(start_date) and self._validate_date_format(end_date):
-                        search_kwargs["start_date"] = start_date
-                        search_kwargs["end_date"] = end_date
-                        search_kwargs["limit"] = reflection_output.get("limit") or 100
-                        print(f"    时间范围: {start_date} 到 {end_date}")
-                    else:
-                        print(f"      ⚠️ 日期格式错误,改用search_recent_trainings")
-                        search_tool = "search_recent_trainings"
-                        search_kwargs = {"days": 30, "limit": 50}
-                else:
-                    print(f"      ⚠️ 缺少日期参数,改用search_recent_trainings")
-                    search_tool = "search_recent_trainings"
-                    search_kwargs = {"days": 30, "limit": 50}
-
-            # get_training_stats: 可选start_date和end_date
-            elif search_tool == "get_training_stats":
-                start_date = reflection_output.get("start_date")
-                end_date = reflection_output.get("end_date")
-                if start_date and self._validate_date_format(start_date):
-                    search_kwargs["start_date"] = start_date
-                if end_date and self._validate_date_format(end_date):
-                    search_kwargs["end_date"] = end_date
-                print(f"    获取训练统计数据")
-
-            # search_by_distance_range: 需要min_distance_km
-            elif search_tool == "search_by_distance_range":
-                min_distance_km = reflection_output.get("min_distance_km")
-                if min_distance_km is not None:
-                    search_kwargs["min_distance_km"] = min_distance_km
-                    search_kwargs["max_distance_km"] = reflection_output.get("max_distance_km")
-                    search_kwargs["limit"] = reflection_output.get("limit") or 50
-                    print(f"    距离范围: {min_distance_km}km+")
-                else:
-                    print(f"      ⚠️ 缺少min_distance_km参数,改用search_recent_trainings")
-                    search_tool = "search_recent_trainings"
-                    search_kwargs = {"days": 30, "limit": 50}
-
-            # search_by_heart_rate: 需要min_avg_hr
-            elif search_tool == "search_by_heart_rate":
-                min_avg_hr = reflection_output.get("min_avg_hr")
-                if min_avg_hr is not None:
-                    search_kwargs["min_avg_hr"] = min_avg_hr
-                    search_kwargs["max_avg_hr"] = reflection_output.get("max_avg_hr")
-                    search_kwargs["limit"] = reflection_output.get("limit") or 50
-                    print(f"    心率范围: {min_avg_hr}bpm+")
-                else:
-                    print(f"      ⚠️ 缺少min_avg_hr参数,改用search_recent_trainings")
-                    search_tool = "search_recent_trainings"
-                    search_kwargs = {"days": 30, "limit": 50}
-
-            # search_by_training_load: 需要min_load (Garmin专属)
-            elif search_tool == "search_by_training_load":
-                min_load = reflection_output.get("min_load")
-                if min_load is not None:
-                    search_kwargs["min_load"] = min_load
-                    search_kwargs["max_load"] = reflection_output.get("max_load")
-                    search_kwargs["limit"] = reflection_output.get("limit") or 50
-                    print(f"    训练负荷范围: {min_load}+")
-                else:
-                    print(f"      ⚠️ 缺少min_load参数,改用search_recent_trainings")
-                    search_tool = "search_recent_trainings"
-                    search_kwargs = {"days": 30, "limit": 50}
-
-            # search_by_power_zone: 需要min_avg_power (Garmin专属)
-            elif search_tool == "search_by_power_zone":
-                min_avg_power = reflection_output.get("min_avg_power")
-                if min_avg_power is not None:
-                    search_kwargs["min_avg_power"] = min_avg_power
-                    search_kwargs["max_avg_power"] = reflection_output.get("max_avg_power")
-                    search_kwargs["limit"] = reflection_output.get("limit") or 50
-                    print(f"    功率范围: {min_avg_power}W+")
-                else:
-                    print(f"      ⚠️ 缺少min_avg_power参数,改用search_recent_trainings")
-                    search_tool = "search_recent_trainings"
-                    search_kwargs = {"days": 30, "limit": 50}
-
-            # get_training_effect_analysis: 可选start_date和end_date (Garmin专属)
-            elif search_tool == "get_training_effect_analysis":
-                start_date = reflection_output.get("start_date")
-                end_date = reflection_output.get("end_date")
-                if start_date and self._validate_date_format(start_date):
-                    search_kwargs["start_date"] = start_date
-                if end_date and self._validate_date_format(end_date):
-                    search_kwargs["end_date"] = end_date
-                print(f"    获取训练效果分析")
-
-            else:
-                print(f"      ⚠️ 未知工具 {search_tool},使用search_recent_trainings")
-                search_tool = "search_recent_trainings"
-                search_kwargs = {"days": 30, "limit": 50}
-
+            search_tool, search_kwargs = self._build_search_kwargs(search_tool, reflection_output, indent="    ")
             search_response = self.execute_search_tool(search_tool, search_query, **search_kwargs)
             
             # 转换为兼容格式
-            search_results = []
-            if search_response and search_response.results:
-                # 使用配置文件控制传递给LLM的结果数量，0表示不限制
-                if self.config.max_search_results_for_llm > 0:
-                    max_results = min(len(search_response.results), self.config.max_search_results_for_llm)
-                else:
-                    max_results = len(search_response.results)  # 不限制，传递所有结果
-                for result in search_response.results[:max_results]:
-                    # 构建训练记录描述
-                    distance_km = f"{float(result.distance_meters)/1000:.2f}km" if result.distance_meters else "未知距离"
-                    duration_min = f"{int(result.duration_seconds)//60}分{int(result.duration_seconds)%60}秒"
-                    pace_str = f"{int(result.pace_per_km//60)}'{int(result.pace_per_km%60):02d}\"/km" if result.pace_per_km else "未知配速"
-
-                    # 兼容Keep和Garmin数据源的字段差异
-                    sport_type = getattr(result, 'exercise_type', None) or getattr(result, 'sport_type', '未知')
-                    start_time = getattr(result, 'start_time', None) or getattr(result, 'start_time_gmt', None)
-                    calories = getattr(result, 'calories', None) or getattr(result, 'activity_calories', None)
-
-                    title = f"[{sport_type}] {start_time.strftime('%Y-%m-%d %H:%M')} - {distance_km}"
-                    content = (
-                        f"运动类型: {sport_type}\n"
-                        f"开始时间: {start_time.strftime('%Y-%m-%d %H:%M:%S')}\n"
-                        f"持续时间: {duration_min}\n"
-                        f"距离: {distance_km}\n"
-                        f"配速: {pace_str}\n"
-                        f"平均心率: {result.avg_heart_rate or '未知'}bpm\n"
-                        f"最大心率: {result.max_heart_rate or '未知'}bpm\n"
-                        f"卡路里: {calories or '未知'}kcal"
-                    )
-
-                    search_results.append({
-                        'title': title,
-                        'url': "",
-                        'content': content,
-                        'score': result.avg_heart_rate or 0,  # 使用心率作为评分
-                        'raw_content': content,
-                        'published_date': start_time.isoformat(),
-                        'platform': "训练记录数据库",
-                        'content_type': sport_type,
-                        'author': result.user_id,
-                        'engagement': calories or 0
-                    })
-            
+            search_results = self._build_search_results(search_response)
+
             if search_results:
                 print(f"    找到 {len(search_results)} 个反思搜索结果")
                 for j, result in enumerate(search_results, 1):
@@ -794,7 +845,7 @@ class SportsScientistAgent:
                 print("    未找到反思搜索结果")
             
             # 更新搜索历史
-            paragraph.research.add_search_results(search_query, search_results)
+            paragraph.research.add_search_results(search_query, search_results, search_round=reflection_i + 1)
             
             # 生成反思总结
             reflection_summary_input = {
@@ -809,10 +860,12 @@ class SportsScientistAgent:
             
             # 更新状态
             self.state = self.reflection_summary_node.mutate_state(
-                reflection_summary_input, self.state, paragraph_index
+                reflection_summary_input, self.state, paragraph_index,
+                stream_callback=self._stream_callback_for(paragraph_index),
             )
             
             print(f"    反思 {reflection_i + 1} 完成")
+            self._checkpoint()
     
     def _generate_final_report(self) -> str:
         """生成最终报告"""
@@ -828,7 +881,9 @@ class SportsScientistAgent:
         
         # 格式化报告
         try:
-            final_report = self.report_formatting_node.run(report_data)
+            final_report = self.report_formatting_node.run(
+                report_data, stream_callback=self._stream_callback_for(None)
+            )
         except Exception as e:
             print(f"LLM格式化失败，使用备用方法: {str(e)}")
             final_report = self.report_formatting_node.format_report_manually(
@@ -838,6 +893,7 @@ class SportsScientistAgent:
         # 更新状态
         self.state.final_report = final_report
         self.state.mark_completed()
+        self._checkpoint()
         
         print("最终报告生成完成")
         return final_report
@@ -846,8 +902,7 @@ class SportsScientistAgent:
         """保存报告到文件"""
         # 生成文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        query_safe = "".join(c for c in self.state.query if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        query_safe = query_safe.replace(' ', '_')[:30]
+        query_safe = self._safe_filename(self.state.query)
         
         filename = f"deep_search_report_{query_safe}_{timestamp}.md"
         filepath = os.path.join(self.config.output_dir, filename)
@@ -865,6 +920,38 @@ class SportsScientistAgent:
             self.state.save_to_file(state_filepath)
             print(f"状态已保存到: {state_filepath}")
     
+    @staticmethod
+    def _safe_filename(query: str) -> str:
+        """将查询转换为可用于文件名的片段"""
+        query_safe = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        return query_safe.replace(' ', '_')[:30]
+
+    def _new_checkpoint_path(self, query: str) -> str:
+        """为新的研究任务生成检查点文件路径"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.config.output_dir, f"checkpoint_{self._safe_filename(query)}_{timestamp}.json")
+
+    def _checkpoint(self):
+        """
+        原子写入状态检查点(save_intermediate_states开启时)
+
+        磁盘写入失败(OSError)只告警不中断研究；序列化错误说明状态本身有问题，直接抛出
+        """
+        if not self.config.save_intermediate_states or not self.checkpoint_path:
+            return
+        try:
+            with self.state.lock:
+                self.state.save_to_file(self.checkpoint_path)
+        except OSError as e:
+            print(f"保存检查点失败: {str(e)}")
+
+    def _resume_from_checkpoint(self, filepath: str):
+        """从检查点加载状态，之后的检查点继续写入同一文件"""
+        self.state = State.load_from_file(filepath)
+        self.checkpoint_path = filepath
+        print(f"已从检查点恢复: {filepath} "
+              f"(已完成段落 {self.state.get_completed_paragraphs_count()}/{len(self.state.paragraphs)})")
+
     def get_progress_summary(self) -> Dict[str, Any]:
         """获取进度摘要"""
         return self.state.get_progress_summary()
@@ -4,10 +4,29 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional
 from ..llms.base import LLMClient
 from ..state.state import State
 
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+try:
+    from utils.event_bus import SummaryProduced, publish_event
+    EVENT_BUS_AVAILABLE = True
+except ImportError:
+    EVENT_BUS_AVAILABLE = False
+
+# 发布事件时使用的Agent来源标识
+EVENT_SOURCE = "insight"
+
+
+# 流式输出日志的刷新粒度(字符数)
+STREAM_LOG_FLUSH_CHARS = 200
+
+# 流式调用中途失败、回退到普通调用前发给stream_callback的信号: 丢弃本次调用已收到的增量文本
+STREAM_RESET = None
+
 
 class BaseNode(ABC):
     """节点基类"""
@@ -61,6 +80,76 @@ class BaseNode(ABC):
         """
         return output
     
+    def invoke_llm_streaming(self, system_prompt: str, user_prompt: str,
+                             stream_callback: Optional[Callable[[Optional[str]], None]] = None,
+                             **kwargs) -> str:
+        """
+        流式调用LLM并返回完整输出
+        
+        每收到一段增量文本即回调stream_callback，并按片段打印"流式输出"日志；
+        流式调用失败时回退到带重试的invoke()：已发出过增量文本时先回调STREAM_RESET，
+        再把回退结果作为一段完整文本回调，避免预览中残留的半截输出与回退结果拼接在一起。
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户输入
+            stream_callback: 增量文本回调(可选)，参数为STREAM_RESET时应清空本次调用已收到的文本
+            **kwargs: 透传给LLM客户端的采样参数
+            
+        Returns:
+            完整的LLM输出
+        """
+        chunks = []
+        pending = ""
+        try:
+            for delta in self.llm_client.invoke_stream(system_prompt, user_prompt, **kwargs):
+                chunks.append(delta)
+                pending += delta
+                if stream_callback:
+                    try:
+                        stream_callback(delta)
+                    except Exception as e:
+                        self.log_warning(f"流式回调失败: {str(e)}")
+                        stream_callback = None
+                if len(pending) >= STREAM_LOG_FLUSH_CHARS:
+                    self.log_info(f"流式输出: {pending.replace(chr(10), ' ')}")
+                    pending = ""
+        except Exception as e:
+            self.log_warning(f"流式调用失败，回退到普通调用: {str(e)}")
+            if stream_callback and chunks:
+                # 先撤回已发出的半截输出，回退调用的完整结果随后一次性回调
+                try:
+                    stream_callback(STREAM_RESET)
+                except Exception as callback_error:
+                    self.log_warning(f"流式回调失败: {str(callback_error)}")
+                    stream_callback = None
+            output = self.llm_client.invoke(system_prompt, user_prompt, **kwargs)
+            if stream_callback:
+                try:
+                    stream_callback(output)
+                except Exception as callback_error:
+                    self.log_warning(f"流式回调失败: {str(callback_error)}")
+            return output
+        
+        if pending:
+            self.log_info(f"流式输出: {pending.replace(chr(10), ' ')}")
+        return "".join(chunks).strip()
+    
+    def publish_summary(self, content: str, title: str = ""):
+        """
+        发布SummaryProduced事件，供ForumEngine订阅(发布失败不影响主流程)
+        
+        Args:
+            content: 总结正文
+            title: 段落标题
+        """
+        if not EVENT_BUS_AVAILABLE or not content:
+            return
+        try:
+            publish_event(SummaryProduced(source=EVENT_SOURCE, node=self.node_name, content=content, title=title))
+        except Exception as e:
+            self.log_warning(f"发布总结事件失败: {str(e)}")
+    
     def log_info(self, message: str):
         """记录信息日志"""
         print(f"[{self.node_name}] {message}")
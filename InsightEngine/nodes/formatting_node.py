@@ -68,7 +68,11 @@ class ReportFormattingNode(BaseNode):
             self.log_info("正在格式化最终报告")
             
             # 调用LLM
-            response = self.llm_client.invoke(SYSTEM_PROMPT_REPORT_FORMATTING, message)
+            response = self.invoke_llm_streaming(
+                SYSTEM_PROMPT_REPORT_FORMATTING,
+                message,
+                stream_callback=kwargs.get("stream_callback"),
+            )
             
             # 处理响应
             processed_response = self.process_output(response)
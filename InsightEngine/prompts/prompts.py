@@ -19,8 +19,10 @@ from .tool_descriptions import (
     get_data_features_description,
     get_report_modules_suggestion,
     COMMON_PARAM_REQUIREMENTS,
+    KEEP_PARAM_REQUIREMENTS,
     GARMIN_PARAM_REQUIREMENTS,
     COMMON_QUERY_EXAMPLES,
+    KEEP_QUERY_EXAMPLES,
     GARMIN_QUERY_EXAMPLES
 )
 
@@ -61,6 +63,9 @@ output_schema_first_search = {
         "max_distance_km": {"type": "number", "description": "最大距离(公里),search_by_distance_range工具可选"},
         "min_avg_hr": {"type": "integer", "description": "最小平均心率,search_by_heart_rate工具必需"},
         "max_avg_hr": {"type": "integer", "description": "最大平均心率,search_by_heart_rate工具可选"},
+        "max_hr": {"type": "integer", "description": "最大心率,analyze_heart_rate_series工具可选"},
+        "resting_hr": {"type": "integer", "description": "静息心率,analyze_heart_rate_series工具可选"},
+        "queries": {"type": "array", "items": {"type": "object"}, "description": "子查询列表,每项为{\"tool\": 工具名, ...该工具参数},batch_query工具必需"},
         "limit": {"type": "integer", "description": "返回记录数量限制,所有工具可选"}
     },
     "required": ["search_query", "search_tool", "reasoning"]
@@ -112,6 +117,9 @@ output_schema_reflection = {
         "max_distance_km": {"type": "number", "description": "最大距离(公里)"},
         "min_avg_hr": {"type": "integer", "description": "最小平均心率"},
         "max_avg_hr": {"type": "integer", "description": "最大平均心率"},
+        "max_hr": {"type": "integer", "description": "最大心率"},
+        "resting_hr": {"type": "integer", "description": "静息心率"},
+        "queries": {"type": "array", "items": {"type": "object"}, "description": "子查询列表,每项为{\"tool\": 工具名, ...该工具参数}"},
         "limit": {"type": "integer", "description": "返回记录数量限制"}
     },
     "required": ["search_query", "search_tool", "reasoning"]
@@ -167,9 +175,11 @@ def _get_param_requirements() -> str:
     # 通用参数要求
     param_text = COMMON_PARAM_REQUIREMENTS
 
-    # 如果是Garmin数据源,添加专属参数要求
+    # 添加数据源专属参数要求
     if data_source == 'garmin':
         param_text += GARMIN_PARAM_REQUIREMENTS
+    elif data_source == 'keep':
+        param_text += KEEP_PARAM_REQUIREMENTS
 
     return param_text
 
@@ -186,9 +196,11 @@ def _get_query_examples() -> str:
     # 通用查询示例
     examples_text = COMMON_QUERY_EXAMPLES
 
-    # 如果是Garmin数据源,添加专属查询示例
+    # 添加数据源专属查询示例
     if data_source == 'garmin':
         examples_text += "\n" + GARMIN_QUERY_EXAMPLES
+    elif data_source == 'keep':
+        examples_text += "\n" + KEEP_QUERY_EXAMPLES
 
     return examples_text
 
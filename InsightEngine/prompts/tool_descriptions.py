@@ -41,6 +41,37 @@ COMMON_TOOLS_DESCRIPTION = """
 """
 
 
+# ===== 组合查询工具描述(所有数据源都支持) =====
+
+BATCH_TOOL_DESCRIPTION = """
+**组合查询工具**:
+
+- **batch_query** - 一次执行多个查询工具(最多5个)
+  - 适用于:同一段落需要多个角度的数据,如"最近30天记录 + 统计数据 + 高心率训练"
+  - 特点:多个子查询在同一数据库会话中执行,结果合并返回,减少查询轮次
+  - 参数:queries(必需,子查询列表),每项为 {"tool": 工具名, ...该工具的参数}
+  - 示例: `"queries": [{"tool": "search_recent_trainings", "days": 30}, {"tool": "get_training_stats"}, {"tool": "search_by_heart_rate", "min_avg_hr": 150}]`
+"""
+
+
+# ===== Keep专属扩展工具描述 =====
+
+KEEP_EXTENDED_TOOLS_DESCRIPTION = """
+**Keep数据源专属扩展工具**:
+
+6. **analyze_heart_rate_series** - 逐秒心率序列分析
+   - 适用于:心率区间分布、有氧耐力评估、心率漂移分析、训练冲量量化
+   - 特点:基于每次训练的逐秒心率数据批量计算,比平均/最大心率更能反映训练过程
+   - 参数:start_date(可选,YYYY-MM-DD)、end_date(可选,YYYY-MM-DD)、limit(可选,默认50)、max_hr(可选,最大心率,默认取记录中的最大心率)、resting_hr(可选,静息心率,默认60)
+   - **返回指标**:
+     * 每次训练: 5个心率区间时长、心率漂移(%)、有氧解耦(%)、TRIMP
+     * 汇总: 区间时长占比、平均心率漂移/有氧解耦、解耦>5%的训练次数、TRIMP合计
+   - **解读**:
+     * 有氧解耦 < 5% 说明有氧基础良好,> 5% 说明该强度/时长下有氧耐力不足
+     * TRIMP综合时长与心率强度,可用于比较不同训练的负荷
+"""
+
+
 # ===== Garmin专属扩展工具描述 =====
 
 GARMIN_EXTENDED_TOOLS_DESCRIPTION = """
@@ -102,10 +133,24 @@ COMMON_PARAM_REQUIREMENTS = """
      * ⚠️ 全部可选: start_date, end_date (默认查询全部历史数据)
      * 示例: `"start_date": "2025-01-01", "end_date": "2025-01-31"`
 
+   - **batch_query**:
+     * ✅ 必需参数: queries (数组,每项为 {"tool": 工具名, ...该工具参数},最多5项)
+     * ❌ 禁止: 子查询缺少所用工具的必需参数; 在queries中嵌套batch_query
+     * 示例: `"queries": [{"tool": "search_recent_trainings", "days": 30}, {"tool": "get_training_stats"}]`
+
    - **通用可选参数**: limit (整数,默认50条,建议范围10-200)
 """
 
 
+# ===== Keep专属参数配置要求 =====
+
+KEEP_PARAM_REQUIREMENTS = """
+   - **analyze_heart_rate_series** (Keep专属):
+     * ⚠️ 全部可选: start_date, end_date, limit, max_hr, resting_hr
+     * 示例: `"start_date": "2025-01-01", "end_date": "2025-01-31", "max_hr": 188`
+"""
+
+
 # ===== Garmin专属参数配置要求 =====
 
 GARMIN_PARAM_REQUIREMENTS = """
@@ -134,6 +179,15 @@ COMMON_QUERY_EXAMPLES = """
 - ✅ 正确: 如果需要补充2025年1-3月的历史数据 → search_by_date_range, start_date="2025-01-01", end_date="2025-03-31"
 - ✅ 正确: 如果需要长距离训练数据 → search_by_distance_range, min_distance_km=15
 - ✅ 正确: 如果需要强度分析 → search_by_heart_rate, min_avg_hr=150, max_avg_hr=170
+- ✅ 正确: 如果同时需要近期记录和整体统计 → batch_query, queries=[{"tool": "search_recent_trainings", "days": 30}, {"tool": "get_training_stats"}]
+"""
+
+
+# ===== Keep专属查询优化示例 =====
+
+KEEP_QUERY_EXAMPLES = """
+**Keep专属查询示例**:
+- ✅ 正确: 如果需要心率区间分布或心率漂移分析 → analyze_heart_rate_series, start_date="2025-01-01", end_date="2025-01-31"
 """
 
 
@@ -152,7 +206,7 @@ GARMIN_QUERY_EXAMPLES = """
 KEEP_DATA_FEATURES_DESCRIPTION = """
 **Keep数据源特征说明**:
 - **核心指标**: 距离、配速、时长、心率(平均/最大)、卡路里
-- **心率数据**: 提供逐秒心率序列数据(heart_rate_data),可用于心率漂移分析
+- **心率数据**: 提供逐秒心率序列数据(heart_rate_data),可通过analyze_heart_rate_series分析心率区间、心率漂移和TRIMP
 - **数据来源**: Keep APP训练��录
 - **数据特点**: 适合基础训练分析,心率数据较为详细
 """
@@ -212,15 +266,15 @@ GARMIN_REPORT_MODULES_SUGGESTION = """
 
 DATA_SOURCE_CONFIGS: Dict[str, Dict[str, str]] = {
     'keep': {
-        'tools_description': COMMON_TOOLS_DESCRIPTION,
+        'tools_description': COMMON_TOOLS_DESCRIPTION + KEEP_EXTENDED_TOOLS_DESCRIPTION + BATCH_TOOL_DESCRIPTION,
         'data_features': KEEP_DATA_FEATURES_DESCRIPTION,
         'report_modules': KEEP_REPORT_MODULES_SUGGESTION,
-        'extended_tools': '',  # Keep没有扩展工具
+        'extended_tools': KEEP_EXTENDED_TOOLS_DESCRIPTION,
         'available_metrics': '距离、配速、时长、心率、卡路里',
         'advanced_capabilities': ''
     },
     'garmin': {
-        'tools_description': COMMON_TOOLS_DESCRIPTION + GARMIN_EXTENDED_TOOLS_DESCRIPTION,
+        'tools_description': COMMON_TOOLS_DESCRIPTION + GARMIN_EXTENDED_TOOLS_DESCRIPTION + BATCH_TOOL_DESCRIPTION,
         'data_features': GARMIN_DATA_FEATURES_DESCRIPTION,
         'report_modules': GARMIN_REPORT_MODULES_SUGGESTION,
         'extended_tools': GARMIN_EXTENDED_TOOLS_DESCRIPTION,
@@ -8,6 +8,10 @@ InsightEngine 训练数据搜索工具模块
     >>> from InsightEngine.tools import create_training_data_search
     >>> search_tool = create_training_data_search()
     >>>
+    >>> # 方式1b: 获取缓存实例(配置未变化时复用同一实例)
+    >>> from InsightEngine.tools import get_training_data_search
+    >>> search_tool = get_training_data_search()
+    >>>
     >>> # 方式2: 手动指定数据源
     >>> keep_tool = create_training_data_search('keep')
     >>> garmin_tool = create_training_data_search('garmin')
@@ -20,7 +24,9 @@ InsightEngine 训练数据搜索工具模块
 # ===== 核心工厂和便捷函数 =====
 from .factory import (
     TrainingDataSearchFactory,
+    TrainingSearchToolRegistry,
     create_training_data_search,
+    get_training_data_search,
     TrainingDataDB  # 向后兼容性包装类
 )
 
@@ -45,7 +51,9 @@ from .garmin_search import (
 __all__ = [
     # 工厂和便捷函数 (推荐使用)
     "TrainingDataSearchFactory",
+    "TrainingSearchToolRegistry",
     "create_training_data_search",
+    "get_training_data_search",
     "TrainingDataDB",  # 向后兼容
 
     # 基类和通用类型
@@ -4,10 +4,16 @@
 定义所有数据源工具必须实现的接口
 """
 
+import inspect
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
+from .db_session import db_session_manager
+
+# batch_query单次最多执行的子查询数量
+MAX_BATCH_QUERIES = 5
+
 
 @dataclass
 class DBResponse:
@@ -179,8 +185,143 @@ class BaseTrainingDataSearch(ABC):
         """
         pass
 
+    # ===== 扩展查询接口 (数据源不支持时返回错误信息) =====
+
+    def analyze_heart_rate_series(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        limit: int = 50,
+        max_hr: Optional[int] = None,
+        resting_hr: Optional[int] = None
+    ) -> DBResponse:
+        """
+        分析逐秒心率序列: 心率区间时长、心率漂移、有氧解耦、TRIMP
+
+        Args:
+            start_date: 开始日期 'YYYY-MM-DD'
+            end_date: 结束日期 'YYYY-MM-DD'
+            limit: 分析的训练次数上限(最近的N次)
+            max_hr: 最大心率，默认取所选训练中记录到的最大心率
+            resting_hr: 静息心率
+
+        Returns:
+            DBResponse对象,results为参与分析的训练记录,statistics字段包含汇总指标
+        """
+        return DBResponse(
+            tool_name="analyze_heart_rate_series",
+            parameters={'start_date': start_date, 'end_date': end_date, 'limit': limit},
+            data_source=self.data_source,
+            error_message=f"{self.data_source}数据源不提供逐秒心率序列"
+        )
+
+    def batch_query(self, queries: List[Dict[str, Any]]) -> DBResponse:
+        """
+        在同一个数据库会话中依次执行多个查询工具，合并为一个结果
+
+        Args:
+            queries: 子查询列表，每项为 {"tool": 工具名, 其余键为该工具的参数}，
+                     例如 [{"tool": "search_recent_trainings", "days": 30}, {"tool": "get_training_stats"}]
+
+        Returns:
+            DBResponse对象: results为各子查询记录按出现顺序去重后的合集，
+            statistics['queries']为每个子查询的工具名、参数、记录数、统计结果和错误信息
+        """
+        params_for_log = {'queries': queries}
+        print(f"--- {self.data_source}数据源: 批量查询 ({len(queries or [])}个子查询) ---")
+
+        if not queries:
+            return DBResponse(
+                tool_name="batch_query",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                error_message="batch_query需要至少一个子查询"
+            )
+
+        supported = set(self.get_supported_tools()) - {"batch_query"}
+        summaries = []
+        merged = []
+        seen_ids = set()
+
+        # 同一会话内顺序执行: SQLAlchemy会话不能跨线程共享，共享会话省去的是每个工具各自的连接获取与提交
+        with db_session_manager.shared_session():
+            for query in queries[:MAX_BATCH_QUERIES]:
+                query = dict(query or {})
+                tool_name = query.pop("tool", None)
+                if tool_name not in supported:
+                    summaries.append({'tool': tool_name, 'parameters': query, 'results_count': 0,
+                                      'statistics': None, 'error_message': f"不支持的工具: {tool_name}"})
+                    continue
+
+                method = getattr(self, tool_name)
+                accepted = inspect.signature(method).parameters
+                kwargs = {key: value for key, value in query.items() if key in accepted and value is not None}
+                try:
+                    response = method(**kwargs)
+                except TypeError as e:
+                    # 缺少必需参数
+                    summaries.append({'tool': tool_name, 'parameters': kwargs, 'results_count': 0,
+                                      'statistics': None, 'error_message': str(e)})
+                    continue
+
+                for record in response.results:
+                    if record.id not in seen_ids:
+                        seen_ids.add(record.id)
+                        merged.append(record)
+                summaries.append({
+                    'tool': tool_name,
+                    'parameters': kwargs,
+                    'results_count': response.results_count,
+                    'statistics': response.statistics,
+                    'error_message': response.error_message
+                })
+
+        if len(queries) > MAX_BATCH_QUERIES:
+            print(f"⚠️ 子查询超过{MAX_BATCH_QUERIES}个，其余{len(queries) - MAX_BATCH_QUERIES}个已忽略")
+
+        errors = [summary['error_message'] for summary in summaries if summary['error_message']]
+        return DBResponse(
+            tool_name="batch_query",
+            parameters=params_for_log,
+            data_source=self.data_source,
+            results=merged,
+            statistics={'queries': summaries},
+            error_message="; ".join(errors) if len(errors) == len(summaries) else None
+        )
+
     # ===== 工具辅助方法 =====
 
+    # 列式内存缓存(TRAINING_DATA_CACHE_ENABLED开启时由子类设置)，为None时直接查询数据库
+    columnar_cache = None
+
+    def _search_columnar_cache(
+        self,
+        tool_name: str,
+        parameters: Dict[str, Any],
+        filters: List[tuple],
+        order_by: str,
+        limit: int
+    ) -> Optional[DBResponse]:
+        """
+        通过列式缓存执行范围查询(降序)
+
+        Returns:
+            DBResponse对象；未开启缓存或缓存查询失败时返回None，由调用方回退到数据库查询
+        """
+        if self.columnar_cache is None:
+            return None
+        try:
+            rows = self.columnar_cache.query(filters, order_by, descending=True, limit=limit)
+        except Exception as e:
+            print(f"列式缓存查询失败,回退到数据库查询: {e}")
+            return None
+        return DBResponse(
+            tool_name=tool_name,
+            parameters=parameters,
+            data_source=self.data_source,
+            results=[self._orm_to_record(row) for row in rows]
+        )
+
     def _calculate_pace(self, duration_seconds: int, distance_meters: Optional[float]) -> Optional[float]:
         """计算配速(秒/公里)"""
         if not distance_meters or distance_meters <= 0:
@@ -201,5 +342,6 @@ class BaseTrainingDataSearch(ABC):
             "search_by_date_range",
             "get_training_stats",
             "search_by_distance_range",
-            "search_by_heart_rate"
+            "search_by_heart_rate",
+            "batch_query"
         ]
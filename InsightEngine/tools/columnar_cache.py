@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+训练数据列式内存缓存
+将training_records_keep/training_records_garmin整表加载到内存，
+过滤用的列保存为NumPy数组，范围查询以向量化掩码完成，不再逐次访问MySQL:
+
+1. 首次使用时全量加载，之后按last_modify_ts增量刷新(最多每隔refresh_interval秒检查一次)
+2. 增量刷新后行数与数据库不一致(有记录被删除)时全量重载
+3. 查询结果按原始行返回，由各数据源的_orm_to_record转换为数据类
+
+默认关闭，通过环境变量开启:
+- TRAINING_DATA_CACHE_ENABLED: 设为 1/true/yes 开启缓存
+- TRAINING_DATA_CACHE_REFRESH_SECONDS: 两次增量刷新检查的最小间隔秒数 (默认30)
+"""
+
+import operator
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+
+from .db_session import db_session_manager
+
+# 过滤条件: (列名, 运算符, 值)
+ColumnFilter = Tuple[str, str, Any]
+
+_FILTER_OPERATORS = {
+    '>=': operator.ge,
+    '>': operator.gt,
+    '<=': operator.le,
+    '<': operator.lt,
+}
+
+
+def _env_flag(key: str) -> bool:
+    return os.getenv(key, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+class ColumnarTrainingCache:
+    """单张训练记录表的列式缓存"""
+
+    def __init__(
+        self,
+        model,
+        numeric_columns: Sequence[str],
+        time_columns: Sequence[str],
+        refresh_interval: float = 30.0,
+        exclude_columns: Sequence[str] = ()
+    ):
+        """
+        Args:
+            model: ORM模型类 (TrainingRecordKeep / TrainingRecordGarmin)
+            numeric_columns: 需要参与过滤/排序的数值列
+            time_columns: 需要参与过滤/排序的时间列
+            refresh_interval: 两次增量刷新检查的最小间隔秒数
+            exclude_columns: 不加载到内存的列(如心率明细等大字段)
+        """
+        self.table = model.__table__
+        self.select_columns = [column for column in self.table.columns if column.name not in exclude_columns]
+        self.numeric_columns = list(numeric_columns)
+        self.time_columns = list(time_columns)
+        self.refresh_interval = refresh_interval
+
+        self._rows_by_id: Dict[int, Any] = {}
+        self._max_modify_ts: Optional[int] = None
+        self._last_check = 0.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+        # 查询使用的快照: (行列表, 列名 -> NumPy数组)，整体替换保证读取一致
+        self._snapshot: Tuple[List[Any], Dict[str, np.ndarray]] = ([], {})
+
+    def refresh(self, force: bool = False):
+        """按last_modify_ts增量同步数据库中的变化"""
+        with self._lock:
+            now = time.monotonic()
+            if self._loaded and not force and now - self._last_check < self.refresh_interval:
+                return
+
+            with db_session_manager.get_session() as session:
+                if not self._loaded:
+                    self._full_load(session)
+                else:
+                    self._incremental_load(session)
+            self._last_check = now
+
+    def _full_load(self, session):
+        rows = session.execute(select(*self.select_columns)).all()
+        self._rows_by_id = {row.id: row for row in rows}
+        self._max_modify_ts = max((row.last_modify_ts for row in rows), default=None)
+        self._loaded = True
+        self._rebuild_snapshot()
+        print(f"✅ 列式缓存已加载 {self.table.name}: {len(rows)}条记录")
+
+    def _incremental_load(self, session):
+        total_count, max_modify_ts = session.execute(
+            select(func.count(), func.max(self.table.c.last_modify_ts))
+        ).one()
+
+        changed = False
+        if max_modify_ts is not None and (self._max_modify_ts is None or max_modify_ts >= self._max_modify_ts):
+            # 使用>=: 同一毫秒内加载之后写入的记录也能被取到，重复取到的行直接覆盖
+            since = self._max_modify_ts if self._max_modify_ts is not None else max_modify_ts
+            rows = session.execute(
+                select(*self.select_columns).where(self.table.c.last_modify_ts >= since)
+            ).all()
+            for row in rows:
+                if self._rows_by_id.get(row.id) != row:
+                    self._rows_by_id[row.id] = row
+                    changed = True
+            self._max_modify_ts = max_modify_ts
+
+        if total_count != len(self._rows_by_id):
+            # 有记录被删除(或时间戳异常)，增量无法感知，全量重载
+            self._full_load(session)
+        elif changed:
+            self._rebuild_snapshot()
+
+    def _rebuild_snapshot(self):
+        rows = list(self._rows_by_id.values())
+        columns: Dict[str, np.ndarray] = {}
+        for name in self.numeric_columns:
+            # None转换为NaN，比较结果为False，与SQL中NULL不满足范围条件一致
+            columns[name] = np.array([getattr(row, name) for row in rows], dtype=np.float64)
+        for name in self.time_columns:
+            columns[name] = np.array([getattr(row, name) for row in rows], dtype='datetime64[us]')
+        self._snapshot = (rows, columns)
+
+    def query(
+        self,
+        filters: Sequence[ColumnFilter],
+        order_by: str,
+        descending: bool = True,
+        limit: Optional[int] = None
+    ) -> List[Any]:
+        """
+        以向量化掩码执行范围查询
+
+        Args:
+            filters: 过滤条件列表，各条件之间为AND关系
+            order_by: 排序列
+            descending: 是否降序
+            limit: 返回数量上限
+
+        Returns:
+            满足条件的原始行列表(可按属性访问各列)
+        """
+        self.refresh()
+        rows, columns = self._snapshot
+        if not rows:
+            return []
+
+        mask = np.ones(len(rows), dtype=bool)
+        for name, op, value in filters:
+            values = columns[name]
+            if isinstance(value, datetime):
+                value = np.datetime64(value, 'us')
+            mask &= _FILTER_OPERATORS[op](values, value)
+
+        indices = np.flatnonzero(mask)
+        if indices.size == 0:
+            return []
+
+        keys = columns[order_by][indices]
+        # NULL(NaT/NaN)单独排列，与MySQL一致: 升序排在最前，降序排在最后
+        if keys.dtype.kind == 'M':
+            nulls = np.isnat(keys)
+            # NaT转为int64是最小值，取负会溢出；这里只对非NULL的值取负
+            keys = keys.astype(np.int64)
+        else:
+            nulls = np.isnan(keys)
+        valid = np.flatnonzero(~nulls)
+        valid_keys = keys[valid]
+        order = valid[np.argsort(-valid_keys if descending else valid_keys, kind='stable')]
+        null_order = np.flatnonzero(nulls)
+        order = np.concatenate([order, null_order] if descending else [null_order, order])
+        if limit is not None:
+            order = order[:limit]
+        return [rows[i] for i in indices[order]]
+
+    def clear(self):
+        """丢弃已加载的数据，下次查询时全量重载"""
+        with self._lock:
+            self._rows_by_id = {}
+            self._max_modify_ts = None
+            self._loaded = False
+            self._snapshot = ([], {})
+
+
+_caches: Dict[str, ColumnarTrainingCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_columnar_cache(
+    model,
+    numeric_columns: Sequence[str],
+    time_columns: Sequence[str],
+    exclude_columns: Sequence[str] = ()
+) -> Optional[ColumnarTrainingCache]:
+    """
+    获取进程内共享的列式缓存
+
+    Returns:
+        未开启(TRAINING_DATA_CACHE_ENABLED)时返回None
+    """
+    if not _env_flag("TRAINING_DATA_CACHE_ENABLED"):
+        return None
+
+    table_name = model.__tablename__
+    with _caches_lock:
+        cache = _caches.get(table_name)
+        if cache is None:
+            try:
+                refresh_interval = float(os.getenv("TRAINING_DATA_CACHE_REFRESH_SECONDS", "30"))
+            except ValueError:
+                refresh_interval = 30.0
+            cache = ColumnarTrainingCache(model, numeric_columns, time_columns, refresh_interval, exclude_columns)
+            _caches[table_name] = cache
+        return cache
+
+
+def clear_columnar_caches():
+    """清空所有列式缓存(数据库配置变化时调用)"""
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.clear()
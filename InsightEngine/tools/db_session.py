@@ -1,14 +1,13 @@
 # -*- coding: utf-8 -*-
 """
 SQLAlchemy数据库会话管理器
-提供统一的数据库连接和会话管理
+提供统一的数据库连接和会话管理，引擎来自models.database的共享注册表(与Flask路由、导入脚本共用连接池)
 """
 
 import sys
 import os
-from sqlalchemy import create_engine
+import threading
 from sqlalchemy.orm import sessionmaker, scoped_session
-from sqlalchemy.pool import QueuePool
 from typing import Optional
 from contextlib import contextmanager
 
@@ -17,6 +16,8 @@ project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(_
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
+from models.database import engine_registry, get_database_config
+
 
 class DatabaseSessionManager:
     """数据库会话管理器 - 单例模式"""
@@ -24,6 +25,7 @@ class DatabaseSessionManager:
     _instance: Optional['DatabaseSessionManager'] = None
     _engine = None
     _session_factory = None
+    _local = threading.local()
 
     def __new__(cls):
         if cls._instance is None:
@@ -36,47 +38,18 @@ class DatabaseSessionManager:
             self._initialize_engine()
 
     def _initialize_engine(self):
-        """初始化SQLAlchemy引擎"""
-        # 从config.py读取数据库配置
-        try:
-            import config
-            db_host = getattr(config, 'DB_HOST', 'localhost')
-            db_port = int(getattr(config, 'DB_PORT', 3306))
-            db_user = getattr(config, 'DB_USER', '')
-            db_password = getattr(config, 'DB_PASSWORD', '')
-            db_name = getattr(config, 'DB_NAME', '')
-            db_charset = getattr(config, 'DB_CHARSET', 'utf8mb4')
-        except ImportError:
-            # 如果无法导入config,尝试从环境变量读取(兼容性处理)
-            db_host = os.getenv("DB_HOST", "localhost")
-            db_port = int(os.getenv("DB_PORT", 3306))
-            db_user = os.getenv("DB_USER", "")
-            db_password = os.getenv("DB_PASSWORD", "")
-            db_name = os.getenv("DB_NAME", "")
-            db_charset = os.getenv("DB_CHARSET", "utf8mb4")
+        """从共享注册表获取按config.py配置的引擎，并创建会话工厂"""
+        # 从config.py读取数据库配置(无法导入config时从环境变量读取)
+        db_config = get_database_config()
 
         # 验证配置完整性
-        if not all([db_host, db_user, db_password, db_name]):
+        if not all([db_config['host'], db_config['user'], db_config['password'], db_config['name']]):
             raise ValueError(
                 "数据库配置不完整! 请设置环境变量: DB_HOST, DB_USER, DB_PASSWORD, DB_NAME"
             )
 
-        # 构建数据库连接URL
-        database_url = (
-            f"mysql+pymysql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
-            f"?charset={db_charset}"
-        )
-
-        # 创建引擎
-        self._engine = create_engine(
-            database_url,
-            poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
-            pool_pre_ping=True,  # 自动检测连接是否有效
-            pool_recycle=3600,   # 1小时回收连接
-            echo=False,          # 不打印SQL语句
-        )
+        # 同一配置只会有一个连接池(QueuePool, 5个常驻连接+10个溢出连接)
+        self._engine = engine_registry.get_engine()
 
         # 创建会话工厂
         self._session_factory = scoped_session(
@@ -88,6 +61,12 @@ class DatabaseSessionManager:
             )
         )
 
+    def _current_session_factory(self):
+        """数据库配置变化后注册表会换用新引擎，这里随之切换会话工厂"""
+        if engine_registry.get_engine() is not self._engine:
+            self.reset()
+        return self._session_factory
+
     @contextmanager
     def get_session(self):
         """
@@ -99,7 +78,17 @@ class DatabaseSessionManager:
             results = session.query(Model).all()
         ```
         """
-        session = self._session_factory()
+        shared = getattr(self._local, 'session', None)
+        if shared is not None:
+            # 处于shared_session()中: 复用同一会话，由外层统一提交和关闭
+            try:
+                yield shared
+            except Exception:
+                shared.rollback()
+                raise
+            return
+
+        session = self._current_session_factory()()
         try:
             yield session
             session.commit()
@@ -109,17 +98,51 @@ class DatabaseSessionManager:
         finally:
             session.close()
 
+    @contextmanager
+    def shared_session(self):
+        """
+        在当前线程内共享一个数据库会话(上下文管理器)
+
+        期间所有get_session()都返回同一会话，多次查询只占用一个连接、一次提交，
+        用于batch_query一次执行多个查询工具。已处于共享会话中时直接复用。
+        """
+        shared = getattr(self._local, 'session', None)
+        if shared is not None:
+            yield shared
+            return
+
+        session = self._current_session_factory()()
+        self._local.session = session
+        try:
+            yield session
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            raise e
+        finally:
+            self._local.session = None
+            session.close()
+
     def get_engine(self):
         """获取SQLAlchemy引擎"""
+        self._current_session_factory()
         return self._engine
 
     def close_all(self):
-        """关闭所有连接"""
+        """关闭所有连接(引擎与其他模块共用，释放的空闲连接会在下次使用时重新建立)"""
         if self._session_factory:
             self._session_factory.remove()
         if self._engine:
             self._engine.dispose()
 
+    def reset(self):
+        """按最新的config.py切换引擎(数据库配置变化时调用，旧连接池由注册表释放)"""
+        if self._session_factory:
+            self._session_factory.remove()
+        self._engine = None
+        self._session_factory = None
+        self._initialize_engine()
+
 
 # 全局单例实例
 db_session_manager = DatabaseSessionManager()
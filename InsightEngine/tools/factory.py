@@ -6,7 +6,8 @@
 
 import sys
 import os
-from typing import Optional
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Tuple
 
 from .base_search import BaseTrainingDataSearch
 from .keep_search import KeepDataSearch
@@ -152,6 +153,99 @@ def create_training_data_search(data_source: Optional[str] = None) -> BaseTraini
     return TrainingDataSearchFactory.create_search_tool(data_source)
 
 
+# 搜索工具缓存键中包含的数据库配置项
+_DB_CONFIG_KEYS = ('DB_HOST', 'DB_PORT', 'DB_USER', 'DB_PASSWORD', 'DB_NAME', 'DB_CHARSET')
+
+
+class TrainingSearchToolRegistry:
+    """
+    训练数据搜索工具注册表
+
+    按(数据源, 数据库配置)缓存搜索工具实例，只有config.py中的相关配置真正变化时才创建新实例。
+    通过ConfigReloader的配置变化通知清理旧实例，并在数据库配置变化时重建连接池。
+    """
+
+    def __init__(self):
+        self._tools: Dict[Tuple, BaseTrainingDataSearch] = {}
+        self._lock = Lock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    def get_tool(self, data_source: Optional[str] = None) -> BaseTrainingDataSearch:
+        """
+        获取当前配置对应的搜索工具实例
+
+        Args:
+            data_source: 数据源类型，为None时使用config.py中的TRAINING_DATA_SOURCE
+
+        Returns:
+            缓存的搜索工具实例
+        """
+        try:
+            from utils.config_reloader import get_config_snapshot, subscribe_config_changes
+        except ImportError as e:
+            print(f"⚠️  警告: 无法导入config_reloader: {e}")
+            return TrainingDataSearchFactory.create_search_tool(data_source)
+
+        with self._lock:
+            if self._unsubscribe is None:
+                self._unsubscribe = subscribe_config_changes(self._on_config_change)
+
+        # config.py未变化时只是一次stat + 属性读取，变化时会先触发_on_config_change
+        snapshot = get_config_snapshot()
+        source = data_source or (snapshot.TRAINING_DATA_SOURCE if snapshot else None)
+        db_settings = tuple(getattr(snapshot, key, None) for key in _DB_CONFIG_KEYS) if snapshot else None
+        key = ((source or '').lower(), db_settings)
+
+        with self._lock:
+            tool = self._tools.get(key)
+            if tool is None:
+                tool = TrainingDataSearchFactory.create_search_tool(source)
+                self._tools[key] = tool
+            return tool
+
+    def _on_config_change(self, old_snapshot, new_snapshot, changed: List[str]):
+        """配置变化回调: 清理失效的工具实例，数据库配置变化时重建连接池"""
+        db_changed = [key for key in changed if key in _DB_CONFIG_KEYS]
+        if db_changed:
+            print(f"🔄 数据库配置变化({', '.join(db_changed)})，重建数据库连接池")
+            with self._lock:
+                self._tools.clear()
+            try:
+                from .db_session import db_session_manager
+                from .columnar_cache import clear_columnar_caches
+                db_session_manager.reset()
+                clear_columnar_caches()
+            except Exception as e:
+                print(f"⚠️  重建数据库连接池失败: {e}")
+        elif 'TRAINING_DATA_SOURCE' in changed:
+            print(f"🔄 训练数据源变化: {old_snapshot.TRAINING_DATA_SOURCE} → {new_snapshot.TRAINING_DATA_SOURCE}")
+
+    def clear(self):
+        """清空缓存的工具实例"""
+        with self._lock:
+            self._tools.clear()
+
+
+# 全局注册表
+_tool_registry = TrainingSearchToolRegistry()
+
+
+def get_training_data_search(data_source: Optional[str] = None) -> BaseTrainingDataSearch:
+    """
+    便捷函数: 获取缓存的训练数据搜索工具实例
+
+    与create_training_data_search()不同，配置未变化时重复调用返回同一实例，
+    适合在每次查询前调用以跟随config.py的热更新。
+
+    Args:
+        data_source: 数据源类型 ('keep' 或 'garmin')，为None时从config.py读取
+
+    Returns:
+        对应数据源的搜索工具实例
+    """
+    return _tool_registry.get_tool(data_source)
+
+
 # ===== 向后兼容性支持 =====
 # 为了保持与旧代码的兼容性,提供TrainingDataDB别名
 
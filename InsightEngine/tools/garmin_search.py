@@ -13,6 +13,8 @@ from sqlalchemy.orm import Session
 from .base_search import BaseTrainingDataSearch, DBResponse
 from .db_models import TrainingRecordGarmin
 from .db_session import db_session_manager
+from .columnar_cache import get_columnar_cache
+from .rollup_stats import RollupMetric, load_rollup_metrics
 
 
 @dataclass
@@ -95,6 +97,11 @@ class GarminDataSearch(BaseTrainingDataSearch):
     def __init__(self):
         super().__init__(data_source="garmin")
         self.db_manager = db_session_manager
+        self.columnar_cache = get_columnar_cache(
+            TrainingRecordGarmin,
+            numeric_columns=['distance_meters', 'avg_heart_rate', 'training_load', 'avg_power_watts'],
+            time_columns=['start_time_gmt']
+        )
 
     def _load_db_config(self) -> Dict[str, Any]:
         """ORM方式不需要直接配置,返回空字典"""
@@ -181,6 +188,14 @@ class GarminDataSearch(BaseTrainingDataSearch):
 
         start_time = datetime.now() - timedelta(days=days)
 
+        cached = self._search_columnar_cache(
+            "search_recent_trainings", params_for_log,
+            [('start_time_gmt', '>=', start_time)],
+            order_by='start_time_gmt', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordGarmin)\
@@ -231,6 +246,14 @@ class GarminDataSearch(BaseTrainingDataSearch):
                 error_message="日期格式错误,请使用 'YYYY-MM-DD' 格式"
             )
 
+        cached = self._search_columnar_cache(
+            "search_by_date_range", params_for_log,
+            [('start_time_gmt', '>=', start_dt), ('start_time_gmt', '<', end_dt)],
+            order_by='start_time_gmt', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordGarmin)\
@@ -271,6 +294,23 @@ class GarminDataSearch(BaseTrainingDataSearch):
         }
         print(f"--- Garmin数据源(ORM): 获取训练统计 (params: {params_for_log}) ---")
 
+        # 优先使用日/周汇总，汇总未建立或读取失败时回退到原始表统计
+        rollup_stats = self._rollup_training_stats(start_date, end_date)
+        if rollup_stats is not None:
+            if not rollup_stats['total_sessions']:
+                return DBResponse(
+                    tool_name="get_training_stats",
+                    parameters=params_for_log,
+                    data_source=self.data_source,
+                    error_message="未找到数据"
+                )
+            return DBResponse(
+                tool_name="get_training_stats",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                statistics=rollup_stats
+            )
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(
@@ -369,6 +409,97 @@ class GarminDataSearch(BaseTrainingDataSearch):
                 error_message=str(e)
             )
 
+    def _load_rollup_metrics(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> Optional[Dict[str, RollupMetric]]:
+        """读取日/周汇总，汇总不可用或日期格式错误时返回None"""
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            return None
+
+        try:
+            with self.db_manager.get_session() as session:
+                return load_rollup_metrics(session, self.data_source, start, end)
+        except Exception as e:
+            print(f"Garmin数据源训练汇总读取失败,回退到原始表统计: {e}")
+            return None
+
+    @staticmethod
+    def _int_sum(metric: RollupMetric) -> Optional[int]:
+        return int(metric.total) if metric.count else None
+
+    def _rollup_training_stats(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """通过日/周汇总计算训练统计(与get_training_stats原始表统计口径一致)"""
+        metrics = self._load_rollup_metrics(start_date, end_date)
+        if metrics is None:
+            return None
+
+        def metric(name: str) -> RollupMetric:
+            return metrics.get(name) or RollupMetric()
+
+        duration = metric('duration_seconds')
+        distance = metric('distance_meters')
+        peak_hr = metric('max_heart_rate').maximum
+        stats = {
+            'total_sessions': metric('sessions').count,
+            'total_duration': self._int_sum(duration),
+            'avg_duration': duration.average,
+            'total_distance': distance.sum_or_none,
+            'avg_distance': distance.average,
+            'overall_avg_heart_rate': metric('avg_heart_rate').average,
+            'peak_heart_rate': int(peak_hr) if peak_hr is not None else None,
+            'overall_avg_cadence': metric('avg_cadence').average,
+            'overall_avg_power': metric('avg_power_watts').average,
+            'avg_training_load': metric('training_load').average,
+            'avg_aerobic_effect': metric('aerobic_training_effect').average,
+            'avg_anaerobic_effect': metric('anaerobic_training_effect').average,
+            'total_calories': self._int_sum(metric('activity_calories')),
+            'avg_stride_length': metric('avg_stride_length_cm').average,
+            'avg_vertical_oscillation': metric('avg_vertical_oscillation_cm').average,
+            'avg_ground_contact_time': metric('avg_ground_contact_time_ms').average
+        }
+
+        if stats['total_distance'] and stats['total_distance'] > 0:
+            total_distance_km = float(stats['total_distance']) / 1000.0
+            total_duration = float(stats['total_duration']) if stats['total_duration'] else 0.0
+            stats['avg_pace_per_km'] = round(total_duration / total_distance_km, 2)
+        else:
+            stats['avg_pace_per_km'] = None
+        return stats
+
+    def _rollup_training_effect(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """通过日/周汇总计算训练效果分析(与get_training_effect_analysis原始表统计口径一致)"""
+        metrics = self._load_rollup_metrics(start_date, end_date)
+        if metrics is None:
+            return None
+
+        def metric(name: str) -> RollupMetric:
+            return metrics.get(name) or RollupMetric()
+
+        return {
+            'total_sessions': metric('sessions').count,
+            'avg_aerobic_effect': metric('aerobic_training_effect').average,
+            'avg_anaerobic_effect': metric('anaerobic_training_effect').average,
+            'avg_training_load': metric('training_load').average,
+            'maintaining_count': self._int_sum(metric('label_maintaining')),
+            'improving_count': self._int_sum(metric('label_improving')),
+            'highly_improving_count': self._int_sum(metric('label_highly_improving')),
+            'total_moderate_minutes': self._int_sum(metric('moderate_intensity_minutes')),
+            'total_vigorous_minutes': self._int_sum(metric('vigorous_intensity_minutes'))
+        }
+
     def search_by_distance_range(
         self,
         min_distance_km: float,
@@ -384,6 +515,16 @@ class GarminDataSearch(BaseTrainingDataSearch):
         print(f"--- Garmin数据源(ORM): 按距离范围查询 (params: {params_for_log}) ---")
 
         min_meters = min_distance_km * 1000
+        distance_filters = [('distance_meters', '>=', min_meters)]
+        if max_distance_km:
+            distance_filters.append(('distance_meters', '<=', max_distance_km * 1000))
+        cached = self._search_columnar_cache(
+            "search_by_distance_range", params_for_log,
+            distance_filters,
+            order_by='distance_meters', limit=limit
+        )
+        if cached is not None:
+            return cached
 
         try:
             with self.db_manager.get_session() as session:
@@ -428,6 +569,17 @@ class GarminDataSearch(BaseTrainingDataSearch):
         }
         print(f"--- Garmin数据源(ORM): 按心率区间查询 (params: {params_for_log}) ---")
 
+        hr_filters = [('avg_heart_rate', '>=', min_avg_hr)]
+        if max_avg_hr:
+            hr_filters.append(('avg_heart_rate', '<=', max_avg_hr))
+        cached = self._search_columnar_cache(
+            "search_by_heart_rate", params_for_log,
+            hr_filters,
+            order_by='start_time_gmt', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordGarmin)\
@@ -472,6 +624,17 @@ class GarminDataSearch(BaseTrainingDataSearch):
         }
         print(f"--- Garmin数据源(ORM): 按训练负荷查询 (params: {params_for_log}) ---")
 
+        load_filters = [('training_load', '>=', min_load)]
+        if max_load:
+            load_filters.append(('training_load', '<=', max_load))
+        cached = self._search_columnar_cache(
+            "search_by_training_load", params_for_log,
+            load_filters,
+            order_by='training_load', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordGarmin)\
@@ -514,6 +677,17 @@ class GarminDataSearch(BaseTrainingDataSearch):
         }
         print(f"--- Garmin数据源(ORM): 按功率区间查询 (params: {params_for_log}) ---")
 
+        power_filters = [('avg_power_watts', '>=', min_avg_power)]
+        if max_avg_power:
+            power_filters.append(('avg_power_watts', '<=', max_avg_power))
+        cached = self._search_columnar_cache(
+            "search_by_power_zone", params_for_log,
+            power_filters,
+            order_by='avg_power_watts', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordGarmin)\
@@ -551,6 +725,23 @@ class GarminDataSearch(BaseTrainingDataSearch):
         params_for_log = {'start_date': start_date, 'end_date': end_date}
         print(f"--- Garmin数据源(ORM): 训练效果分析 (params: {params_for_log}) ---")
 
+        # 优先使用日/周汇总，汇总未建立或读取失败时回退到原始表统计
+        rollup_stats = self._rollup_training_effect(start_date, end_date)
+        if rollup_stats is not None:
+            if not rollup_stats['total_sessions']:
+                return DBResponse(
+                    tool_name="get_training_effect_analysis",
+                    parameters=params_for_log,
+                    data_source=self.data_source,
+                    error_message="未找到数据"
+                )
+            return DBResponse(
+                tool_name="get_training_effect_analysis",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                statistics=rollup_stats
+            )
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(
@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+"""
+逐秒心率序列的向量化分析
+将多次训练的heart_rate_data批量对齐为一个NumPy矩阵(按最长序列补齐并附带掩码)，
+一次向量化计算所有训练的以下指标，不再逐个采样点循环:
+
+1. 心率区间时长: 按最大心率百分比划分5个区间(<60%、60-70%、70-80%、80-90%、≥90%)
+2. 心率漂移(cardiac drift): 后半程平均心率相对前半程的升幅(%)
+3. 有氧解耦(Pa:HR decoupling): 前后半程效率因子(速度/心率)的下降幅度(%)
+   Keep只记录整次训练的距离与时长，按匀速假设计算，即 1 - 前半程心率/后半程心率
+4. TRIMP: Banister训练冲量 Σ Δt(分钟) × HRr × 0.64 × e^(1.92 × HRr)，HRr为储备心率比例
+
+采样间隔按 训练时长 / 采样点数 估算，序列中<30或>240bpm的异常点不参与计算。
+"""
+
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# 区间上界(占最大心率的比例)，最后一个区间不设上界
+ZONE_UPPER_BOUNDS = (0.6, 0.7, 0.8, 0.9)
+ZONE_NAMES = ('zone_1', 'zone_2', 'zone_3', 'zone_4', 'zone_5')
+
+# 有效心率范围(bpm)
+MIN_VALID_HR = 30
+MAX_VALID_HR = 240
+
+DEFAULT_MAX_HR = 190
+DEFAULT_RESTING_HR = 60
+
+# 前后半程比较时每个半程至少需要的有效采样点
+MIN_SAMPLES_PER_HALF = 10
+
+
+def build_hr_matrix(series: Sequence[Optional[array]]):
+    """
+    将多条心率序列对齐为矩阵
+
+    Args:
+        series: 每次训练的心率序列(array('H'))，没有数据时为None
+
+    Returns:
+        (hr, valid, lengths): hr为 N×L 的float64矩阵(补齐位置为0)，
+        valid为有效采样点掩码，lengths为各序列原始长度
+    """
+    lengths = np.array([len(s) if s else 0 for s in series], dtype=np.int64)
+    width = int(lengths.max()) if lengths.size else 0
+    hr = np.zeros((len(series), width), dtype=np.float64)
+    for i, s in enumerate(series):
+        if s:
+            # array('H')与uint16共享缓冲区，每条序列一次拷贝
+            hr[i, :len(s)] = np.frombuffer(s, dtype=np.uint16)
+
+    positions = np.arange(width)
+    valid = (positions < lengths[:, None]) & (hr >= MIN_VALID_HR) & (hr <= MAX_VALID_HR)
+    return hr, valid, lengths
+
+
+def _masked_mean(hr: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    counts = mask.sum(axis=1)
+    sums = np.where(mask, hr, 0.0).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _round_or_none(value, digits: int = 1) -> Optional[float]:
+    if value is None or not np.isfinite(value):
+        return None
+    return round(float(value), digits)
+
+
+def analyze_hr_series(
+    series: Sequence[Optional[array]],
+    durations: Sequence[Optional[float]],
+    distances: Sequence[Optional[float]],
+    max_hr: float = DEFAULT_MAX_HR,
+    resting_hr: float = DEFAULT_RESTING_HR
+) -> List[Optional[Dict[str, Any]]]:
+    """
+    批量计算每次训练的心率序列指标
+
+    Args:
+        series: 心率序列列表
+        durations: 对应训练时长(秒)
+        distances: 对应训练距离(米)，用于效率因子
+        max_hr: 最大心率
+        resting_hr: 静息心率
+
+    Returns:
+        与输入等长的列表，每项为指标字典；没有有效心率数据的训练为None
+    """
+    if not series:
+        return []
+
+    hr, valid, lengths = build_hr_matrix(series)
+    valid_counts = valid.sum(axis=1)
+
+    duration = np.array([d if d else np.nan for d in durations], dtype=np.float64)
+    distance = np.array([d if d else np.nan for d in distances], dtype=np.float64)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        interval = np.where(lengths > 0, duration / np.maximum(lengths, 1), np.nan)
+    # 缺少时长时按1秒/点处理
+    interval = np.where(np.isfinite(interval) & (interval > 0), interval, 1.0)
+
+    # 1. 心率区间时长
+    zone_index = np.searchsorted(np.asarray(ZONE_UPPER_BOUNDS) * max_hr, hr, side='right')
+    zone_seconds = np.stack(
+        [((zone_index == z) & valid).sum(axis=1) for z in range(len(ZONE_NAMES))], axis=1
+    ) * interval[:, None]
+
+    # 2/3. 前后半程: 以各序列自身长度的中点切分
+    positions = np.arange(hr.shape[1])
+    first_half = valid & (positions < (lengths // 2)[:, None])
+    second_half = valid & ~first_half
+    first_mean = _masked_mean(hr, first_half)
+    second_mean = _masked_mean(hr, second_half)
+    enough = (first_half.sum(axis=1) >= MIN_SAMPLES_PER_HALF) & (second_half.sum(axis=1) >= MIN_SAMPLES_PER_HALF)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        drift_pct = np.where(enough, (second_mean / first_mean - 1.0) * 100.0, np.nan)
+        decoupling_pct = np.where(enough & np.isfinite(distance), (1.0 - first_mean / second_mean) * 100.0, np.nan)
+
+    # 4. TRIMP
+    reserve = max(float(max_hr) - float(resting_hr), 1.0)
+    hr_ratio = np.clip((hr - resting_hr) / reserve, 0.0, 1.0)
+    trimp = (np.where(valid, hr_ratio * 0.64 * np.exp(1.92 * hr_ratio), 0.0).sum(axis=1)
+             * interval / 60.0)
+
+    mean_hr = _masked_mean(hr, valid)
+    peak_hr = np.where(valid, hr, 0.0).max(axis=1) if hr.shape[1] else np.zeros(len(series))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # 效率因子: 米/分钟 每次心跳
+        efficiency = (distance / duration * 60.0) / mean_hr
+
+    results: List[Optional[Dict[str, Any]]] = []
+    for i in range(len(series)):
+        if valid_counts[i] == 0:
+            results.append(None)
+            continue
+        results.append({
+            'samples': int(valid_counts[i]),
+            'sample_interval_seconds': _round_or_none(interval[i], 2),
+            'mean_hr': _round_or_none(mean_hr[i]),
+            'peak_hr': int(peak_hr[i]),
+            'zone_seconds': {name: int(round(zone_seconds[i, z])) for z, name in enumerate(ZONE_NAMES)},
+            'cardiac_drift_pct': _round_or_none(drift_pct[i], 2),
+            'decoupling_pct': _round_or_none(decoupling_pct[i], 2),
+            'efficiency_factor': _round_or_none(efficiency[i], 3),
+            'trimp': _round_or_none(trimp[i]),
+        })
+    return results
+
+
+def summarize_hr_analysis(analyses: Sequence[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    汇总多次训练的心率序列指标
+
+    Returns:
+        区间时长合计与占比、平均漂移/解耦、TRIMP合计等统计
+    """
+    analyses = [a for a in analyses if a]
+    summary: Dict[str, Any] = {
+        'analyzed_sessions': len(analyses),
+        'zone_seconds': {name: 0 for name in ZONE_NAMES},
+        'zone_distribution_pct': {name: None for name in ZONE_NAMES},
+        'avg_cardiac_drift_pct': None,
+        'avg_decoupling_pct': None,
+        'sessions_decoupling_over_5pct': 0,
+        'total_trimp': None,
+        'avg_trimp': None,
+    }
+    if not analyses:
+        return summary
+
+    zone_totals = np.array([[a['zone_seconds'][name] for name in ZONE_NAMES] for a in analyses]).sum(axis=0)
+    total_zone_seconds = zone_totals.sum()
+    summary['zone_seconds'] = {name: int(zone_totals[z]) for z, name in enumerate(ZONE_NAMES)}
+    if total_zone_seconds > 0:
+        summary['zone_distribution_pct'] = {
+            name: round(float(zone_totals[z]) / float(total_zone_seconds) * 100.0, 1)
+            for z, name in enumerate(ZONE_NAMES)
+        }
+
+    def values(key: str) -> np.ndarray:
+        return np.array([a[key] for a in analyses if a[key] is not None], dtype=np.float64)
+
+    drift = values('cardiac_drift_pct')
+    decoupling = values('decoupling_pct')
+    trimp = values('trimp')
+    if drift.size:
+        summary['avg_cardiac_drift_pct'] = round(float(drift.mean()), 2)
+    if decoupling.size:
+        summary['avg_decoupling_pct'] = round(float(decoupling.mean()), 2)
+        summary['sessions_decoupling_over_5pct'] = int((decoupling > 5.0).sum())
+    if trimp.size:
+        summary['total_trimp'] = round(float(trimp.sum()), 1)
+        summary['avg_trimp'] = round(float(trimp.mean()), 1)
+    return summary
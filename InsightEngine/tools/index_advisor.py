@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+"""
+训练数据查询索引顾问
+以一组代表性参数依次调用Keep/Garmin数据源的全部查询工具，记录工具实际发出的SELECT语句，
+再对每条语句执行EXPLAIN，报告全表扫描和filesort，用于在数据增长前确认索引是否生效:
+
+- 全表扫描: EXPLAIN的type为ALL
+- 全索引扫描: type为index(按索引顺序读完整棵索引树)
+- filesort: Extra包含Using filesort(ORDER BY start_time DESC LIMIT n无法按索引顺序读取)
+
+调用工具时会临时关闭列式内存缓存，确保查询落到数据库。
+
+用法:
+    python -m InsightEngine.tools.index_advisor [keep|garmin]
+"""
+
+import contextlib
+import io
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from .db_session import db_session_manager
+from .factory import TrainingDataSearchFactory
+
+# 各数据源参与检查的工具及代表性参数
+TOOL_CASES: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    'keep': [
+        ('search_recent_trainings', {'days': 30, 'limit': 50}),
+        ('search_by_date_range', {'start_date': '2024-01-01', 'end_date': '2024-12-31', 'limit': 100}),
+        ('get_training_stats', {'start_date': '2024-01-01', 'end_date': '2024-12-31'}),
+        ('search_by_distance_range', {'min_distance_km': 10, 'max_distance_km': 21, 'limit': 50}),
+        ('search_by_heart_rate', {'min_avg_hr': 150, 'max_avg_hr': 170, 'limit': 50}),
+        ('analyze_heart_rate_series', {'start_date': '2024-01-01', 'end_date': '2024-12-31', 'limit': 50}),
+    ],
+    'garmin': [
+        ('search_recent_trainings', {'days': 30, 'limit': 50}),
+        ('search_by_date_range', {'start_date': '2024-01-01', 'end_date': '2024-12-31', 'limit': 100}),
+        ('get_training_stats', {'start_date': '2024-01-01', 'end_date': '2024-12-31'}),
+        ('search_by_distance_range', {'min_distance_km': 10, 'max_distance_km': 21, 'limit': 50}),
+        ('search_by_heart_rate', {'min_avg_hr': 150, 'max_avg_hr': 170, 'limit': 50}),
+        ('search_by_training_load', {'min_load': 150, 'max_load': 300, 'limit': 50}),
+        ('search_by_power_zone', {'min_avg_power': 200, 'max_avg_power': 250, 'limit': 50}),
+        ('get_training_effect_analysis', {'start_date': '2024-01-01', 'end_date': '2024-12-31'}),
+    ],
+}
+
+
+@dataclass
+class ExplainRow:
+    """EXPLAIN输出中的一行(一张表的访问方式)"""
+    table: Optional[str]
+    access_type: Optional[str]
+    key: Optional[str]
+    rows: Optional[int]
+    extra: str
+
+    @property
+    def full_scan(self) -> bool:
+        return self.access_type == 'ALL'
+
+    @property
+    def full_index_scan(self) -> bool:
+        return self.access_type == 'index'
+
+    @property
+    def filesort(self) -> bool:
+        return 'Using filesort' in self.extra
+
+
+@dataclass
+class QueryAdvice:
+    """单条工具查询的EXPLAIN结果"""
+    tool_name: str
+    statement: str
+    rows: List[ExplainRow] = field(default_factory=list)
+    error: Optional[str] = None
+
+    @property
+    def problems(self) -> List[str]:
+        problems = []
+        for row in self.rows:
+            if row.full_scan:
+                problems.append(f"{row.table}: 全表扫描(预估{row.rows}行)")
+            elif row.full_index_scan:
+                problems.append(f"{row.table}: 全索引扫描 {row.key}(预估{row.rows}行)")
+            if row.filesort:
+                problems.append(f"{row.table}: Using filesort")
+        return problems
+
+
+def parse_explain_rows(rows: List[Dict[str, Any]]) -> List[ExplainRow]:
+    """将MySQL EXPLAIN结果(列名->值)转换为ExplainRow"""
+    return [
+        ExplainRow(
+            table=row.get('table'),
+            access_type=row.get('type'),
+            key=row.get('key'),
+            rows=row.get('rows'),
+            extra=row.get('Extra') or ''
+        )
+        for row in rows
+    ]
+
+
+class _StatementRecorder:
+    """在引擎上记录执行过的SELECT语句及参数"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[Tuple[str, Any]] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def advise(data_source: str, verbose: bool = False) -> List[QueryAdvice]:
+    """
+    对指定数据源的全部工具查询执行EXPLAIN
+
+    Args:
+        data_source: 'keep' 或 'garmin'
+        verbose: 是否保留工具自身的打印输出
+
+    Returns:
+        每条查询语句的EXPLAIN结果
+    """
+    tool = TrainingDataSearchFactory.create_search_tool(data_source)
+    tool.columnar_cache = None
+    engine = db_session_manager.get_engine()
+
+    advices: List[QueryAdvice] = []
+    for tool_name, kwargs in TOOL_CASES[data_source]:
+        with _StatementRecorder(engine) as recorder:
+            output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+            with output:
+                response = getattr(tool, tool_name)(**kwargs)
+        if response.error_message and not recorder.statements:
+            advices.append(QueryAdvice(tool_name, '', error=response.error_message))
+            continue
+
+        with engine.connect() as conn:
+            for statement, parameters in recorder.statements:
+                advice = QueryAdvice(tool_name, statement)
+                try:
+                    result = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                    advice.rows = parse_explain_rows([dict(row) for row in result.mappings()])
+                except Exception as e:
+                    advice.error = str(e)
+                advices.append(advice)
+    return advices
+
+
+def print_report(data_source: str, advices: List[QueryAdvice]):
+    """打印索引检查报告"""
+    print(f"\n=== {data_source} 数据源查询索引检查 ===")
+    problem_count = 0
+    for advice in advices:
+        if advice.error:
+            print(f"⚠️ {advice.tool_name}: 无法检查 ({advice.error})")
+            continue
+        keys = ', '.join(f"{row.table}→{row.key or '无索引'}" for row in advice.rows)
+        if advice.problems:
+            problem_count += 1
+            print(f"❌ {advice.tool_name}: {keys}")
+            for problem in advice.problems:
+                print(f"   - {problem}")
+            print(f"   SQL: {' '.join(advice.statement.split())[:300]}")
+        else:
+            print(f"✅ {advice.tool_name}: {keys}")
+    print(f"共检查{len(advices)}条查询，{problem_count}条存在全表扫描或filesort")
+
+
+if __name__ == '__main__':
+    sources = sys.argv[1:] or list(TOOL_CASES)
+    for source in sources:
+        print_report(source, advise(source))
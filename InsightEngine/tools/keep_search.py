@@ -5,14 +5,57 @@ Keep运动APP训练数据搜索工具 (ORM版本)
 """
 
 import json
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
+from array import array
+from typing import List, Dict, Any, Iterable, Optional
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from sqlalchemy import func
+from sqlalchemy.orm import undefer
 
 from .base_search import BaseTrainingDataSearch, DBResponse
 from .db_models import TrainingRecordKeep
 from .db_session import db_session_manager
+from .columnar_cache import get_columnar_cache
+from .rollup_stats import RollupMetric, load_rollup_metrics
+from .hr_analytics import DEFAULT_RESTING_HR, DEFAULT_MAX_HR, analyze_hr_series, summarize_hr_analysis
+
+
+# 心率明细尚未加载的标记
+_NOT_LOADED = object()
+
+
+def decode_heart_rate_data(hr_json: Optional[str]) -> Optional[array]:
+    """
+    解析心率JSON数据为紧凑的array('H')
+
+    Args:
+        hr_json: 心率记录JSON (格式: ["108","109",...] 或 [108,109,...])
+
+    Returns:
+        无符号16位整数数组，没有有效数据时返回None
+    """
+    if not hr_json:
+        return None
+    try:
+        data = json.loads(hr_json)
+    except (json.JSONDecodeError, ValueError, TypeError):
+        return None
+    if not isinstance(data, (list, tuple)):
+        return None
+
+    try:
+        # 常见情况: 全部是合法数值，一次性转换
+        result = array('H', map(int, data))
+    except (ValueError, TypeError, OverflowError):
+        result = array('H')
+        for x in data:
+            if x is None or x == '':
+                continue
+            try:
+                result.append(int(x))
+            except (ValueError, TypeError, OverflowError):
+                continue
+    return result if result else None
 
 
 @dataclass
@@ -33,9 +76,6 @@ class KeepTrainingRecord:
     avg_heart_rate: Optional[int]
     max_heart_rate: Optional[int]
 
-    # 详细数据 (JSON格式)
-    heart_rate_data: Optional[List[int]]
-
     # 元数据
     add_ts: int
     last_modify_ts: int
@@ -43,6 +83,37 @@ class KeepTrainingRecord:
 
     # 计算字段
     pace_per_km: Optional[float] = None
+    hr_analysis: Optional[Dict[str, Any]] = None  # analyze_heart_rate_series计算的心率序列指标
+
+    # 详细数据: 心率明细不随记录查询，由KeepDataSearch.load_heart_rate_data批量加载原始JSON，
+    # 首次访问heart_rate_data时才解码为array('H')并缓存
+    _heart_rate_json: Any = field(default=_NOT_LOADED, repr=False, compare=False)
+    _heart_rate_cache: Any = field(default=_NOT_LOADED, repr=False, compare=False)
+
+    @property
+    def heart_rate_loaded(self) -> bool:
+        """心率明细是否已加载(不触发解码)"""
+        return self._heart_rate_json is not _NOT_LOADED
+
+    @property
+    def heart_rate_data(self) -> Optional[array]:
+        """
+        逐秒心率序列 (array('H'))，没有数据时为None
+
+        未批量加载的记录不会逐条查询数据库(避免N+1查询)，告警后返回None
+        """
+        if self._heart_rate_cache is _NOT_LOADED:
+            if self._heart_rate_json is _NOT_LOADED:
+                print(f"⚠️ 训练记录{self.id}的心率明细尚未加载，请先调用KeepDataSearch.load_heart_rate_data()批量加载")
+                return None
+            self._heart_rate_cache = decode_heart_rate_data(self._heart_rate_json)
+            self._heart_rate_json = None  # 解码后释放原始JSON
+        return self._heart_rate_cache
+
+    def set_heart_rate_json(self, hr_json: Optional[str]):
+        """设置心率明细的原始JSON(批量加载时使用)，首次读取heart_rate_data时再解码"""
+        self._heart_rate_json = hr_json
+        self._heart_rate_cache = _NOT_LOADED
 
 
 class KeepDataSearch(BaseTrainingDataSearch):
@@ -51,6 +122,12 @@ class KeepDataSearch(BaseTrainingDataSearch):
     def __init__(self):
         super().__init__(data_source="keep")
         self.db_manager = db_session_manager
+        self.columnar_cache = get_columnar_cache(
+            TrainingRecordKeep,
+            numeric_columns=['distance_meters', 'avg_heart_rate'],
+            time_columns=['start_time'],
+            exclude_columns=['heart_rate_data']
+        )
 
     def _load_db_config(self) -> Dict[str, Any]:
         """ORM方式不需要直接配置,返回空字典"""
@@ -64,24 +141,28 @@ class KeepDataSearch(BaseTrainingDataSearch):
         """ORM方式不使用原生SQL,此方法保留仅为兼容基类"""
         raise NotImplementedError("ORM方式不使用_execute_query方法")
 
-    def _parse_heart_rate_data(self, hr_json: Optional[str]) -> Optional[List[int]]:
+    def _parse_heart_rate_data(self, hr_json: Optional[str]) -> Optional[array]:
         """解析心率JSON数据"""
-        if not hr_json:
-            return None
-        try:
-            data = json.loads(hr_json)
-            if data is None or not isinstance(data, (list, tuple)):
-                return None
-            result = []
-            for x in data:
-                if x is not None and x != '':
-                    try:
-                        result.append(int(x))
-                    except (ValueError, TypeError):
-                        continue
-            return result if result else None
-        except (json.JSONDecodeError, ValueError, TypeError):
-            return None
+        return decode_heart_rate_data(hr_json)
+
+    def load_heart_rate_data(self, records: Iterable[KeepTrainingRecord]):
+        """
+        批量加载心率明细的原始JSON(一次查询)，读取heart_rate_data前调用；已加载的记录会跳过
+
+        Args:
+            records: 需要心率明细的训练记录
+        """
+        pending = {record.id: record for record in records if not record.heart_rate_loaded}
+        if not pending:
+            return
+        with self.db_manager.get_session() as session:
+            rows = session.query(TrainingRecordKeep.id, TrainingRecordKeep.heart_rate_data)\
+                .filter(TrainingRecordKeep.id.in_(list(pending)))\
+                .all()
+        for record_id, hr_json in rows:
+            pending.pop(record_id).set_heart_rate_json(hr_json)
+        for record in pending.values():
+            record.set_heart_rate_json(None)
 
     def _orm_to_record(self, orm_obj: TrainingRecordKeep) -> KeepTrainingRecord:
         """将ORM对象转换为KeepTrainingRecord数据类"""
@@ -97,7 +178,6 @@ class KeepDataSearch(BaseTrainingDataSearch):
             distance_meters=orm_obj.distance_meters,
             avg_heart_rate=orm_obj.avg_heart_rate,
             max_heart_rate=orm_obj.max_heart_rate,
-            heart_rate_data=self._parse_heart_rate_data(orm_obj.heart_rate_data),
             add_ts=orm_obj.add_ts,
             last_modify_ts=orm_obj.last_modify_ts,
             data_source=orm_obj.data_source,
@@ -115,6 +195,14 @@ class KeepDataSearch(BaseTrainingDataSearch):
 
         start_time = datetime.now() - timedelta(days=days)
 
+        cached = self._search_columnar_cache(
+            "search_recent_trainings", params_for_log,
+            [('start_time', '>=', start_time)],
+            order_by='start_time', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordKeep)\
@@ -166,6 +254,14 @@ class KeepDataSearch(BaseTrainingDataSearch):
                 error_message="日期格式错误,请使用 'YYYY-MM-DD' 格式"
             )
 
+        cached = self._search_columnar_cache(
+            "search_by_date_range", params_for_log,
+            [('start_time', '>=', start_dt), ('start_time', '<', end_dt)],
+            order_by='start_time', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordKeep)\
@@ -206,6 +302,23 @@ class KeepDataSearch(BaseTrainingDataSearch):
         }
         print(f"--- Keep数据源(ORM): 获取训练统计 (params: {params_for_log}) ---")
 
+        # 优先使用日/周汇总，汇总未建立或读取失败时回退到原始表统计
+        rollup_stats = self._rollup_training_stats(start_date, end_date)
+        if rollup_stats is not None:
+            if not rollup_stats['total_sessions']:
+                return DBResponse(
+                    tool_name="get_training_stats",
+                    parameters=params_for_log,
+                    data_source=self.data_source,
+                    error_message="未找到数据"
+                )
+            return DBResponse(
+                tool_name="get_training_stats",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                statistics=rollup_stats
+            )
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(
@@ -288,6 +401,51 @@ class KeepDataSearch(BaseTrainingDataSearch):
                 error_message=str(e)
             )
 
+    def _rollup_training_stats(
+        self,
+        start_date: Optional[str],
+        end_date: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """通过日/周汇总计算训练统计，汇总不可用或日期格式错误时返回None"""
+        try:
+            start = datetime.strptime(start_date, '%Y-%m-%d').date() if start_date else None
+            end = datetime.strptime(end_date, '%Y-%m-%d').date() if end_date else None
+        except ValueError:
+            return None
+
+        try:
+            with self.db_manager.get_session() as session:
+                metrics = load_rollup_metrics(session, self.data_source, start, end)
+        except Exception as e:
+            print(f"Keep数据源训练汇总读取失败,回退到原始表统计: {e}")
+            return None
+        if metrics is None:
+            return None
+
+        def metric(name: str) -> RollupMetric:
+            return metrics.get(name) or RollupMetric()
+
+        duration = metric('duration_seconds')
+        distance = metric('distance_meters')
+        stats = {
+            'total_sessions': metric('sessions').count,
+            'total_duration': int(duration.total) if duration.count else None,
+            'avg_duration': duration.average,
+            'total_distance': distance.sum_or_none,
+            'avg_distance': distance.average,
+            'overall_avg_heart_rate': metric('avg_heart_rate').average,
+            'peak_heart_rate': int(metric('max_heart_rate').maximum) if metric('max_heart_rate').maximum is not None else None,
+            'total_calories': int(metric('calories').total) if metric('calories').count else None
+        }
+
+        if stats['total_distance'] and stats['total_distance'] > 0:
+            total_distance_km = float(stats['total_distance']) / 1000.0
+            total_duration = float(stats['total_duration']) if stats['total_duration'] else 0.0
+            stats['avg_pace_per_km'] = round(total_duration / total_distance_km, 2)
+        else:
+            stats['avg_pace_per_km'] = None
+        return stats
+
     def search_by_distance_range(
         self,
         min_distance_km: float,
@@ -303,6 +461,16 @@ class KeepDataSearch(BaseTrainingDataSearch):
         print(f"--- Keep数据源(ORM): 按距离范围查询 (params: {params_for_log}) ---")
 
         min_meters = min_distance_km * 1000
+        distance_filters = [('distance_meters', '>=', min_meters)]
+        if max_distance_km:
+            distance_filters.append(('distance_meters', '<=', max_distance_km * 1000))
+        cached = self._search_columnar_cache(
+            "search_by_distance_range", params_for_log,
+            distance_filters,
+            order_by='distance_meters', limit=limit
+        )
+        if cached is not None:
+            return cached
 
         try:
             with self.db_manager.get_session() as session:
@@ -347,6 +515,17 @@ class KeepDataSearch(BaseTrainingDataSearch):
         }
         print(f"--- Keep数据源(ORM): 按心率区间查询 (params: {params_for_log}) ---")
 
+        hr_filters = [('avg_heart_rate', '>=', min_avg_hr)]
+        if max_avg_hr:
+            hr_filters.append(('avg_heart_rate', '<=', max_avg_hr))
+        cached = self._search_columnar_cache(
+            "search_by_heart_rate", params_for_log,
+            hr_filters,
+            order_by='start_time', limit=limit
+        )
+        if cached is not None:
+            return cached
+
         try:
             with self.db_manager.get_session() as session:
                 query = session.query(TrainingRecordKeep)\
@@ -374,3 +553,98 @@ class KeepDataSearch(BaseTrainingDataSearch):
                 data_source=self.data_source,
                 error_message=str(e)
             )
+
+    def analyze_heart_rate_series(
+        self,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        limit: int = 50,
+        max_hr: Optional[int] = None,
+        resting_hr: Optional[int] = None
+    ) -> DBResponse:
+        """分析逐秒心率序列 (批量解码后向量化计算)"""
+        params_for_log = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'limit': limit,
+            'max_hr': max_hr,
+            'resting_hr': resting_hr
+        }
+        print(f"--- Keep数据源(ORM): 分析心率序列 (params: {params_for_log}) ---")
+
+        try:
+            start_dt = datetime.strptime(start_date, '%Y-%m-%d') if start_date else None
+            end_dt = datetime.strptime(end_date, '%Y-%m-%d') + timedelta(days=1) if end_date else None
+        except ValueError:
+            return DBResponse(
+                tool_name="analyze_heart_rate_series",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                error_message="日期格式错误,请使用 'YYYY-MM-DD' 格式"
+            )
+
+        try:
+            with self.db_manager.get_session() as session:
+                query = session.query(TrainingRecordKeep)\
+                    .options(undefer(TrainingRecordKeep.heart_rate_data))\
+                    .filter(TrainingRecordKeep.heart_rate_data.isnot(None))
+
+                if start_dt:
+                    query = query.filter(TrainingRecordKeep.start_time >= start_dt)
+                if end_dt:
+                    query = query.filter(TrainingRecordKeep.start_time < end_dt)
+
+                query = query.order_by(TrainingRecordKeep.start_time.desc()).limit(limit)
+
+                records = []
+                for obj in query.all():
+                    record = self._orm_to_record(obj)
+                    record.set_heart_rate_json(obj.heart_rate_data)
+                    records.append(record)
+
+            records = [record for record in records if record.heart_rate_data]
+            if not records:
+                return DBResponse(
+                    tool_name="analyze_heart_rate_series",
+                    parameters=params_for_log,
+                    data_source=self.data_source,
+                    error_message="未找到包含心率序列的训练记录"
+                )
+
+            if not max_hr:
+                recorded_max = [record.max_heart_rate for record in records if record.max_heart_rate]
+                max_hr = max(recorded_max) if recorded_max else DEFAULT_MAX_HR
+
+            analyses = analyze_hr_series(
+                [record.heart_rate_data for record in records],
+                [record.duration_seconds for record in records],
+                [record.distance_meters for record in records],
+                max_hr=max_hr,
+                resting_hr=resting_hr or DEFAULT_RESTING_HR
+            )
+            for record, analysis in zip(records, analyses):
+                record.hr_analysis = analysis
+
+            stats = summarize_hr_analysis(analyses)
+            stats['max_hr_used'] = max_hr
+            stats['resting_hr_used'] = resting_hr or DEFAULT_RESTING_HR
+
+            return DBResponse(
+                tool_name="analyze_heart_rate_series",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                results=records,
+                statistics=stats
+            )
+        except Exception as e:
+            print(f"Keep数据源(ORM)查询错误: {e}")
+            return DBResponse(
+                tool_name="analyze_heart_rate_series",
+                parameters=params_for_log,
+                data_source=self.data_source,
+                error_message=str(e)
+            )
+
+    def get_supported_tools(self) -> List[str]:
+        """获取Keep数据源支持的所有工具"""
+        return super().get_supported_tools() + ["analyze_heart_rate_series"]
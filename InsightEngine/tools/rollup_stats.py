@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+基于日/周汇总表(training_rollups)的区间统计
+完整的ISO周使用周汇总行，区间两端不足一周的部分使用日汇总行，
+统计任意日期区间只需对几百行汇总求和，不再扫描原始训练记录表
+"""
+
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, func, or_
+
+from .db_models import TrainingRollup
+
+
+@dataclass
+class RollupMetric:
+    """单个指标在区间内的汇总值"""
+    total: float = 0.0
+    count: int = 0
+    maximum: Optional[float] = None
+
+    @property
+    def average(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def sum_or_none(self) -> Optional[float]:
+        """与SQL SUM()一致: 没有非空值时返回None"""
+        return self.total if self.count else None
+
+
+def _period_conditions(start: Optional[date], end: Optional[date]):
+    """将[start, end]拆分为完整ISO周(周汇总)与两端零散日期(日汇总)"""
+    if start is None and end is None:
+        return [TrainingRollup.period_type == 'week']
+
+    # 第一个完整周的周一(>= start) 与最后一个完整周的周一(该周周日 <= end)
+    first_week = start + timedelta(days=(7 - start.weekday()) % 7) if start else None
+    last_week = None
+    if end:
+        last_week = end - timedelta(days=end.weekday())
+        if end.weekday() != 6:
+            # end所在的周不完整，退回上一周
+            last_week -= timedelta(days=7)
+
+    if first_week is not None and last_week is not None and first_week > last_week:
+        # 区间内没有完整的周，全部使用日汇总
+        return [and_(
+            TrainingRollup.period_type == 'day',
+            TrainingRollup.period_start >= start,
+            TrainingRollup.period_start <= end
+        )]
+
+    week_filters = [TrainingRollup.period_type == 'week']
+    if first_week is not None:
+        week_filters.append(TrainingRollup.period_start >= first_week)
+    if last_week is not None:
+        week_filters.append(TrainingRollup.period_start <= last_week)
+    conditions = [and_(*week_filters)]
+
+    if start is not None and start < first_week:
+        conditions.append(and_(
+            TrainingRollup.period_type == 'day',
+            TrainingRollup.period_start >= start,
+            TrainingRollup.period_start < first_week
+        ))
+    if end is not None:
+        conditions.append(and_(
+            TrainingRollup.period_type == 'day',
+            TrainingRollup.period_start > last_week + timedelta(days=6),
+            TrainingRollup.period_start <= end
+        ))
+    return conditions
+
+
+def load_rollup_metrics(
+    session,
+    data_source: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> Optional[Dict[str, RollupMetric]]:
+    """
+    读取区间[start, end](含两端)内各指标的汇总值
+
+    Args:
+        session: 数据库会话
+        data_source: 数据源 ('keep' 或 'garmin')
+        start: 开始日期，None表示不限
+        end: 结束日期，None表示不限
+
+    Returns:
+        指标名 -> RollupMetric；汇总尚未建立(表中没有该数据源的行)时返回None，由调用方回退到原始表统计
+    """
+    built = session.query(TrainingRollup.id)\
+        .filter(TrainingRollup.data_source == data_source)\
+        .first()
+    if built is None:
+        return None
+
+    rows = session.query(
+        TrainingRollup.metric,
+        func.sum(TrainingRollup.value_sum),
+        func.sum(TrainingRollup.value_count),
+        func.max(TrainingRollup.value_max)
+    ).filter(
+        TrainingRollup.data_source == data_source,
+        or_(*_period_conditions(start, end))
+    ).group_by(TrainingRollup.metric).all()
+
+    return {
+        metric: RollupMetric(float(total or 0), int(count or 0), maximum)
+        for metric, total, count, maximum in rows
+    }
@@ -12,6 +12,11 @@ from .text_processing import (
     format_search_results_for_prompt
 )
 
+from .record_encoder import (
+    encode_training_records,
+    encode_statistics
+)
+
 from .config import Config, load_config
 
 __all__ = [
@@ -21,6 +26,8 @@ __all__ = [
     "extract_clean_response",
     "update_state_with_search_results",
     "format_search_results_for_prompt",
+    "encode_training_records",
+    "encode_statistics",
     "Config",
     "load_config"
 ]
@@ -44,11 +44,14 @@ class Config:
     # Model behaviour configuration
     max_reflections: int = 3
     max_paragraphs: int = 6
+    paragraph_concurrency: int = 1  # 段落并发数, 1表示串行处理
     search_timeout: int = 240
     max_content_length: int = 500000
 
     # Search result limits for training data queries
     max_search_results_for_llm: int = 0  # 0 means no limit
+    compact_search_results: bool = True  # 训练记录以紧凑表格提供给LLM, False时沿用逐条文字描述
+    search_results_token_budget: int = 6000  # 紧凑表格的估算token上限, 超出时汇总并抽样
 
     # Output configuration
     output_dir: str = "reports"
@@ -97,9 +100,15 @@ class Config:
                 db_charset=_get_value(config_module, "DB_CHARSET", "utf8mb4"),
                 max_reflections=int(_get_value(config_module, "MAX_REFLECTIONS", 3)),
                 max_paragraphs=int(_get_value(config_module, "MAX_PARAGRAPHS", 6)),
+                paragraph_concurrency=int(_get_value(config_module, "PARAGRAPH_CONCURRENCY", 1)),
                 search_timeout=int(_get_value(config_module, "SEARCH_TIMEOUT", 240)),
                 max_content_length=int(_get_value(config_module, "SEARCH_CONTENT_MAX_LENGTH", 500000)),
                 max_search_results_for_llm=int(_get_value(config_module, "MAX_SEARCH_RESULTS_FOR_LLM", 0)),
+                compact_search_results=str(
+                    _get_value(config_module, "COMPACT_SEARCH_RESULTS", "true")
+                ).lower()
+                in ("true", "1", "yes"),
+                search_results_token_budget=int(_get_value(config_module, "SEARCH_RESULTS_TOKEN_BUDGET", 6000)),
                 output_dir=_get_value(config_module, "OUTPUT_DIR", "reports"),
                 save_intermediate_states=str(
                     _get_value(config_module, "SAVE_INTERMEDIATE_STATES", "true")
@@ -129,9 +138,15 @@ class Config:
             db_charset=_get_value(config_dict, "DB_CHARSET", "utf8mb4"),
             max_reflections=int(_get_value(config_dict, "MAX_REFLECTIONS", 3)),
             max_paragraphs=int(_get_value(config_dict, "MAX_PARAGRAPHS", 6)),
+            paragraph_concurrency=int(_get_value(config_dict, "PARAGRAPH_CONCURRENCY", 1)),
             search_timeout=int(_get_value(config_dict, "SEARCH_TIMEOUT", 240)),
             max_content_length=int(_get_value(config_dict, "SEARCH_CONTENT_MAX_LENGTH", 500000)),
             max_search_results_for_llm=int(_get_value(config_dict, "MAX_SEARCH_RESULTS_FOR_LLM", 0)),
+            compact_search_results=str(
+                _get_value(config_dict, "COMPACT_SEARCH_RESULTS", "true")
+            ).lower()
+            in ("true", "1", "yes"),
+            search_results_token_budget=int(_get_value(config_dict, "SEARCH_RESULTS_TOKEN_BUDGET", 6000)),
             output_dir=_get_value(config_dict, "OUTPUT_DIR", "reports"),
             save_intermediate_states=str(
                 _get_value(config_dict, "SAVE_INTERMEDIATE_STATES", "true")
@@ -220,6 +235,7 @@ def print_config(config: Config):
     print(f"最长内容长度: {config.max_content_length}")
     print(f"最大反思次数: {config.max_reflections}")
     print(f"最大段落数: {config.max_paragraphs}")
+    print(f"段落并发数: {config.paragraph_concurrency}")
     print(f"输出目录: {config.output_dir}")
     print(f"保存中间状态: {config.save_intermediate_states}")
     print(f"LLM API Key: {'已配置' if config.llm_api_key else '未配置'}")
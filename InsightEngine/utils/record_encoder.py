@@ -0,0 +1,224 @@
+"""
+训练记录的紧凑表格编码
+将查询工具返回的训练记录编码为带单位表头的竖线分隔表格，替代每条记录一段多行文字:
+
+1. 只输出至少一条记录有值的列(Garmin的训练负荷/功率、心率序列分析指标等按需出现)
+2. token数(utils.prompt_budget.count_tokens)超过预算时，改为按周(仍超出则按月)汇总，再用剩余预算等间隔抽样保留部分明细行
+3. 工具返回的statistics扁平化为 键: 值 行，与记录表一起提供给LLM
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from utils.prompt_budget import count_tokens
+
+DEFAULT_TOKEN_BUDGET = 6000
+
+# (列名, 单位, 取值函数)
+Column = Tuple[str, str, Callable[[Any], Any]]
+
+
+def _start_time(record) -> Optional[datetime]:
+    return getattr(record, 'start_time', None) or getattr(record, 'start_time_gmt', None)
+
+
+def _number(value, digits: int = 0) -> str:
+    if value is None:
+        return ''
+    value = float(value)
+    return str(int(round(value))) if digits == 0 else f"{value:.{digits}f}"
+
+
+def _pace(seconds_per_km) -> str:
+    if not seconds_per_km:
+        return ''
+    seconds = int(round(float(seconds_per_km)))
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def _hr_metric(key: str):
+    def getter(record):
+        analysis = getattr(record, 'hr_analysis', None)
+        return analysis.get(key) if analysis else None
+    return getter
+
+
+# 基础列(所有数据源)
+BASE_COLUMNS: List[Column] = [
+    ('日期', '', lambda r: _start_time(r).strftime('%Y-%m-%d %H:%M') if _start_time(r) else None),
+    ('类型', '', lambda r: getattr(r, 'exercise_type', None) or getattr(r, 'sport_type', None)),
+    ('时长', 'min', lambda r: r.duration_seconds / 60.0 if r.duration_seconds else None),
+    ('距离', 'km', lambda r: float(r.distance_meters) / 1000.0 if r.distance_meters else None),
+    ('配速', 'min/km', lambda r: r.pace_per_km),
+    ('均心', 'bpm', lambda r: r.avg_heart_rate),
+    ('最大心率', 'bpm', lambda r: r.max_heart_rate),
+    ('热量', 'kcal', lambda r: getattr(r, 'calories', None) or getattr(r, 'activity_calories', None)),
+]
+
+# 可选列: 至少一条记录有值时才输出
+OPTIONAL_COLUMNS: List[Column] = [
+    ('训练负荷', '', lambda r: getattr(r, 'training_load', None)),
+    ('有氧TE', '', lambda r: getattr(r, 'aerobic_training_effect', None)),
+    ('无氧TE', '', lambda r: getattr(r, 'anaerobic_training_effect', None)),
+    ('均功率', 'W', lambda r: getattr(r, 'avg_power_watts', None)),
+    ('步频', 'spm', lambda r: getattr(r, 'avg_cadence', None)),
+    ('心率漂移', '%', _hr_metric('cardiac_drift_pct')),
+    ('有氧解耦', '%', _hr_metric('decoupling_pct')),
+    ('TRIMP', '', _hr_metric('trimp')),
+]
+
+# 列名 -> 格式化函数
+_FORMATTERS: Dict[str, Callable[[Any], str]] = {
+    '时长': lambda v: _number(v, 1),
+    '距离': lambda v: _number(v, 2),
+    '配速': _pace,
+    '有氧TE': lambda v: _number(v, 1),
+    '无氧TE': lambda v: _number(v, 1),
+    '心率漂移': lambda v: _number(v, 1),
+    '有氧解耦': lambda v: _number(v, 1),
+    'TRIMP': lambda v: _number(v, 1),
+}
+
+
+def _format_value(name: str, value) -> str:
+    if value is None or value == '':
+        return ''
+    formatter = _FORMATTERS.get(name)
+    if formatter:
+        return formatter(value)
+    if isinstance(value, (int, float, Decimal)):
+        return _number(value)
+    return str(value).replace('|', '/')
+
+
+def _header(columns: Sequence[Column]) -> str:
+    return '|'.join(f"{name}({unit})" if unit else name for name, unit, _ in columns)
+
+
+def _encode_rows(records: Sequence[Any], columns: Sequence[Column]) -> List[str]:
+    return ['|'.join(_format_value(name, getter(r)) for name, _, getter in columns) for r in records]
+
+
+def _active_columns(records: Sequence[Any]) -> List[Column]:
+    columns = list(BASE_COLUMNS)
+    for column in OPTIONAL_COLUMNS:
+        getter = column[2]
+        if any(getter(r) is not None for r in records):
+            columns.append(column)
+    return columns
+
+
+def _week_key(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def _month_key(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _aggregate(records: Sequence[Any], key_func: Callable[[date], date], label: str) -> List[str]:
+    """按周期汇总记录，返回表头与各周期行"""
+    groups: Dict[date, List[Any]] = {}
+    for record in records:
+        start = _start_time(record)
+        if start is None:
+            continue
+        groups.setdefault(key_func(start.date()), []).append(record)
+
+    lines = [f"{label}|次数|总距离(km)|总时长(h)|平均配速(min/km)|平均心率(bpm)|最大心率(bpm)"]
+    for period, items in sorted(groups.items(), reverse=True):
+        distance = sum(float(r.distance_meters) for r in items if r.distance_meters)
+        duration = sum(r.duration_seconds for r in items if r.duration_seconds)
+        paced_duration = sum(r.duration_seconds for r in items if r.distance_meters and r.duration_seconds)
+        hrs = [r.avg_heart_rate for r in items if r.avg_heart_rate]
+        max_hrs = [r.max_heart_rate for r in items if r.max_heart_rate]
+        lines.append('|'.join([
+            period.isoformat(),
+            str(len(items)),
+            _number(distance / 1000.0, 2),
+            _number(duration / 3600.0, 2),
+            _pace(paced_duration / (distance / 1000.0)) if distance else '',
+            _number(sum(hrs) / len(hrs)) if hrs else '',
+            _number(max(max_hrs)) if max_hrs else '',
+        ]))
+    return lines
+
+
+def _sample_indices(total: int, count: int) -> List[int]:
+    """从total条中等间隔抽取count条(包含首尾)"""
+    if count >= total:
+        return list(range(total))
+    if count <= 0:
+        return []
+    if count == 1:
+        return [0]
+    step = (total - 1) / (count - 1)
+    return sorted({int(round(i * step)) for i in range(count)})
+
+
+def encode_training_records(records: Sequence[Any], token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """
+    将训练记录编码为紧凑表格
+
+    Args:
+        records: KeepTrainingRecord / GarminTrainingRecord 列表(按时间倒序)
+        token_budget: 估算token上限，超出时汇总并抽样
+
+    Returns:
+        编码后的文本，没有记录时返回空字符串
+    """
+    if not records:
+        return ''
+
+    columns = _active_columns(records)
+    header = _header(columns)
+    rows = _encode_rows(records, columns)
+    table = '\n'.join([header] + rows)
+    total_tokens = count_tokens(table)
+    if total_tokens <= token_budget:
+        return f"训练记录({len(records)}条,按时间倒序,空值表示无数据):\n{table}"
+
+    # 超出预算: 先汇总，汇总占用超过一半预算时改为按月
+    summary = _aggregate(records, _week_key, '周起始')
+    period_name = '周'
+    if count_tokens('\n'.join(summary)) > token_budget // 2:
+        summary = _aggregate(records, _month_key, '月份')
+        period_name = '月'
+    summary_text = '\n'.join(summary)
+
+    tokens_per_row = max(total_tokens / (len(rows) + 1), 1.0)
+    # 扣除汇总表、明细表头和两行说明文字后剩余的预算用于抽样明细
+    remaining = token_budget - count_tokens(summary_text) - count_tokens(header) - 50
+    indices = _sample_indices(len(rows), int(max(remaining, 0) / tokens_per_row))
+
+    parts = [f"训练记录共{len(records)}条,超出篇幅预算,按{period_name}汇总:", summary_text]
+    if indices:
+        parts.append(f"等间隔抽样明细({len(indices)}/{len(records)}条,按时间倒序,空值表示无数据):")
+        parts.append('\n'.join([header] + [rows[i] for i in indices]))
+    return '\n'.join(parts)
+
+
+def _flatten(prefix: str, value, lines: List[str]):
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else str(key), item, lines)
+    elif isinstance(value, (list, tuple)):
+        for i, item in enumerate(value):
+            _flatten(f"{prefix}[{i}]", item, lines)
+    elif value is not None:
+        if isinstance(value, (float, Decimal)):
+            value = round(float(value), 2)
+        lines.append(f"{prefix}: {value}")
+
+
+def encode_statistics(statistics: Optional[Dict[str, Any]]) -> str:
+    """将工具返回的statistics扁平化为 键: 值 行(跳过空值)"""
+    if not statistics:
+        return ''
+    lines: List[str] = []
+    _flatten('', statistics, lines)
+    return '\n'.join(lines)
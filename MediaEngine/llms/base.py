@@ -4,9 +4,7 @@ Unified OpenAI-compatible LLM client for the Media Engine, with retry support.
 
 import os
 import sys
-from typing import Any, Dict, Optional
-
-from openai import OpenAI
+from typing import Any, Dict, Iterator, Optional
 
 # Ensure project-level retry helper is importable
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -14,6 +12,11 @@ project_root = os.path.dirname(os.path.dirname(current_dir))
 utils_dir = os.path.join(project_root, "utils")
 if utils_dir not in sys.path:
     sys.path.append(utils_dir)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from utils.async_llm_client import AsyncLLMClient
+from utils.llm_cache import get_llm_cache
 
 try:
     from retry_helper import with_retry, LLM_RETRY_CONFIG
@@ -47,13 +50,10 @@ class LLMClient:
         except ValueError:
             self.timeout = 300.0
 
-        client_kwargs: Dict[str, Any] = {
-            "api_key": api_key,
-            "max_retries": 0,
-        }
-        if base_url:
-            client_kwargs["base_url"] = base_url
-        self.client = OpenAI(**client_kwargs)
+        # 进程内共享的异步客户端，同一Base URL复用连接池
+        self.client = AsyncLLMClient.shared(api_key=api_key, base_url=base_url)
+        # 可选的响应缓存(LLM_CACHE_ENABLED开启)，未开启时为None
+        self.cache = get_llm_cache()
 
     @with_retry(LLM_RETRY_CONFIG)
     def invoke(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
@@ -62,21 +62,70 @@ class LLMClient:
             {"role": "user", "content": user_prompt},
         ]
 
-        allowed_keys = {"temperature", "top_p", "presence_penalty", "frequency_penalty", "stream"}
+        allowed_keys = {"temperature", "top_p", "presence_penalty", "frequency_penalty"}
         extra_params = {key: value for key, value in kwargs.items() if key in allowed_keys and value is not None}
 
         timeout = kwargs.pop("timeout", self.timeout)
 
-        response = self.client.chat.completions.create(
+        cache_key = self._cache_key(system_prompt, user_prompt, extra_params)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        content = self.client.complete(
             model=self.model_name,
             messages=messages,
             timeout=timeout,
             **extra_params,
         )
+        result = self.validate_response(content)
+        if cache_key and result:
+            self.cache.set(cache_key, result, model=self.model_name)
+        return result
+
+    def invoke_stream(self, system_prompt: str, user_prompt: str, **kwargs) -> Iterator[str]:
+        """
+        流式调用LLM，逐段产出增量文本
+
+        流式调用不做自动重试，失败时由调用方决定是否回退到invoke()。
+        """
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ]
 
-        if response.choices and response.choices[0].message:
-            return self.validate_response(response.choices[0].message.content)
-        return ""
+        allowed_keys = {"temperature", "top_p", "presence_penalty", "frequency_penalty"}
+        extra_params = {key: value for key, value in kwargs.items() if key in allowed_keys and value is not None}
+
+        timeout = kwargs.pop("timeout", self.timeout)
+
+        cache_key = self._cache_key(system_prompt, user_prompt, extra_params)
+        if cache_key:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        for delta in self.client.stream(
+            model=self.model_name,
+            messages=messages,
+            timeout=timeout,
+            **extra_params,
+        ):
+            chunks.append(delta)
+            yield delta
+
+        result = self.validate_response("".join(chunks))
+        if cache_key and result:
+            self.cache.set(cache_key, result, model=self.model_name)
+
+    def _cache_key(self, system_prompt: str, user_prompt: str, params: Dict[str, Any]) -> Optional[str]:
+        """未启用缓存时返回None"""
+        if self.cache is None:
+            return None
+        return self.cache.make_key(self.model_name, system_prompt, user_prompt, params)
 
     @staticmethod
     def validate_response(response: Optional[str]) -> str:
@@ -68,9 +68,10 @@ class ReportFormattingNode(BaseNode):
             self.log_info("正在格式化最终报告")
             
             # 调用LLM生成Markdown格式
-            response = self.llm_client.invoke(
+            response = self.invoke_llm_streaming(
                 SYSTEM_PROMPT_REPORT_FORMATTING,
                 message,
+                stream_callback=kwargs.get("stream_callback"),
             )
             
             # 处理响应
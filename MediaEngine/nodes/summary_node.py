@@ -4,7 +4,7 @@
 """
 
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 from json.decoder import JSONDecodeError
 
 from .base_node import StateMutationNode
@@ -29,6 +29,21 @@ except ImportError:
     FORUM_READER_AVAILABLE = False
     print("警告: 无法导入forum_reader模块，将跳过HOST发言读取功能")
 
+# 导入提示词token预算工具
+try:
+    from utils.prompt_budget import fit_prompt_budget, count_tokens
+    PROMPT_BUDGET_AVAILABLE = True
+except ImportError:
+    PROMPT_BUDGET_AVAILABLE = False
+    print("警告: 无法导入prompt_budget模块，总结提示词将不做token预算裁剪")
+
+
+def _budget_suffix(budget_report) -> str:
+    """段落更新日志中附带的提示词token数"""
+    if budget_report is None or budget_report.message_tokens is None:
+        return ""
+    return f"(提示词{budget_report.message_tokens}/{budget_report.budget} token)"
+
 
 class FirstSummaryNode(StateMutationNode):
     """根据搜索结果生成段落首次总结的节点"""
@@ -67,6 +82,21 @@ class FirstSummaryNode(StateMutationNode):
         Returns:
             段落总结内容
         """
+        summary, _ = self.run_with_budget(input_data, **kwargs)
+        return summary
+    
+    def run_with_budget(self, input_data: Any, **kwargs) -> Tuple[str, Optional[Any]]:
+        """
+        调用LLM生成段落总结
+        
+        Args:
+            input_data: 包含title、content、search_query和search_results的数据
+            **kwargs: 额外参数
+            
+        Returns:
+            (段落总结内容, 提示词预算分配报告PromptBudgetReport；prompt_budget不可用时为None)
+            预算报告随结果返回而不保存在节点上，多个段落并发共用同一节点时互不覆盖
+        """
         try:
             if not self.validate_input(input_data):
                 raise ValueError("输入数据格式错误")
@@ -88,6 +118,11 @@ class FirstSummaryNode(StateMutationNode):
                 except Exception as e:
                     self.log_info(f"读取HOST发言失败: {str(e)}")
             
+            # 按token预算裁剪搜索结果、HOST发言和上一轮总结
+            budget_report = None
+            if PROMPT_BUDGET_AVAILABLE and isinstance(data, dict):
+                data, budget_report = fit_prompt_budget(data)
+
             # 转换为JSON字符串
             message = json.dumps(data, ensure_ascii=False)
             
@@ -96,19 +131,26 @@ class FirstSummaryNode(StateMutationNode):
                 formatted_host = format_host_speech_for_prompt(data['host_speech'])
                 message = formatted_host + "\n" + message
             
+            # 记录实际发送的token数
+            if budget_report is not None:
+                budget_report.message_tokens = count_tokens(message)
+                self.log_info(budget_report.describe())
+            
             self.log_info("正在生成首次段落总结")
             
             # 调用LLM生成总结
-            response = self.llm_client.invoke(
+            response = self.invoke_llm_streaming(
                 SYSTEM_PROMPT_FIRST_SUMMARY,
                 message,
+                stream_callback=kwargs.get("stream_callback"),
             )
             
             # 处理响应
             processed_response = self.process_output(response)
             
             self.log_info("成功生成首次段落总结")
-            return processed_response
+            self.publish_summary(processed_response, data.get("title", "") if isinstance(data, dict) else "")
+            return processed_response, budget_report
             
         except Exception as e:
             self.log_error(f"生成首次总结失败: {str(e)}")
@@ -181,12 +223,12 @@ class FirstSummaryNode(StateMutationNode):
         """
         try:
             # 生成总结
-            summary = self.run(input_data, **kwargs)
+            summary, budget_report = self.run_with_budget(input_data, **kwargs)
             
             # 更新状态
             if 0 <= paragraph_index < len(state.paragraphs):
                 state.paragraphs[paragraph_index].research.latest_summary = summary
-                self.log_info(f"已更新段落 {paragraph_index} 的首次总结")
+                self.log_info(f"已更新段落 {paragraph_index} 的首次总结{_budget_suffix(budget_report)}")
             else:
                 raise ValueError(f"段落索引 {paragraph_index} 超出范围")
             
@@ -235,6 +277,21 @@ class ReflectionSummaryNode(StateMutationNode):
         Returns:
             更新后的段落内容
         """
+        updated_summary, _ = self.run_with_budget(input_data, **kwargs)
+        return updated_summary
+    
+    def run_with_budget(self, input_data: Any, **kwargs) -> Tuple[str, Optional[Any]]:
+        """
+        调用LLM更新段落内容
+        
+        Args:
+            input_data: 包含完整反思信息的数据
+            **kwargs: 额外参数
+            
+        Returns:
+            (更新后的段落内容, 提示词预算分配报告PromptBudgetReport；prompt_budget不可用时为None)
+            预算报告随结果返回而不保存在节点上，多个段落并发共用同一节点时互不覆盖
+        """
         try:
             if not self.validate_input(input_data):
                 raise ValueError("输入数据格式错误")
@@ -256,6 +313,11 @@ class ReflectionSummaryNode(StateMutationNode):
                 except Exception as e:
                     self.log_info(f"读取HOST发言失败: {str(e)}")
             
+            # 按token预算裁剪搜索结果、HOST发言和上一轮总结
+            budget_report = None
+            if PROMPT_BUDGET_AVAILABLE and isinstance(data, dict):
+                data, budget_report = fit_prompt_budget(data)
+
             # 转换为JSON字符串
             message = json.dumps(data, ensure_ascii=False)
             
@@ -264,19 +326,26 @@ class ReflectionSummaryNode(StateMutationNode):
                 formatted_host = format_host_speech_for_prompt(data['host_speech'])
                 message = formatted_host + "\n" + message
             
+            # 记录实际发送的token数
+            if budget_report is not None:
+                budget_report.message_tokens = count_tokens(message)
+                self.log_info(budget_report.describe())
+            
             self.log_info("正在生成反思总结")
             
             # 调用LLM生成总结
-            response = self.llm_client.invoke(
+            response = self.invoke_llm_streaming(
                 SYSTEM_PROMPT_REFLECTION_SUMMARY,
                 message,
+                stream_callback=kwargs.get("stream_callback"),
             )
             
             # 处理响应
             processed_response = self.process_output(response)
             
             self.log_info("成功生成反思总结")
-            return processed_response
+            self.publish_summary(processed_response, data.get("title", "") if isinstance(data, dict) else "")
+            return processed_response, budget_report
             
         except Exception as e:
             self.log_error(f"生成反思总结失败: {str(e)}")
@@ -349,13 +418,13 @@ class ReflectionSummaryNode(StateMutationNode):
         """
         try:
             # 生成更新后的总结
-            updated_summary = self.run(input_data, **kwargs)
+            updated_summary, budget_report = self.run_with_budget(input_data, **kwargs)
             
             # 更新状态
             if 0 <= paragraph_index < len(state.paragraphs):
                 state.paragraphs[paragraph_index].research.latest_summary = updated_summary
                 state.paragraphs[paragraph_index].research.increment_reflection()
-                self.log_info(f"已更新段落 {paragraph_index} 的反思总结")
+                self.log_info(f"已更新段落 {paragraph_index} 的反思总结{_budget_suffix(budget_report)}")
             else:
                 raise ValueError(f"段落索引 {paragraph_index} 超出范围")
             
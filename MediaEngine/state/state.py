@@ -6,6 +6,9 @@ Deep Search Agent状态管理
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 import json
+import os
+import tempfile
+import threading
 from datetime import datetime
 
 
@@ -18,6 +21,7 @@ class Search:
     content: str = ""                  # 搜索返回的内容
     score: Optional[float] = None      # 相关度评分
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    search_round: Optional[int] = None # 产生该结果的搜索轮次: 0为初始搜索，n为第n次反思(旧检查点中为None)
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
@@ -27,7 +31,8 @@ class Search:
             "title": self.title,
             "content": self.content,
             "score": self.score,
-            "timestamp": self.timestamp
+            "timestamp": self.timestamp,
+            "search_round": self.search_round
         }
     
     @classmethod
@@ -39,7 +44,8 @@ class Search:
             title=data.get("title", ""),
             content=data.get("content", ""),
             score=data.get("score"),
-            timestamp=data.get("timestamp", datetime.now().isoformat())
+            timestamp=data.get("timestamp", datetime.now().isoformat()),
+            search_round=data.get("search_round")
         )
 
 
@@ -55,17 +61,31 @@ class Research:
         """添加搜索记录"""
         self.search_history.append(search)
     
-    def add_search_results(self, query: str, results: List[Dict[str, Any]]):
-        """批量添加搜索结果"""
-        for result in results:
-            search = Search(
+    def add_search_results(self, query: str, results: List[Dict[str, Any]], search_round: Optional[int] = None):
+        """
+        批量添加搜索结果
+        
+        指定search_round时先移除该轮次已有的记录: 反思次数在总结完成后才推进，
+        并发段落写入的检查点可能已包含本轮搜索结果，断点续跑重做这一轮时替换而不是重复追加
+        """
+        searches = [
+            Search(
                 query=query,
                 url=result.get("url", ""),
                 title=result.get("title", ""),
                 content=result.get("content", ""),
-                score=result.get("score")
+                score=result.get("score"),
+                search_round=search_round
             )
-            self.add_search(search)
+            for result in results
+        ]
+        if search_round is None:
+            self.search_history.extend(searches)
+        else:
+            # 整体替换列表，其他线程序列化检查点时读到的是完整的旧列表或新列表
+            self.search_history = [
+                search for search in self.search_history if search.search_round != search_round
+            ] + searches
     
     def get_search_count(self) -> int:
         """获取搜索次数"""
@@ -149,6 +169,8 @@ class State:
     is_completed: bool = False                                     # 是否完成
     created_at: str = field(default_factory=lambda: datetime.now().isoformat())
     updated_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    # 并发处理段落时保护状态写入与序列化的锁（不参与序列化）
+    lock: threading.RLock = field(default_factory=threading.RLock, repr=False, compare=False)
     
     def add_paragraph(self, title: str, content: str) -> int:
         """
@@ -192,7 +214,8 @@ class State:
     
     def update_timestamp(self):
         """更新时间戳"""
-        self.updated_at = datetime.now().isoformat()
+        with self.lock:
+            self.updated_at = datetime.now().isoformat()
     
     def get_progress_summary(self) -> Dict[str, Any]:
         """获取进度摘要"""
@@ -210,6 +233,11 @@ class State:
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典格式"""
+        with self.lock:
+            return self._to_dict_unlocked()
+
+    def _to_dict_unlocked(self) -> Dict[str, Any]:
+        """转换为字典格式（调用方需持有lock）"""
         return {
             "query": self.query,
             "report_title": self.report_title,
@@ -246,9 +274,19 @@ class State:
         return cls.from_dict(data)
     
     def save_to_file(self, filepath: str):
-        """保存状态到文件"""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(self.to_json())
+        """保存状态到文件(先写临时文件再原子替换，写入中途崩溃不会损坏已有文件)"""
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, tmp_path = tempfile.mkstemp(prefix=".state_", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(self.to_json())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
     
     @classmethod
     def load_from_file(cls, filepath: str) -> "State":
@@ -41,6 +41,7 @@ class Config:
     max_content_length: int = 20000
     max_reflections: int = 2
     max_paragraphs: int = 5
+    paragraph_concurrency: int = 1  # 段落并发数, 1表示串行处理
 
     output_dir: str = "reports"
     save_intermediate_states: bool = True
@@ -84,6 +85,7 @@ class Config:
                 max_content_length=int(_get_value(config_module, "SEARCH_CONTENT_MAX_LENGTH", 20000)),
                 max_reflections=int(_get_value(config_module, "MAX_REFLECTIONS", 2)),
                 max_paragraphs=int(_get_value(config_module, "MAX_PARAGRAPHS", 5)),
+                paragraph_concurrency=int(_get_value(config_module, "PARAGRAPH_CONCURRENCY", 1)),
                 output_dir=_get_value(config_module, "OUTPUT_DIR", "reports"),
                 save_intermediate_states=str(
                     _get_value(config_module, "SAVE_INTERMEDIATE_STATES", "true")
@@ -114,6 +116,7 @@ class Config:
             max_content_length=int(_get_value(config_dict, "SEARCH_CONTENT_MAX_LENGTH", 20000)),
             max_reflections=int(_get_value(config_dict, "MAX_REFLECTIONS", 2)),
             max_paragraphs=int(_get_value(config_dict, "MAX_PARAGRAPHS", 5)),
+            paragraph_concurrency=int(_get_value(config_dict, "PARAGRAPH_CONCURRENCY", 1)),
             output_dir=_get_value(config_dict, "OUTPUT_DIR", "reports"),
             save_intermediate_states=str(
                 _get_value(config_dict, "SAVE_INTERMEDIATE_STATES", "true")
@@ -150,6 +153,7 @@ def print_config(config: Config):
     print(f"最长内容长度: {config.max_content_length}")
     print(f"最大反思次数: {config.max_reflections}")
     print(f"最大段落数: {config.max_paragraphs}")
+    print(f"段落并发数: {config.paragraph_concurrency}")
     print(f"输出目录: {config.output_dir}")
     print(f"保存中间状态: {config.save_intermediate_states}")
     print(f"LLM API Key: {'已配置' if config.llm_api_key else '未配置'}")
@@ -5,8 +5,9 @@ Theory Expert Agent主类
 
 import json
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Callable
 
 from .llms import LLMClient
 from .nodes import (
@@ -52,6 +53,12 @@ class TheoryExpertAgent:
         # 状态
         self.state = State()
 
+        # 流式输出回调: (段落索引, 增量文本)，最终报告的段落索引为None
+        self.stream_callback: Optional[Callable[[Optional[int], str], None]] = None
+
+        # 状态检查点文件路径，生成报告结构或从检查点恢复时设置
+        self.checkpoint_path: Optional[str] = None
+
         # 确保输出目录存在
         os.makedirs(self.config.output_dir, exist_ok=True)
 
@@ -59,6 +66,13 @@ class TheoryExpertAgent:
         print(f"使用LLM: {self.llm_client.get_model_info()}")
         print(f"搜索工具: TavilyNewsAgency (深度理论搜索)")
 
+    def _stream_callback_for(self, paragraph_index: Optional[int]) -> Optional[Callable[[str], None]]:
+        """将stream_callback绑定到指定段落，供节点流式输出时回调"""
+        if self.stream_callback is None:
+            return None
+        callback = self.stream_callback
+        return lambda delta: callback(paragraph_index, delta)
+
     def _initialize_llm(self) -> LLMClient:
         """初始化LLM客户端"""
         return LLMClient(
@@ -88,13 +102,14 @@ class TheoryExpertAgent:
         print(f"  → 执行深度理论搜索")
         return self.search_agency.deep_search_news(query)
 
-    def research(self, query: str, save_report: bool = True) -> str:
+    def research(self, query: str, save_report: bool = True, resume_from: Optional[str] = None) -> str:
         """
         执行理论研究(中长跑运动科学理论专家)
 
         Args:
             query: 研究查询
             save_report: 是否保存报告到文件
+            resume_from: 检查点文件路径，提供时从该状态继续，跳过已完成的段落与反思
 
         Returns:
             最终理论分析报告内容
@@ -104,14 +119,21 @@ class TheoryExpertAgent:
         print(f"{'='*60}")
 
         try:
+            if resume_from:
+                self._resume_from_checkpoint(resume_from)
+
             # Step 1: 生成报告结构
-            self._generate_report_structure(query)
+            if not (resume_from and self.state.paragraphs):
+                self._generate_report_structure(query)
 
             # Step 2: 处理每个段落
             self._process_paragraphs()
 
             # Step 3: 生成最终报告
-            final_report = self._generate_final_report()
+            if resume_from and self.state.is_completed and self.state.final_report:
+                final_report = self.state.final_report
+            else:
+                final_report = self._generate_final_report()
 
             # Step 4: 保存报告
             if save_report:
@@ -136,34 +158,83 @@ class TheoryExpertAgent:
 
         # 生成结构并更新状态
         self.state = report_structure_node.mutate_state(state=self.state)
+        self.checkpoint_path = self._new_checkpoint_path(query)
+        self._checkpoint()
 
         print(f"报告结构已生成,共 {len(self.state.paragraphs)} 个段落:")
         for i, paragraph in enumerate(self.state.paragraphs, 1):
             print(f"  {i}. {paragraph.title}")
 
-    def _process_paragraphs(self):
-        """处理所有段落"""
-        total_paragraphs = len(self.state.paragraphs)
+    def _process_paragraphs(self, progress_callback: Optional[Callable[[int, int, int], None]] = None):
+        """
+        处理所有段落
 
-        for i in range(total_paragraphs):
-            print(f"\n[步骤 2.{i+1}] 处理段落: {self.state.paragraphs[i].title}")
-            print("-" * 50)
+        paragraph_concurrency > 1 时各段落在线程池中并行处理,
+        段落顺序由state.paragraphs的索引决定,与完成先后无关
 
-            # 初始搜索和总结
-            self._initial_search_and_summary(i)
+        Args:
+            progress_callback: 每个段落完成后在调用线程中回调 (段落索引, 已完成数, 总数)
+        """
+        total_paragraphs = len(self.state.paragraphs)
+        concurrency = max(1, min(self.config.paragraph_concurrency, total_paragraphs))
 
-            # 反思循环
-            self._reflection_loop(i)
+        if concurrency == 1:
+            for i in range(total_paragraphs):
+                self._process_single_paragraph(i)
 
-            # 标记段落完成
-            self.state.paragraphs[i].research.mark_completed()
+                progress = (i + 1) / total_paragraphs * 100
+                print(f"段落处理完成 ({progress:.1f}%)")
+                if progress_callback:
+                    progress_callback(i, i + 1, total_paragraphs)
+            return
 
-            progress = (i + 1) / total_paragraphs * 100
-            print(f"段落处理完成 ({progress:.1f}%)")
+        print(f"\n[步骤 2] 并行处理 {total_paragraphs} 个段落 (并发数: {concurrency})")
+        executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="query-paragraph")
+        try:
+            futures = {
+                executor.submit(self._process_single_paragraph, i): i
+                for i in range(total_paragraphs)
+            }
+            completed = 0
+            for future in as_completed(futures):
+                i = futures[future]
+                future.result()
+                completed += 1
+
+                progress = completed / total_paragraphs * 100
+                print(f"段落 {i+1} 处理完成 ({progress:.1f}%)")
+                if progress_callback:
+                    progress_callback(i, completed, total_paragraphs)
+        finally:
+            # 任一段落失败时取消尚未开始的段落
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _process_single_paragraph(self, paragraph_index: int):
+        """处理单个段落: 初始搜索总结 + 反思循环"""
+        if self.state.paragraphs[paragraph_index].is_completed():
+            print(f"\n[步骤 2.{paragraph_index+1}] 检查点中已完成，跳过: {self.state.paragraphs[paragraph_index].title}")
+            return
+
+        print(f"\n[步骤 2.{paragraph_index+1}] 处理段落: {self.state.paragraphs[paragraph_index].title}")
+        print("-" * 50)
+
+        # 初始搜索和总结
+        self._initial_search_and_summary(paragraph_index)
+
+        # 反思循环
+        self._reflection_loop(paragraph_index)
+
+        # 标记段落完成
+        with self.state.lock:
+            self.state.paragraphs[paragraph_index].research.mark_completed()
+        self._checkpoint()
 
     def _initial_search_and_summary(self, paragraph_index: int):
         """执行初始搜索和总结"""
         paragraph = self.state.paragraphs[paragraph_index]
+        if paragraph.research.latest_summary:
+            print("  - 检查点中已有初始总结，跳过")
+            return
 
         # 准备搜索输入
         search_input = {
@@ -208,7 +279,7 @@ class TheoryExpertAgent:
             print("  - 未找到搜索结果")
 
         # 更新状态中的搜索历史
-        paragraph.research.add_search_results(search_query, search_results)
+        paragraph.research.add_search_results(search_query, search_results, search_round=0)
 
         # 生成初始总结
         print("  - 生成初始总结...")
@@ -223,16 +294,18 @@ class TheoryExpertAgent:
 
         # 更新状态
         self.state = self.first_summary_node.mutate_state(
-            summary_input, self.state, paragraph_index
+            summary_input, self.state, paragraph_index,
+            stream_callback=self._stream_callback_for(paragraph_index),
         )
 
         print("  - 初始总结完成")
+        self._checkpoint()
 
     def _reflection_loop(self, paragraph_index: int):
         """执行反思循环"""
         paragraph = self.state.paragraphs[paragraph_index]
 
-        for reflection_i in range(self.config.max_reflections):
+        for reflection_i in range(paragraph.research.reflection_iteration, self.config.max_reflections):
             print(f"  - 反思 {reflection_i + 1}/{self.config.max_reflections}...")
 
             # 准备反思输入
@@ -276,7 +349,7 @@ class TheoryExpertAgent:
                 print("    未找到反思搜索结果")
 
             # 更新搜索历史
-            paragraph.research.add_search_results(search_query, search_results)
+            paragraph.research.add_search_results(search_query, search_results, search_round=reflection_i + 1)
 
             # 生成反思总结
             reflection_summary_input = {
@@ -291,10 +364,12 @@ class TheoryExpertAgent:
 
             # 更新状态
             self.state = self.reflection_summary_node.mutate_state(
-                reflection_summary_input, self.state, paragraph_index
+                reflection_summary_input, self.state, paragraph_index,
+                stream_callback=self._stream_callback_for(paragraph_index),
             )
 
             print(f"    反思 {reflection_i + 1} 完成")
+            self._checkpoint()
 
     def _generate_final_report(self) -> str:
         """生成最终报告"""
@@ -310,7 +385,9 @@ class TheoryExpertAgent:
 
         # 格式化报告
         try:
-            final_report = self.report_formatting_node.run(report_data)
+            final_report = self.report_formatting_node.run(
+                report_data, stream_callback=self._stream_callback_for(None)
+            )
         except Exception as e:
             print(f"LLM格式化失败,使用备用方法: {str(e)}")
             final_report = self.report_formatting_node.format_report_manually(
@@ -320,6 +397,7 @@ class TheoryExpertAgent:
         # 更新状态
         self.state.final_report = final_report
         self.state.mark_completed()
+        self._checkpoint()
 
         print("最终报告生成完成")
         return final_report
@@ -328,8 +406,7 @@ class TheoryExpertAgent:
         """保存报告到文件"""
         # 生成文件名
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        query_safe = "".join(c for c in self.state.query if c.isalnum() or c in (' ', '-', '_')).rstrip()
-        query_safe = query_safe.replace(' ', '_')[:30]
+        query_safe = self._safe_filename(self.state.query)
 
         filename = f"deep_search_report_{query_safe}_{timestamp}.md"
         filepath = os.path.join(self.config.output_dir, filename)
@@ -347,6 +424,38 @@ class TheoryExpertAgent:
             self.state.save_to_file(state_filepath)
             print(f"状态已保存到: {state_filepath}")
 
+    @staticmethod
+    def _safe_filename(query: str) -> str:
+        """将查询转换为可用于文件名的片段"""
+        query_safe = "".join(c for c in query if c.isalnum() or c in (' ', '-', '_')).rstrip()
+        return query_safe.replace(' ', '_')[:30]
+
+    def _new_checkpoint_path(self, query: str) -> str:
+        """为新的研究任务生成检查点文件路径"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        return os.path.join(self.config.output_dir, f"checkpoint_{self._safe_filename(query)}_{timestamp}.json")
+
+    def _checkpoint(self):
+        """
+        原子写入状态检查点(save_intermediate_states开启时)
+
+        磁盘写入失败(OSError)只告警不中断研究；序列化错误说明状态本身有问题，直接抛出
+        """
+        if not self.config.save_intermediate_states or not self.checkpoint_path:
+            return
+        try:
+            with self.state.lock:
+                self.state.save_to_file(self.checkpoint_path)
+        except OSError as e:
+            print(f"保存检查点失败: {str(e)}")
+
+    def _resume_from_checkpoint(self, filepath: str):
+        """从检查点加载状态，之后的检查点继续写入同一文件"""
+        self.state = State.load_from_file(filepath)
+        self.checkpoint_path = filepath
+        print(f"已从检查点恢复: {filepath} "
+              f"(已完成段落 {self.state.get_completed_paragraphs_count()}/{len(self.state.paragraphs)})")
+
     def get_progress_summary(self) -> Dict[str, Any]:
         """获取进度摘要"""
         return self.state.get_progress_summary()
@@ -41,6 +41,7 @@ class Config:
     max_content_length: int = 20000
     max_reflections: int = 2
     max_paragraphs: int = 5
+    paragraph_concurrency: int = 1  # 段落并发数, 1表示串行处理
     max_search_results: int = 20
 
     output_dir: str = "reports"
@@ -80,6 +81,7 @@ class Config:
                 max_content_length=int(_get_value(config_module, "SEARCH_CONTENT_MAX_LENGTH", 20000)),
                 max_reflections=int(_get_value(config_module, "MAX_REFLECTIONS", 2)),
                 max_paragraphs=int(_get_value(config_module, "MAX_PARAGRAPHS", 5)),
+                paragraph_concurrency=int(_get_value(config_module, "PARAGRAPH_CONCURRENCY", 1)),
                 max_search_results=int(_get_value(config_module, "MAX_SEARCH_RESULTS", 20)),
                 output_dir=_get_value(config_module, "OUTPUT_DIR", "reports"),
                 save_intermediate_states=str(
@@ -106,6 +108,7 @@ class Config:
             max_content_length=int(_get_value(config_dict, "SEARCH_CONTENT_MAX_LENGTH", 20000)),
             max_reflections=int(_get_value(config_dict, "MAX_REFLECTIONS", 2)),
             max_paragraphs=int(_get_value(config_dict, "MAX_PARAGRAPHS", 5)),
+            paragraph_concurrency=int(_get_value(config_dict, "PARAGRAPH_CONCURRENCY", 1)),
             max_search_results=int(_get_value(config_dict, "MAX_SEARCH_RESULTS", 20)),
             output_dir=_get_value(config_dict, "OUTPUT_DIR", "reports"),
             save_intermediate_states=str(
@@ -143,6 +146,7 @@ def print_config(config: Config):
     print(f"最长内容长度: {config.max_content_length}")
     print(f"最大反思次数: {config.max_reflections}")
     print(f"最大段落数: {config.max_paragraphs}")
+    print(f"段落并发数: {config.paragraph_concurrency}")
     print(f"最大搜索结果数: {config.max_search_results}")
     print(f"输出目录: {config.output_dir}")
     print(f"保存中间状态: {config.save_intermediate_states}")
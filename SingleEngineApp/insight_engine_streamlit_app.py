@@ -6,7 +6,9 @@ Streamlit Web界面
 
 import os
 import sys
+import threading
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from datetime import datetime
 import json
 import locale
@@ -199,6 +201,7 @@ def main():
     # 默认高级配置
     max_reflections = 2
     max_content_length = 500000  # Kimi支持长文本
+    paragraph_concurrency = int(os.getenv("PARAGRAPH_CONCURRENCY", "1"))  # >1 时并行处理段落
 
     # 简化的研究查询展示区域
     
@@ -249,6 +252,7 @@ def main():
             db_charset=snapshot.DB_CHARSET,
             max_reflections=max_reflections,
             max_content_length=max_content_length,
+            paragraph_concurrency=paragraph_concurrency,
             output_dir="insight_engine_streamlit_reports"
         )
 
@@ -262,6 +266,7 @@ def execute_research(query: str, config: Config):
         # 创建进度条
         progress_bar = st.progress(0)
         status_text = st.empty()
+        stream_preview = st.empty()
 
         # 初始化Sports Scientist Agent
         status_text.markdown("**正在初始化运动科学分析引擎...**")
@@ -277,24 +282,42 @@ def execute_research(query: str, config: Config):
 
         # 处理数据分析模块
         total_paragraphs = len(agent.state.paragraphs)
-        for i in range(total_paragraphs):
-            status_text.markdown(f"**量化分析 {i + 1}/{total_paragraphs}:** {agent.state.paragraphs[i].title}")
-
-            # 数据查询和量化分析
-            agent._initial_search_and_summary(i)
-            progress_value = 20 + (i + 0.5) / total_paragraphs * 60
-            progress_bar.progress(int(progress_value))
-
-            # 数据验证循环
-            agent._reflection_loop(i)
-            agent.state.paragraphs[i].research.mark_completed()
-
-            progress_value = 20 + (i + 1) / total_paragraphs * 60
-            progress_bar.progress(int(progress_value))
+        status_text.markdown(f"**量化分析 0/{total_paragraphs}**")
+
+        def on_paragraph_done(index: int, completed: int, total: int):
+            status_text.markdown(f"**量化分析 {completed}/{total}:** {agent.state.paragraphs[index].title}")
+            progress_bar.progress(int(20 + completed / total * 60))
+
+        # 流式预览: 段落并发时回调来自工作线程，需要挂载脚本上下文后才能更新界面
+        script_ctx = get_script_run_ctx()
+        stream_lock = threading.Lock()
+        stream_buffers = {}
+        rendered_lengths = {}
+
+        def on_stream(index, delta):
+            with stream_lock:
+                if delta is None:
+                    # 流式调用中途失败(STREAM_RESET): 丢弃已预览的半截输出，随后会收到回退调用的完整结果
+                    stream_buffers[index] = ""
+                    rendered_lengths[index] = 0
+                    return
+                buffer = stream_buffers.get(index, "") + delta
+                stream_buffers[index] = buffer
+                # 每累计约40个字符刷新一次，避免逐token重绘
+                if len(buffer) - rendered_lengths.get(index, 0) < 40:
+                    return
+                rendered_lengths[index] = len(buffer)
+                add_script_run_ctx(threading.current_thread(), script_ctx)
+                label = "最终报告" if index is None else agent.state.paragraphs[index].title
+                stream_preview.text(f"[{label}] ...{buffer[-500:]}")
+
+        agent.stream_callback = on_stream
+        agent._process_paragraphs(progress_callback=on_paragraph_done)
 
         # 生成科学分析报告
         status_text.markdown("**正在生成科学分析报告...**")
         final_report = agent._generate_final_report()
+        stream_preview.empty()
         progress_bar.progress(90)
 
         # 保存报告
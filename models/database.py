@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+数据库引擎注册表
+
+Flask路由、导入脚本和InsightEngine查询工具共用同一个注册表:
+- 每个连接URL(DSN)在进程内只保留一个带连接池的引擎，重复调用get_engine()不会再创建新的连接池
+- get_engine()每次按当前config.py拼出URL，数据库配置变化时释放旧连接池并按新配置重建
+- pool_status()返回各连接池的签出数、溢出数以及签出连接的等待次数与耗时
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+POOL_SIZE = 5  # 常驻连接数
+MAX_OVERFLOW = 10  # 连接池满时允许额外创建的连接数
+POOL_TIMEOUT = 30  # 签出连接的最长等待时间(秒)
+POOL_RECYCLE = 3600  # 1小时回收连接
+SLOW_CHECKOUT_SECONDS = 0.01  # 签出耗时超过该值计为一次等待
+
+
+def get_database_config() -> Dict[str, Any]:
+    """读取当前数据库配置(优先config.py，无法导入时从环境变量读取)"""
+    try:
+        import config
+        return {
+            'host': getattr(config, 'DB_HOST', 'localhost'),
+            'port': int(getattr(config, 'DB_PORT', 3306)),
+            'user': getattr(config, 'DB_USER', ''),
+            'password': getattr(config, 'DB_PASSWORD', ''),
+            'name': getattr(config, 'DB_NAME', ''),
+            'charset': getattr(config, 'DB_CHARSET', 'utf8mb4'),
+        }
+    except ImportError:
+        return {
+            'host': os.getenv('DB_HOST', 'localhost'),
+            'port': int(os.getenv('DB_PORT', 3306)),
+            'user': os.getenv('DB_USER', ''),
+            'password': os.getenv('DB_PASSWORD', ''),
+            'name': os.getenv('DB_NAME', ''),
+            'charset': os.getenv('DB_CHARSET', 'utf8mb4'),
+        }
+
+
+def build_database_url(db_config: Optional[Dict[str, Any]] = None) -> URL:
+    """按数据库配置构建pymysql连接URL(用户名和密码中的特殊字符会被正确转义)"""
+    db_config = db_config or get_database_config()
+    return URL.create(
+        'mysql+pymysql',
+        username=db_config['user'],
+        password=db_config['password'],
+        host=db_config['host'],
+        port=db_config['port'],
+        database=db_config['name'],
+        query={'charset': db_config['charset']},
+    )
+
+
+class PoolWaitStats:
+    """连接签出等待统计(线程安全)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.waits = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            if timed_out:
+                self.timeouts += 1
+            if seconds >= SLOW_CHECKOUT_SECONDS or timed_out:
+                self.waits += 1
+                self.total_wait += seconds
+                self.max_wait = max(self.max_wait, seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'timeouts': self.timeouts,
+                'avg_wait_ms': round(self.total_wait / self.waits * 1000, 2) if self.waits else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+            }
+
+
+class MeteredQueuePool(QueuePool):
+    """记录每次签出连接耗时的QueuePool(连接池满时的排队等待会体现在耗时中)"""
+
+    @property
+    def wait_stats(self) -> PoolWaitStats:
+        stats = self.__dict__.get('_wait_stats')
+        if stats is None:
+            stats = self.__dict__.setdefault('_wait_stats', PoolWaitStats())
+        return stats
+
+    def _do_get(self):
+        began = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.wait_stats.record(time.perf_counter() - began, timed_out=True)
+            raise
+        self.wait_stats.record(time.perf_counter() - began)
+        return connection
+
+
+class EngineRegistry:
+    """按DSN缓存引擎和会话工厂"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines: Dict[str, Any] = {}
+        self._sessionmakers: Dict[str, sessionmaker] = {}
+        self._config_key: Optional[str] = None
+
+    @staticmethod
+    def _key(url) -> str:
+        return url.render_as_string(hide_password=False) if isinstance(url, URL) else str(url)
+
+    def get_engine(self, url=None):
+        """
+        获取引擎
+
+        Args:
+            url: 连接URL，为None时使用config.py中的数据库配置；
+                 配置对应的URL变化时，释放上一次配置的连接池
+
+        Returns:
+            Engine: 该URL对应的唯一引擎
+        """
+        from_config = url is None
+        if from_config:
+            url = build_database_url()
+        key = self._key(url)
+
+        with self._lock:
+            if from_config and self._config_key not in (None, key):
+                stale = self._engines.pop(self._config_key, None)
+                self._sessionmakers.pop(self._config_key, None)
+                if stale is not None:
+                    stale.dispose()
+                    print("🔄 数据库配置已变化，已释放旧连接池")
+
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = create_engine(
+                    url,
+                    poolclass=MeteredQueuePool,
+                    pool_size=POOL_SIZE,
+                    max_overflow=MAX_OVERFLOW,
+                    pool_timeout=POOL_TIMEOUT,
+                    pool_pre_ping=True,  # 自动检测连接是否有效
+                    pool_recycle=POOL_RECYCLE,
+                    echo=False,
+                )
+                self._engines[key] = engine
+            if from_config:
+                self._config_key = key
+            return engine
+
+    def get_sessionmaker(self, url=None) -> sessionmaker:
+        """获取绑定到该URL引擎的会话工厂(与引擎一同缓存)"""
+        engine = self.get_engine(url)
+        key = self._key(engine.url)
+        with self._lock:
+            factory = self._sessionmakers.get(key)
+            if factory is None or factory.kw.get('bind') is not engine:
+                factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+                self._sessionmakers[key] = factory
+            return factory
+
+    def pool_status(self) -> List[Dict[str, Any]]:
+        """各连接池的当前状态和签出等待统计"""
+        with self._lock:
+            engines = list(self._engines.values())
+
+        status = []
+        for engine in engines:
+            pool = engine.pool
+            item = {
+                'url': engine.url.render_as_string(hide_password=True),
+                'pool_size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'checked_in': pool.checkedin(),
+                # QueuePool.overflow()在常驻连接未建满时为负数，这里只报告实际溢出的连接数
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': MAX_OVERFLOW,
+            }
+            if isinstance(pool, MeteredQueuePool):
+                item.update(pool.wait_stats.snapshot())
+            status.append(item)
+        return status
+
+    def dispose_all(self):
+        """释放全部连接池"""
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+            self._sessionmakers.clear()
+            self._config_key = None
+        for engine in engines:
+            engine.dispose()
+
+
+# 全局注册表
+engine_registry = EngineRegistry()
+
+
+def get_engine(url=None):
+    """获取共享引擎(默认按当前config.py配置)"""
+    return engine_registry.get_engine(url)
+
+
+def get_sessionmaker(url=None) -> sessionmaker:
+    """获取共享引擎的会话工厂(默认按当前config.py配置)"""
+    return engine_registry.get_sessionmaker(url)
+
+
+def pool_status() -> List[Dict[str, Any]]:
+    """获取各连接池状态"""
+    return engine_registry.pool_status()
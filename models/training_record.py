@@ -3,44 +3,48 @@
 训练记录ORM模型
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, BigInteger, Text
+from sqlalchemy import Column, Integer, String, DateTime, BigInteger, Index, and_, func, or_
 from sqlalchemy.dialects.mysql import DECIMAL, LONGTEXT
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import deferred, undefer
 from datetime import datetime
+from typing import Optional, Tuple
 import json
+import threading
+import time
 import config
 
-# 创建基类
+from models.database import get_engine, get_sessionmaker
+
+# 创建基类(Flask路由、导入脚本与InsightEngine共用这一套模型，见InsightEngine/tools/db_models.py)
 Base = declarative_base()
 
-# 延迟创建引擎的函数
-def get_engine():
-    """
-    获取数据库引擎，每次调用都重新读取config配置
-    这样可以确保在setup页面修改配置后能使用最新配置
-    """
-    return create_engine(
-        f'mysql+pymysql://{config.DB_USER}:{config.DB_PASSWORD}@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}?charset={config.DB_CHARSET}',
-        pool_pre_ping=True,
-        pool_recycle=3600,
-        echo=False
-    )
 
 # 获取Session的函数
 def get_session_local():
-    """获取SessionLocal类，使用最新的engine配置"""
-    engine = get_engine()
-    return sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    """
+    获取SessionLocal类，使用最新的engine配置
+    引擎来自models.database中的共享注册表: 配置未变化时复用同一连接池，在setup页面修改配置后自动切换
+    """
+    return get_sessionmaker()
 
-# 为了兼容性，保留原来的变量名，但改为函数调用
-engine = get_engine()
-SessionLocal = get_session_local()
+
+# 为了兼容性，保留原来的名字，调用时才按当前配置获取共享引擎
+def SessionLocal():
+    """创建数据库会话"""
+    return get_sessionmaker()()
 
 
 class TrainingRecordKeep(Base):
     """训练记录模型 - Keep数据源"""
     __tablename__ = 'training_records_keep'
+    __table_args__ = (
+        # 复合索引(已有表由scripts/training_index_migration.py补建):
+        # 距离范围查询按距离排序，以指标列开头；心率范围查询按开始时间倒序取最近N条，
+        # 以开始时间开头、心率条件在索引内过滤。按日期查询沿用start_time单列索引
+        Index('idx_keep_distance_start', 'distance_meters', 'start_time'),
+        Index('idx_keep_start_hr', 'start_time', 'avg_heart_rate'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String(64), default='default_user', index=True)
@@ -49,10 +53,12 @@ class TrainingRecordKeep(Base):
     start_time = Column(DateTime, nullable=False, index=True)
     end_time = Column(DateTime, nullable=False)
     calories = Column(Integer, nullable=True)
-    distance_meters = Column(DECIMAL(10, 2), nullable=True)
+    # DECIMAL列按float返回，便于InsightEngine直接参与数值计算
+    distance_meters = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
     avg_heart_rate = Column(Integer, nullable=True)
     max_heart_rate = Column(Integer, nullable=True)
-    heart_rate_data = Column(LONGTEXT, nullable=True)
+    # 逐秒心率明细体积大，默认不随记录查询加载(TrainingRecordManager.query会一并加载)
+    heart_rate_data = deferred(Column(LONGTEXT, nullable=True))
     add_ts = Column(BigInteger, nullable=False)
     last_modify_ts = Column(BigInteger, nullable=False)
     data_source = Column(String(64), default='keep_import')
@@ -83,18 +89,29 @@ class TrainingRecordKeep(Base):
 class TrainingRecordGarmin(Base):
     """训练记录模型 - Garmin数据源"""
     __tablename__ = 'training_records_garmin'
+    __table_args__ = (
+        # 复合索引(已有表由scripts/training_index_migration.py补建):
+        # 距离/负荷/功率范围查询按该指标排序，以指标列开头；心率范围查询按开始时间倒序取最近N条，
+        # 以开始时间开头、心率条件在索引内过滤。按日期查询沿用start_time_gmt单列索引
+        Index('idx_garmin_distance_start', 'distance_meters', 'start_time_gmt'),
+        Index('idx_garmin_start_hr', 'start_time_gmt', 'avg_heart_rate'),
+        Index('idx_garmin_load_start', 'training_load', 'start_time_gmt'),
+        Index('idx_garmin_power_start', 'avg_power_watts', 'start_time_gmt'),
+        # 增量同步按activity_id upsert
+        Index('uk_garmin_activity_id', 'activity_id', unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(String(64), default='default_user', index=True)
 
     # 基础训练信息
-    activity_id = Column(String(128), nullable=True, index=True)
+    activity_id = Column(String(128), nullable=True)
     activity_name = Column(String(255), nullable=True)
     sport_type = Column(String(64), nullable=False, index=True)
     start_time_gmt = Column(DateTime, nullable=False, index=True)
     end_time_gmt = Column(DateTime, nullable=False)
     duration_seconds = Column(Integer, nullable=False)
-    distance_meters = Column(DECIMAL(10, 2), nullable=True)
+    distance_meters = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
 
     # 心率指标
     avg_heart_rate = Column(Integer, nullable=True)
@@ -108,10 +125,10 @@ class TrainingRecordGarmin(Base):
     # 步频步幅指标
     avg_cadence = Column(Integer, nullable=True)
     max_cadence = Column(Integer, nullable=True)
-    avg_stride_length_cm = Column(DECIMAL(10, 2), nullable=True)
-    avg_vertical_oscillation_cm = Column(DECIMAL(10, 2), nullable=True)
+    avg_stride_length_cm = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
+    avg_vertical_oscillation_cm = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
     avg_ground_contact_time_ms = Column(Integer, nullable=True)
-    vertical_ratio_percent = Column(DECIMAL(10, 2), nullable=True)
+    vertical_ratio_percent = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
     total_steps = Column(Integer, nullable=True)
 
     # 功率指标
@@ -125,12 +142,12 @@ class TrainingRecordGarmin(Base):
     power_zone_5_seconds = Column(Integer, nullable=True)
 
     # 速度指标
-    avg_speed_mps = Column(DECIMAL(10, 2), nullable=True)
-    max_speed_mps = Column(DECIMAL(10, 2), nullable=True)
+    avg_speed_mps = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
+    max_speed_mps = Column(DECIMAL(10, 2, asdecimal=False), nullable=True)
 
     # 训练效果指标
-    aerobic_training_effect = Column(DECIMAL(4, 2), nullable=True)
-    anaerobic_training_effect = Column(DECIMAL(4, 2), nullable=True)
+    aerobic_training_effect = Column(DECIMAL(4, 2, asdecimal=False), nullable=True)
+    anaerobic_training_effect = Column(DECIMAL(4, 2, asdecimal=False), nullable=True)
     training_effect_label = Column(String(64), nullable=True)
     training_load = Column(Integer, nullable=True)
 
@@ -226,6 +243,13 @@ class TrainingRecordManager:
         }
     }
 
+    # 记录总数缓存 {数据源: (总数, 缓存时刻)}: 新增/删除/导入后由invalidate_count()失效，
+    # TTL用于兜底其他进程(如命令行导入)的写入
+    COUNT_CACHE_TTL = 300
+    _count_cache = {}
+    _count_generation = 0
+    _count_lock = threading.Lock()
+
     def __init__(self, data_source: str = 'keep'):
         """
         初始化管理器
@@ -264,9 +288,77 @@ class TrainingRecordManager:
             session: 数据库会话
 
         Returns:
-            Query对象
+            Query对象(Keep记录会一并加载心率明细，供to_dict使用)
+        """
+        query = session.query(self.model_class)
+        if self.model_class is TrainingRecordKeep:
+            query = query.options(undefer(TrainingRecordKeep.heart_rate_data))
+        return query
+
+    def count(self, session) -> int:
+        """
+        当前数据源的记录总数(带缓存，避免每次翻页都全表COUNT)
+
+        Args:
+            session: 数据库会话
+
+        Returns:
+            int: 记录总数
+        """
+        cls = TrainingRecordManager
+        now = time.monotonic()
+        with cls._count_lock:
+            cached = cls._count_cache.get(self.data_source)
+            generation = cls._count_generation
+        if cached and now - cached[1] < self.COUNT_CACHE_TTL:
+            return cached[0]
+
+        total = session.query(func.count(self.model_class.id)).scalar() or 0
+        with cls._count_lock:
+            # 统计期间发生写入时不缓存可能过期的结果
+            if cls._count_generation == generation:
+                cls._count_cache[self.data_source] = (total, now)
+        return total
+
+    @classmethod
+    def invalidate_count(cls, data_source: Optional[str] = None):
+        """
+        写入后使记录总数缓存失效
+
+        Args:
+            data_source: 数据源，None表示全部
+        """
+        with cls._count_lock:
+            cls._count_generation += 1
+            if data_source is None:
+                cls._count_cache.clear()
+            else:
+                cls._count_cache.pop(data_source, None)
+
+    def keyset_page(self, session, after: Optional[Tuple[datetime, int]] = None, limit: int = 20):
+        """
+        按(开始时间, id)倒序的键集分页，任意深度的页都只沿开始时间索引读取limit+1行
+
+        Args:
+            session: 数据库会话
+            after: 上一页最后一条记录的(开始时间, id)，None表示第一页
+            limit: 每页条数
+
+        Returns:
+            tuple: (本页记录列表, 是否还有下一页)
         """
-        return session.query(self.model_class)
+        start_time_field = self.get_field('start_time')
+        id_field = self.model_class.id
+        query = self.query(session)
+        if after is not None:
+            after_time, after_id = after
+            # 展开为OR条件(而非行值比较)，MySQL可以直接使用开始时间索引做范围扫描
+            query = query.filter(or_(
+                start_time_field < after_time,
+                and_(start_time_field == after_time, id_field < after_id)
+            ))
+        records = query.order_by(start_time_field.desc(), id_field.desc()).limit(limit + 1).all()
+        return records[:limit], len(records) > limit
 
     def create_record(self, **kwargs):
         """
@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+训练数据日/周汇总(物化汇总层)
+
+training_rollups表按 (数据源, 周期类型, 周期起始日期, 指标) 存储预聚合结果:
+- period_type: 'day' 按开始时间所在自然日汇总, 'week' 按ISO周(周一为起始)汇总
+- value_sum / value_count / value_max: 非空值的和、个数与最大值，
+  区间统计时 SUM(value_sum)/SUM(value_count) 即与原始表AVG()一致
+
+导入器和/training CRUD路由在写入原始记录后调用 refresh_rollups_for_dates()，
+只重算受影响的ISO周(含其中的每一天)，不扫描整张原始表。
+"""
+
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import Column, Integer, String, Date, BigInteger, Float, UniqueConstraint
+
+from models.training_record import Base, TrainingRecordManager
+
+PERIOD_DAY = 'day'
+PERIOD_WEEK = 'week'
+
+# 每条记录都计数的会话指标
+SESSIONS_METRIC = 'sessions'
+
+# 各数据源参与汇总的数值列(指标名即原始列名)
+ROLLUP_COLUMNS = {
+    'keep': [
+        'duration_seconds', 'distance_meters', 'avg_heart_rate', 'max_heart_rate', 'calories'
+    ],
+    'garmin': [
+        'duration_seconds', 'distance_meters', 'avg_heart_rate', 'max_heart_rate',
+        'hr_zone_1_seconds', 'hr_zone_2_seconds', 'hr_zone_3_seconds', 'hr_zone_4_seconds', 'hr_zone_5_seconds',
+        'avg_cadence', 'avg_stride_length_cm', 'avg_vertical_oscillation_cm', 'avg_ground_contact_time_ms',
+        'avg_power_watts',
+        'power_zone_1_seconds', 'power_zone_2_seconds', 'power_zone_3_seconds', 'power_zone_4_seconds', 'power_zone_5_seconds',
+        'aerobic_training_effect', 'anaerobic_training_effect', 'training_load',
+        'activity_calories', 'moderate_intensity_minutes', 'vigorous_intensity_minutes'
+    ],
+}
+
+# 训练效果标签计数指标(与原LIKE '%xxx%'匹配规则一致，不区分大小写)
+LABEL_METRICS = {
+    'label_maintaining': 'maintaining',
+    'label_improving': 'improving',
+    'label_highly_improving': 'highly improving',
+}
+
+
+class TrainingRollup(Base):
+    """训练数据日/周汇总表"""
+    __tablename__ = 'training_rollups'
+    __table_args__ = (
+        UniqueConstraint('data_source', 'period_type', 'period_start', 'metric', name='uk_rollup_period_metric'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    data_source = Column(String(16), nullable=False)
+    period_type = Column(String(8), nullable=False)
+    period_start = Column(Date, nullable=False)
+    metric = Column(String(64), nullable=False)
+    value_sum = Column(Float, nullable=False, default=0)
+    value_count = Column(Integer, nullable=False, default=0)
+    value_max = Column(Float, nullable=True)
+    updated_ts = Column(BigInteger, nullable=False)
+
+    def __repr__(self):
+        return f'<TrainingRollup({self.data_source}, {self.period_type}, {self.period_start}, {self.metric})>'
+
+
+def week_start(day: date) -> date:
+    """ISO周的起始日期(周一)"""
+    return day - timedelta(days=day.weekday())
+
+
+class _Bucket:
+    """单个周期内各指标的累加器"""
+
+    def __init__(self):
+        self.sums: Dict[str, float] = defaultdict(float)
+        self.counts: Dict[str, int] = defaultdict(int)
+        self.maxes: Dict[str, Optional[float]] = {}
+
+    def add(self, metric: str, value):
+        if value is None:
+            return
+        value = float(value)
+        self.sums[metric] += value
+        self.counts[metric] += 1
+        current = self.maxes.get(metric)
+        self.maxes[metric] = value if current is None else max(current, value)
+
+
+class TrainingRollupManager:
+    """训练数据汇总维护器"""
+
+    def __init__(self, data_source: str):
+        self.record_manager = TrainingRecordManager(data_source=data_source)
+        self.data_source = data_source
+        self.model_class = self.record_manager.get_model_class()
+        self.time_field = self.record_manager.get_field('start_time')
+        self.columns = ROLLUP_COLUMNS[data_source]
+
+    def _query_records(self, session):
+        """只查询汇总需要的列，避免加载心率明细等大字段"""
+        names = [self.time_field.key] + self.columns
+        if self.data_source == 'garmin':
+            names.append('training_effect_label')
+        return session.query(*[getattr(self.model_class, name) for name in names])
+
+    def _aggregate(self, records) -> Dict[tuple, _Bucket]:
+        """将原始记录累加到 (周期类型, 起始日期) 桶中"""
+        buckets: Dict[tuple, _Bucket] = defaultdict(_Bucket)
+        time_attr = self.time_field.key
+        for record in records:
+            start = getattr(record, time_attr)
+            if start is None:
+                continue
+            day = start.date()
+            targets = (buckets[(PERIOD_DAY, day)], buckets[(PERIOD_WEEK, week_start(day))])
+
+            label = (getattr(record, 'training_effect_label', None) or '').lower()
+            for bucket in targets:
+                bucket.add(SESSIONS_METRIC, 1)
+                for column in self.columns:
+                    bucket.add(column, getattr(record, column))
+                if self.data_source == 'garmin':
+                    for metric, keyword in LABEL_METRICS.items():
+                        bucket.add(metric, 1 if keyword in label else 0)
+        return buckets
+
+    def _write_buckets(self, session, buckets: Dict[tuple, _Bucket]):
+        now_ts = int(time.time())
+        rows = []
+        for (period_type, period_start), bucket in buckets.items():
+            for metric, value_sum in bucket.sums.items():
+                rows.append({
+                    'data_source': self.data_source,
+                    'period_type': period_type,
+                    'period_start': period_start,
+                    'metric': metric,
+                    'value_sum': value_sum,
+                    'value_count': bucket.counts[metric],
+                    'value_max': bucket.maxes.get(metric),
+                    'updated_ts': now_ts
+                })
+        if rows:
+            session.bulk_insert_mappings(TrainingRollup, rows)
+
+    def _has_rollups(self, session) -> bool:
+        return session.query(TrainingRollup.id)\
+            .filter(TrainingRollup.data_source == self.data_source)\
+            .first() is not None
+
+    def clear(self, session):
+        """删除当前数据源的全部汇总"""
+        session.query(TrainingRollup)\
+            .filter(TrainingRollup.data_source == self.data_source)\
+            .delete(synchronize_session=False)
+
+    def rebuild(self, session):
+        """全量重建当前数据源的汇总(导入覆盖写入或首次启用时使用)"""
+        self.clear(session)
+        records = self._query_records(session).yield_per(1000)
+        self._write_buckets(session, self._aggregate(records))
+
+    def refresh_dates(self, session, dates: Iterable[datetime]):
+        """
+        重算包含指定时间的ISO周及其中每一天的汇总
+
+        Args:
+            session: 数据库会话(由调用方提交)
+            dates: 新增/修改/删除记录的开始时间(修改时应同时传入旧值与新值)
+        """
+        weeks = sorted({week_start(d.date() if isinstance(d, datetime) else d) for d in dates if d is not None})
+        if not weeks:
+            return
+
+        if not self._has_rollups(session):
+            # 汇总尚未建立(历史数据)，直接全量重建
+            self.rebuild(session)
+            return
+
+        for monday in weeks:
+            next_monday = monday + timedelta(days=7)
+            session.query(TrainingRollup).filter(
+                TrainingRollup.data_source == self.data_source,
+                TrainingRollup.period_start >= monday,
+                TrainingRollup.period_start < next_monday
+            ).delete(synchronize_session=False)
+
+            records = self._query_records(session).filter(
+                self.time_field >= datetime.combine(monday, datetime.min.time()),
+                self.time_field < datetime.combine(next_monday, datetime.min.time())
+            ).all()
+            self._write_buckets(session, self._aggregate(records))
+
+
+_rollup_table_ready = set()
+
+
+def ensure_rollup_table(engine):
+    """确保training_rollups表存在(每个引擎只检查一次)"""
+    key = str(engine.url)
+    if key not in _rollup_table_ready:
+        TrainingRollup.__table__.create(bind=engine, checkfirst=True)
+        _rollup_table_ready.add(key)
+
+
+def refresh_rollups_for_dates(session, data_source: str, dates: List[Optional[datetime]]):
+    """便捷函数: 写入原始记录后增量刷新对应日期的汇总"""
+    ensure_rollup_table(session.get_bind())
+    TrainingRollupManager(data_source).refresh_dates(session, dates)
+
+
+def rebuild_rollups(session, data_source: str):
+    """便捷函数: 全量重建指定数据源的汇总"""
+    ensure_rollup_table(session.get_bind())
+    TrainingRollupManager(data_source).rebuild(session)
+
+
+def clear_rollups(session, data_source: str):
+    """
+    清空指定数据源的汇总
+
+    汇总维护失败时调用: 汇总为空时读取方回退到原始表统计，下次维护时自动全量重建
+    """
+    TrainingRollupManager(data_source).clear(session)
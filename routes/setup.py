@@ -14,6 +14,7 @@ setup_bp = Blueprint('setup', __name__)
 
 # 导入健康检查模块
 from utils.health_check import run_health_check
+from utils.config_reloader import invalidate_config, reload_config
 
 # 导入训练数据导入器
 import sys
@@ -167,6 +168,9 @@ def save_config():
             import importlib
             import config
             importlib.reload(config)
+            # 使配置快照缓存失效并立即重载，通知配置变化订阅者
+            invalidate_config()
+            reload_config(verbose=False)
         except Exception as reload_error:
             # 配置重载失败,恢复备份
             with open(backup_file, 'r', encoding='utf-8') as f:
@@ -386,9 +390,20 @@ def upload_training_excel():
         importer = KeepDataImporter(str(filepath))
         result = importer.run(truncate_first=True)
 
+        if not result['success']:
+            return jsonify({
+                'success': False,
+                'message': f'导入失败: 文件中没有有效记录({result["failed"]}行无效)，原有数据未改动',
+                'result': result
+            }), 400
+
+        message = f'导入成功! 共{result["success"]}条记录'
+        if result['failed']:
+            message += f', {result["failed"]}行数据无效已跳过'
+
         return jsonify({
             'success': True,
-            'message': f'导入成功! 共{result["success"]}条记录',
+            'message': message,
             'result': result
         })
 
@@ -3,9 +3,12 @@
 训练数据管理路由
 """
 
-from flask import Blueprint, render_template, request, jsonify
+from flask import Blueprint, render_template, request, jsonify, g
 from datetime import datetime
+import base64
+from models.database import pool_status
 from models.training_record import TrainingRecordManager, SessionLocal
+from models.training_rollup import refresh_rollups_for_dates
 from utils.config_reloader import get_config_value
 import json
 import time
@@ -17,10 +20,28 @@ def get_record_manager():
     """
     获取训练记录管理器（支持配置热重载）
 
-    每次调用都会读取最新的TRAINING_DATA_SOURCE配置
+    每个请求读取一次最新的TRAINING_DATA_SOURCE配置，同一请求内复用同一个管理器
     """
-    data_source = get_config_value('TRAINING_DATA_SOURCE', 'keep')
-    return TrainingRecordManager(data_source=data_source)
+    if 'record_manager' not in g:
+        data_source = get_config_value('TRAINING_DATA_SOURCE', 'keep')
+        g.record_manager = TrainingRecordManager(data_source=data_source)
+    return g.record_manager
+
+
+def encode_cursor(start_time: datetime, record_id: int) -> str:
+    """将记录的(开始时间, id)编码为分页游标"""
+    raw = f"{start_time.strftime('%Y-%m-%dT%H:%M:%S.%f')}|{record_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str):
+    """解析分页游标，返回(开始时间, id)；格式不正确时抛出ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        time_part, id_part = raw.split('|')
+        return datetime.strptime(time_part, '%Y-%m-%dT%H:%M:%S.%f'), int(id_part)
+    except Exception:
+        raise ValueError(f'无效的分页游标: {cursor}')
 
 
 @training_data_bp.route('/')
@@ -38,30 +59,57 @@ def index():
 
 @training_data_bp.route('/api/records', methods=['GET'])
 def get_records():
-    """获取所有训练记录"""
+    """
+    获取训练记录(按开始时间倒序分页)
+
+    查询参数:
+        per_page: 每页条数
+        cursor: 上一次响应中的next_cursor，不传表示第一页；按(开始时间, id)键集分页，翻到任意深度耗时不变
+        page: 仅用于回显页码；未传cursor且page>1时按OFFSET分页(兼容旧调用方)
+    """
     session = SessionLocal()
     try:
+        record_manager = get_record_manager()
+
         # 获取分页参数
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
+        cursor = request.args.get('cursor')
 
-        # 查询总数
-        total = get_record_manager().query(session).count()
+        # 总数走缓存，写入后失效
+        total = record_manager.count(session)
 
-        # 分页查询
-        start_time_field = get_record_manager().get_field('start_time')
-        records = get_record_manager().query(session)\
-            .order_by(start_time_field.desc())\
-            .limit(per_page)\
-            .offset((page - 1) * per_page)\
-            .all()
+        if cursor:
+            try:
+                after = decode_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            records, has_more = record_manager.keyset_page(session, after=after, limit=per_page)
+        elif page > 1:
+            start_time_field = record_manager.get_field('start_time')
+            Model = record_manager.get_model_class()
+            records = record_manager.query(session)\
+                .order_by(start_time_field.desc(), Model.id.desc())\
+                .limit(per_page)\
+                .offset((page - 1) * per_page)\
+                .all()
+            has_more = page * per_page < total
+        else:
+            records, has_more = record_manager.keyset_page(session, limit=per_page)
+
+        next_cursor = None
+        if has_more and records:
+            last = records[-1]
+            next_cursor = encode_cursor(getattr(last, record_manager.get_field('start_time').key), last.id)
 
         return jsonify({
             'success': True,
             'data': [record.to_dict() for record in records],
             'total': total,
             'page': page,
-            'per_page': per_page
+            'per_page': per_page,
+            'has_more': has_more,
+            'next_cursor': next_cursor
         })
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -124,7 +172,14 @@ def add_record():
         )
 
         session.add(record)
+        session.flush()
+        # 同一事务内增量刷新日/周汇总
+        record_manager = get_record_manager()
+        refresh_rollups_for_dates(session, record_manager.data_source, [
+            getattr(record, record_manager.get_field('start_time').key)
+        ])
         session.commit()
+        TrainingRecordManager.invalidate_count(record_manager.data_source)
         session.refresh(record)
 
         return jsonify({
@@ -169,6 +224,10 @@ def update_record(record_id):
         if not record:
             return jsonify({'success': False, 'message': '记录不存在'}), 404
 
+        record_manager = get_record_manager()
+        start_time_key = record_manager.get_field('start_time').key
+        old_start_time = getattr(record, start_time_key)
+
         data = request.get_json()
 
         # 更新字段
@@ -207,7 +266,13 @@ def update_record(record_id):
 
         record.last_modify_ts = int(time.time())
 
+        session.flush()
+        # 开始时间可能变化，新旧两个日期所在的周都需要重算
+        refresh_rollups_for_dates(session, record_manager.data_source, [
+            old_start_time, getattr(record, start_time_key)
+        ])
         session.commit()
+        TrainingRecordManager.invalidate_count(record_manager.data_source)
         session.refresh(record)
 
         return jsonify({
@@ -232,8 +297,13 @@ def delete_record(record_id):
         if not record:
             return jsonify({'success': False, 'message': '记录不存在'}), 404
 
+        record_manager = get_record_manager()
+        start_time = getattr(record, record_manager.get_field('start_time').key)
         session.delete(record)
+        session.flush()
+        refresh_rollups_for_dates(session, record_manager.data_source, [start_time])
         session.commit()
+        TrainingRecordManager.invalidate_count(record_manager.data_source)
 
         return jsonify({
             'success': True,
@@ -311,6 +381,15 @@ def get_current_source():
     })
 
 
+@training_data_bp.route('/api/pool_status', methods=['GET'])
+def get_pool_status():
+    """获取数据库连接池状态(签出数、溢出数、签出等待次数与耗时)"""
+    return jsonify({
+        'success': True,
+        'data': pool_status()
+    })
+
+
 @training_data_bp.route('/api/switch_source', methods=['POST'])
 def switch_source():
     """切换数据源"""
@@ -339,7 +418,7 @@ def switch_source():
 
 @training_data_bp.route('/api/sync_garmin_data', methods=['POST'])
 def sync_garmin_data():
-    """同步Garmin数据 - 调用setup页面的导入逻辑"""
+    """同步Garmin数据 - 增量抓取上次同步之后的活动并按activity_id upsert"""
     try:
         # 从request body获取is_cn, 优先于config
         data = request.json or {}
@@ -365,7 +444,7 @@ def sync_garmin_data():
         # 执行导入
         from scripts.training_data_importer import GarminDataImporter
         importer = GarminDataImporter(garmin_email, garmin_password, garmin_is_cn)
-        result = importer.run(truncate_first=True)
+        result = importer.run(truncate_first=False, incremental=True)
 
         if 'error' in result:
             return jsonify({
@@ -375,7 +454,7 @@ def sync_garmin_data():
 
         return jsonify({
             'success': True,
-            'message': f'Garmin数据同步成功! 共导入{result["success"]}条记录',
+            'message': f'Garmin数据同步成功! 新增{result["inserted"]}条, 更新{result["updated"]}条记录',
             'result': result
         })
 
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+Garmin活动并发分页抓取
+
+ConcurrentActivityFetcher用有界线程池预取后续页，同时按页序消费结果:
+- 所有请求共享AdaptiveRateLimiter，按当前间隔错开请求起始时间；
+  遇到429时间隔翻倍(有Retry-After时按其暂停)，响应变慢时放大间隔，正常时逐步缩回最小间隔
+- 边抓取边过滤(只保留跑步活动)，攒够batch_size条即交给调用方写库，写库期间后续页仍在后台抓取
+- 遇到已同步过的活动(增量同步)、不满一页或达到max_count时停止，取消尚未开始的请求
+
+客户端只需实现 get_activities(start, limit)，GarminDataImporter通过client参数注入
+(测试用的本地夹具服务与HTTP客户端见tests/garmin_fixture.py)
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+
+class RateLimitedError(Exception):
+    """服务端返回429"""
+
+    def __init__(self, message: str = '429 Too Many Requests', retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def rate_limit_info(error: Exception) -> Tuple[bool, Optional[float]]:
+    """
+    判断异常是否为429限流，并尽量取出Retry-After秒数
+
+    只按HTTP状态码或异常类型判断(不匹配异常消息文本)，兼容RateLimitedError、
+    garminconnect的GarminConnectTooManyRequestsError、
+    以及携带response(requests.HTTPError / garth.GarthHTTPError.error.response)的HTTP异常
+    """
+    if isinstance(error, RateLimitedError):
+        return True, error.retry_after
+
+    response = getattr(error, 'response', None) or getattr(getattr(error, 'error', None), 'response', None)
+    status = getattr(response, 'status_code', None)
+    headers = getattr(response, 'headers', None) or {}
+    retry_after = _parse_retry_after(headers.get('Retry-After')) if hasattr(headers, 'get') else None
+
+    if status == 429 or 'TooManyRequests' in type(error).__name__:
+        return True, retry_after
+    return False, None
+
+
+class AdaptiveRateLimiter:
+    """线程安全的自适应请求间隔"""
+
+    def __init__(self, min_interval: float = 0.2, max_interval: float = 30.0, target_latency: float = 2.0):
+        """
+        Args:
+            min_interval: 相邻两次请求起始的最小间隔(秒)
+            max_interval: 间隔上限(秒)
+            target_latency: 响应耗时超过该值时认为服务端压力大，放大间隔
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_latency = target_latency
+        self.interval = min_interval
+        self.requests = 0
+        self.rate_limited = 0
+        self.total_latency = 0.0
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """等待到下一个可用的请求时间点"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_time)
+            self._next_time = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def on_success(self, latency: float):
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            if latency > self.target_latency:
+                self.interval = min(self.interval * 1.5, self.max_interval)
+            else:
+                self.interval = max(self.interval * 0.8, self.min_interval)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        with self._lock:
+            self.requests += 1
+            self.rate_limited += 1
+            self.interval = min(max(self.interval * 2, self.min_interval * 4), self.max_interval)
+            pause = retry_after if retry_after is not None else self.interval
+            self._next_time = max(self._next_time, time.monotonic() + pause)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            succeeded = self.requests - self.rate_limited
+            return {
+                'requests': self.requests,
+                'rate_limited': self.rate_limited,
+                'avg_latency': round(self.total_latency / succeeded, 3) if succeeded else None,
+                'interval': round(self.interval, 3)
+            }
+
+
+class ConcurrentActivityFetcher:
+    """按页并发抓取Garmin活动，按页序产出过滤后的批次"""
+
+    def __init__(
+        self,
+        client,
+        page_size: int = 50,
+        max_count: int = 1000,
+        max_workers: int = 3,
+        max_retries: int = 5,
+        activity_filter: Optional[Callable[[dict], bool]] = None,
+        is_synced: Optional[Callable[[dict], bool]] = None,
+        rate_limiter: Optional[AdaptiveRateLimiter] = None
+    ):
+        """
+        Args:
+            client: 实现get_activities(start, limit)的客户端(garminconnect.Garmin或HttpActivityClient)
+            page_size: 每页活动数
+            max_count: 最多抓取的活动数
+            max_workers: 同时在途的页请求数
+            max_retries: 单页遇到429时的最大重试次数
+            activity_filter: 返回True的活动才会产出
+            is_synced: 返回True表示该活动已同步过(按时间倒序，之后的页无需再抓)
+            rate_limiter: 共享的限流器，默认新建
+        """
+        self.client = client
+        self.page_size = page_size
+        self.max_count = max_count
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.activity_filter = activity_filter
+        self.is_synced = is_synced
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.pages = 0
+        self.fetched = 0
+
+    def _fetch_page(self, start: int) -> list:
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.wait()
+            began = time.monotonic()
+            try:
+                page = self.client.get_activities(start, self.page_size)
+            except Exception as e:
+                limited, retry_after = rate_limit_info(e)
+                if not limited or attempt >= self.max_retries:
+                    raise
+                self.rate_limiter.on_rate_limited(retry_after)
+                continue
+            self.rate_limiter.on_success(time.monotonic() - began)
+            return page or []
+        return []
+
+    def iter_batches(self, batch_size: int = 500) -> Iterator[List[dict]]:
+        """
+        按时间倒序产出过滤后的活动批次
+
+        Args:
+            batch_size: 每批活动数，最后一批可能不足
+
+        Yields:
+            list: 活动字典列表
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='garmin-fetch')
+        pending = deque()
+        next_start = 0
+
+        def submit():
+            nonlocal next_start
+            if next_start < self.max_count:
+                pending.append(executor.submit(self._fetch_page, next_start))
+                next_start += self.page_size
+
+        for _ in range(self.max_workers):
+            submit()
+
+        batch = []
+        try:
+            while pending:
+                try:
+                    page = pending.popleft().result()
+                except Exception as e:
+                    # 与原串行抓取一致: 出错时停止翻页，保留已抓到的数据
+                    print(f"  ⚠️ 第{self.pages + 1}页抓取失败，停止翻页: {e}")
+                    break
+                if not page:
+                    break
+
+                self.pages += 1
+                self.fetched += len(page)
+                done = len(page) < self.page_size
+                for act in page:
+                    if self.is_synced and self.is_synced(act):
+                        done = True
+                        continue
+                    if self.activity_filter is None or self.activity_filter(act):
+                        batch.append(act)
+
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+                if done:
+                    break
+                submit()
+
+            if batch:
+                yield batch
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.rate_limiter.stats()
+        stats.update({'pages': self.pages, 'fetched': self.fetched})
+        return stats
@@ -5,21 +5,34 @@
 """
 
 import sys
+import zipfile
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Tuple, Union
 import time
+import numpy as np
 import pandas as pd
 
+try:
+    import openpyxl
+    OPENPYXL_AVAILABLE = True
+except ImportError:
+    OPENPYXL_AVAILABLE = False
+
 # 添加项目根目录到Python路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 # 重要: 先导入config,确保数据库配置在创建engine前加载
 import config
 
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, func, inspect, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
 from sqlalchemy.orm import sessionmaker
 from garminconnect import Garmin
-from models.training_record import TrainingRecordKeep, TrainingRecordGarmin, Base, TrainingRecordManager, get_session_local
+from models.database import get_engine
+from models.training_record import TrainingRecordKeep, TrainingRecordGarmin, TrainingRecordManager, Base
+from models.training_rollup import refresh_rollups_for_dates, rebuild_rollups, clear_rollups
+from scripts.garmin_fetcher import ConcurrentActivityFetcher
 
 
 class BaseImporter:
@@ -30,165 +43,289 @@ class BaseImporter:
         初始化导入器
 
         Args:
-            db_engine: SQLAlchemy引擎,如果为None则直接从config构建
+            db_engine: SQLAlchemy引擎,如果为None则使用models.database中按config构建的共享引擎
         """
-        if db_engine:
-            self.engine = db_engine
-        else:
-            # 直接从config构建引擎,避免importlib.reload的不确定性
-            connection_string = (
-                f'mysql+pymysql://{config.DB_USER}:{config.DB_PASSWORD}'
-                f'@{config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}'
-                f'?charset={config.DB_CHARSET}'
-            )
-            self.engine = create_engine(
-                connection_string,
-                pool_pre_ping=True,
-                pool_recycle=3600,
-                echo=False
-            )
+        # 未指定时使用共享注册表中按当前config构建的引擎，多次导入/同步复用同一连接池
+        self.engine = db_engine or get_engine()
 
     def create_table_if_not_exists(self):
         """如果表不存在则创建"""
         Base.metadata.create_all(bind=self.engine)
 
+    def _invalidate_rollups(self, session, data_source: str):
+        """汇总维护失败时清空汇总，避免读取方使用过期统计"""
+        try:
+            clear_rollups(session, data_source)
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            print(f"清空训练汇总失败: {e}")
+
 
 class KeepDataImporter(BaseImporter):
     """Keep数据导入器 - 从Excel文件导入"""
 
-    BATCH_SIZE = 100  # 批量提交大小
-
-    def __init__(self, data_file: str, db_engine=None):
+    CHUNK_SIZE = 5000  # 每块读取、清洗和写入的行数
+    MAX_REPORTED_ERRORS = 200  # 导入结果中最多返回的错误行数
+
+    # Excel列名 -> 数据库字段
+    COLUMN_MAPPING = {
+        '运动类型': 'exercise_type',
+        '运动时长(秒)': 'duration_seconds',
+        '开始时间': 'start_time',
+        '结束时间': 'end_time',
+        '卡路里': 'calories',
+        '运动距离(米)': 'distance_meters',
+        '平均心率': 'avg_heart_rate',
+        '最大心率': 'max_heart_rate',
+        '心率记录': 'heart_rate_data',
+    }
+    REQUIRED_COLUMNS = ['运动类型', '开始时间', '结束时间']
+    INT_COLUMNS = ['运动时长(秒)', '卡路里', '平均心率', '最大心率']
+    FLOAT_COLUMNS = ['运动距离(米)']
+
+    def __init__(self, data_file: str, db_engine=None, stream: bool = True):
         """
         初始化Keep导入器
 
         Args:
             data_file: Excel数据文件路径
             db_engine: SQLAlchemy引擎
+            stream: xlsx文件是否用openpyxl只读模式流式读取(内存占用只与CHUNK_SIZE有关)
         """
         super().__init__(db_engine)
         self.data_file = data_file
+        self.stream = stream
         self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
 
-    def load_data(self) -> pd.DataFrame:
-        """加载Excel数据文件"""
+    def _iter_xlsx_chunks(self) -> Iterator[pd.DataFrame]:
+        """用openpyxl只读模式逐行读取xlsx，每CHUNK_SIZE行组装为一个DataFrame"""
+        workbook = openpyxl.load_workbook(self.data_file, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(name).strip() if name is not None else f'未命名列{i}' for i, name in enumerate(header)]
+
+            buffer, index = [], []
+            for row_number, row in enumerate(rows):
+                # 跳过整行为空的行(只读模式可能返回格式残留的空行)
+                if all(value is None for value in row):
+                    continue
+                buffer.append(row)
+                index.append(row_number)
+                if len(buffer) >= self.CHUNK_SIZE:
+                    yield pd.DataFrame(buffer, columns=columns, index=index)
+                    buffer, index = [], []
+            if buffer:
+                yield pd.DataFrame(buffer, columns=columns, index=index)
+        finally:
+            workbook.close()
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        """
+        分块读取数据文件
+
+        每块的index为数据行序号(从0开始，不含表头)，用于错误报告定位Excel行号
+        """
         if not Path(self.data_file).exists():
             raise FileNotFoundError(f"数据文件不存在: {self.data_file}")
 
-        # 根据文件扩展名选择加载方式
+        # 根据文件扩展名选择加载方式(上传的.xls也会保存为.xlsx，按文件内容判断是否为xlsx)
         file_ext = Path(self.data_file).suffix.lower()
         if file_ext in ['.xlsx', '.xls']:
-            df = pd.read_excel(self.data_file)
+            if self.stream and OPENPYXL_AVAILABLE and zipfile.is_zipfile(self.data_file):
+                chunks = self._iter_xlsx_chunks()
+            else:
+                df = pd.read_excel(self.data_file)
+                chunks = (df.iloc[i:i + self.CHUNK_SIZE] for i in range(0, len(df), self.CHUNK_SIZE))
         elif file_ext == '.csv':
-            df = pd.read_csv(self.data_file)
+            chunks = pd.read_csv(self.data_file, chunksize=self.CHUNK_SIZE)
         else:
             raise ValueError(f"不支持的文件格式: {file_ext}")
 
-        # 删除运动轨迹列
-        if '运动轨迹' in df.columns:
-            df = df.drop(columns=['运动轨迹'])
-
-        return df
-
-    def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        """数据清洗"""
-        # 填充空值
-        df = df.fillna({
-            '运动时长(秒)': 0,
-            '卡路里': 0,
-            '运动距离(米)': 0.0,
-            '平均心率': 0,
-            '最大心率': 0,
-            '心率记录': '[]'
-        })
-
-        # 转换数据类型
-        df['运动时长(秒)'] = df['运动时长(秒)'].astype(int)
-        df['卡路里'] = df['卡路里'].astype(int)
-        df['运动距离(米)'] = df['运动距离(米)'].astype(float)
-        df['平均心率'] = df['平均心率'].astype(int)
-        df['最大心率'] = df['最大心率'].astype(int)
+        for chunk in chunks:
+            # 删除运动轨迹列
+            if '运动轨迹' in chunk.columns:
+                chunk = chunk.drop(columns=['运动轨迹'])
+            yield chunk
 
-        # 时间格式统一
-        df['开始时间'] = pd.to_datetime(df['开始时间'])
-        df['结束时间'] = pd.to_datetime(df['结束时间'])
+    def load_data(self) -> pd.DataFrame:
+        """加载整个数据文件"""
+        chunks = list(self.iter_chunks())
+        return pd.concat(chunks) if chunks else pd.DataFrame(columns=list(self.COLUMN_MAPPING))
+
+    def clean_data(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[dict]]:
+        """
+        数据清洗(按列向量化转换，用布尔掩码剔除无效行)
+
+        数值列的空值按0处理，无法转换为数字的值、缺失或无法解析的时间、空的运动类型视为无效行
 
-        return df
+        Args:
+            df: 原始数据块
 
-    def import_to_database(self, df: pd.DataFrame, truncate_first: bool = False) -> dict:
+        Returns:
+            (有效行，列名已映射为数据库字段, 无效行列表[{'row': Excel行号, 'column', 'value', 'error'}])
+        """
+        missing = [column for column in self.REQUIRED_COLUMNS if column not in df.columns]
+        if missing:
+            raise ValueError(f"数据文件缺少必需列: {', '.join(missing)}")
+
+        cleaned = pd.DataFrame(index=df.index)
+        # 每行第一个出错的列名，空字符串表示有效
+        bad_column = pd.Series('', index=df.index, dtype=object)
+        messages = {}
+
+        def reject(mask: pd.Series, column: str, message: str):
+            bad_column[mask & (bad_column == '')] = column
+            messages[column] = message
+
+        exercise_type = df['运动类型'].astype('string').str.strip()
+        reject(exercise_type.isna() | (exercise_type == ''), '运动类型', '运动类型为空')
+        cleaned['exercise_type'] = exercise_type.astype(object)
+
+        # 时间格式统一
+        for column in ['开始时间', '结束时间']:
+            parsed = pd.to_datetime(df[column], errors='coerce')
+            reject(parsed.isna(), column, '时间缺失或格式错误')
+            cleaned[self.COLUMN_MAPPING[column]] = parsed
+
+        # 转换数据类型(空值填0)
+        for column in self.INT_COLUMNS + self.FLOAT_COLUMNS:
+            raw = df[column] if column in df.columns else pd.Series(np.nan, index=df.index)
+            values = pd.to_numeric(raw, errors='coerce')
+            reject((values.isna() & raw.notna()) | np.isinf(values), column, '不是有效数字')
+            values = values.replace([np.inf, -np.inf], np.nan).fillna(0)
+            field_name = self.COLUMN_MAPPING[column]
+            cleaned[field_name] = values.astype('int64') if column in self.INT_COLUMNS else values.astype(float)
+
+        if '心率记录' in df.columns:
+            cleaned['heart_rate_data'] = df['心率记录'].fillna('[]').astype(str)
+        else:
+            cleaned['heart_rate_data'] = '[]'
+
+        invalid = bad_column != ''
+        errors = [
+            {
+                'row': int(row) + 2,  # 表头占第1行
+                'column': column,
+                'value': None if pd.isna(df.at[row, column]) else str(df.at[row, column]),
+                'error': messages[column]
+            }
+            for row, column in bad_column[invalid].items()
+        ]
+        return cleaned[~invalid], errors
+
+    @staticmethod
+    def _to_rows(cleaned: pd.DataFrame, now_ts: int) -> List[dict]:
+        """将清洗后的数据块转换为Core insert()的参数字典列表"""
+        rows = cleaned.assign(
+            user_id='default_user',
+            add_ts=now_ts,
+            last_modify_ts=now_ts,
+            data_source='keep_import'
+        )
+        # 转为原生datetime，避免驱动按字符串转义pandas.Timestamp
+        for column in ['start_time', 'end_time']:
+            rows[column] = list(rows[column].dt.to_pydatetime())
+        return rows.to_dict('records')
+
+    def import_to_database(self, chunks: Union[pd.DataFrame, Iterable[pd.DataFrame]], truncate_first: bool = False) -> dict:
         """
         导入数据到数据库
 
+        逐块清洗后用Core insert() executemany写入，每块一个事务
+
+        覆盖写入时，清空表推迟到第一块读取、清洗出有效行之后，并与该块的写入放在同一事务中:
+        文件不存在、格式不支持、缺少必需列或全部行无效时，原有数据保持不变
+
         Args:
-            df: 待导入的DataFrame
+            chunks: 原始数据块(iter_chunks()的结果)或整个DataFrame
             truncate_first: 是否先清空表
 
         Returns:
-            dict: 导入结果统计 {'success': int, 'failed': int, 'total': int}
+            dict: 导入结果统计 {'success': int, 'failed': int, 'total': int,
+                  'errors': 前MAX_REPORTED_ERRORS条无效行, 'error_count': int,
+                  'truncated': 是否已清空原有数据}
         """
+        if isinstance(chunks, pd.DataFrame):
+            chunks = [chunks]
+
         # 创建表(如果不存在)
         self.create_table_if_not_exists()
+        table = TrainingRecordKeep.__table__
+        # 覆盖写入模式: 待清空，直到第一块有效数据写入成功
+        pending_truncate = truncate_first
+
+        now_ts = int(datetime.now().timestamp())
+        success_count = 0
+        failed_count = 0
+        total_count = 0
+        errors = []
+        start_dates = set()
+
+        for chunk_number, chunk in enumerate(chunks, 1):
+            chunk_start = time.perf_counter()
+            total_count += len(chunk)
+            cleaned, chunk_errors = self.clean_data(chunk)
+            errors.extend(chunk_errors)
+            failed_count += len(chunk_errors)
+            if cleaned.empty:
+                continue
 
+            try:
+                with self.engine.begin() as conn:
+                    if pending_truncate:
+                        conn.execute(table.delete())
+                    conn.execute(table.insert(), self._to_rows(cleaned, now_ts))
+                pending_truncate = False
+            except Exception as e:
+                failed_count += len(cleaned)
+                errors.append({
+                    'row': f"{int(cleaned.index[0]) + 2}-{int(cleaned.index[-1]) + 2}",
+                    'column': None,
+                    'value': None,
+                    'error': f'写入数据库失败: {e}'
+                })
+                print(f"  ❌ 第{chunk_number}块写入失败({len(cleaned)}行): {e}")
+                continue
+
+            success_count += len(cleaned)
+            start_dates.update(cleaned['start_time'].dt.normalize().dt.to_pydatetime())
+            elapsed = time.perf_counter() - chunk_start
+            print(f"  → 第{chunk_number}块: 写入{len(cleaned)}行, 无效{len(chunk_errors)}行, 耗时{elapsed:.3f}s")
+
+        truncated = truncate_first and not pending_truncate
+        if pending_truncate:
+            print("  ⚠️ 没有可写入的有效记录，已保留原有数据")
+
+        TrainingRecordManager.invalidate_count('keep')
+
+        # 维护日/周汇总: 覆盖写入时全量重建，追加写入时只重算涉及的周
         session = self.SessionLocal()
         try:
-            # 覆盖写入模式:先清空表
-            if truncate_first:
-                session.query(TrainingRecordKeep).delete()
-                session.commit()
-
-            now_ts = int(datetime.now().timestamp())
-            success_count = 0
-            failed_count = 0
-            batch_records = []
-
-            for idx, row in df.iterrows():
-                try:
-                    record = TrainingRecordKeep(
-                        user_id='default_user',
-                        exercise_type=row['运动类型'],
-                        duration_seconds=int(row['运动时长(秒)']),
-                        start_time=row['开始时间'].to_pydatetime(),
-                        end_time=row['结束时间'].to_pydatetime(),
-                        calories=int(row['卡路里']) if pd.notna(row['卡路里']) else None,
-                        distance_meters=float(row['运动距离(米)']) if pd.notna(row['运动距离(米)']) else None,
-                        avg_heart_rate=int(row['平均心率']) if pd.notna(row['平均心率']) else None,
-                        max_heart_rate=int(row['最大心率']) if pd.notna(row['最大心率']) else None,
-                        heart_rate_data=str(row['心率记录']) if pd.notna(row['心率记录']) else '[]',
-                        add_ts=now_ts,
-                        last_modify_ts=now_ts,
-                        data_source='keep_import'
-                    )
-
-                    batch_records.append(record)
-                    success_count += 1
-
-                    # 批量提交
-                    if len(batch_records) >= self.BATCH_SIZE:
-                        session.bulk_save_objects(batch_records)
-                        session.commit()
-                        batch_records = []
-
-                except Exception as e:
-                    failed_count += 1
-                    session.rollback()
-
-            # 提交剩余记录
-            if batch_records:
-                session.bulk_save_objects(batch_records)
-                session.commit()
-
-            return {
-                'success': success_count,
-                'failed': failed_count,
-                'total': len(df)
-            }
-
+            if truncated:
+                rebuild_rollups(session, 'keep')
+            else:
+                refresh_rollups_for_dates(session, 'keep', sorted(start_dates))
+            session.commit()
         except Exception as e:
             session.rollback()
-            raise e
+            print(f"训练汇总更新失败: {e}")
+            self._invalidate_rollups(session, 'keep')
         finally:
             session.close()
 
+        return {
+            'success': success_count,
+            'failed': failed_count,
+            'total': total_count,
+            'errors': errors[:self.MAX_REPORTED_ERRORS],
+            'error_count': len(errors),
+            'truncated': truncated
+        }
+
     def run(self, truncate_first: bool = False) -> dict:
         """
         执行完整导入流程
@@ -200,10 +337,7 @@ class KeepDataImporter(BaseImporter):
             dict: 导入结果统计
         """
         try:
-            df = self.load_data()
-            df = self.clean_data(df)
-            result = self.import_to_database(df, truncate_first=truncate_first)
-            return result
+            return self.import_to_database(self.iter_chunks(), truncate_first=truncate_first)
         except Exception as e:
             raise e
 
@@ -213,8 +347,11 @@ class GarminDataImporter(BaseImporter):
 
     BATCH_SIZE = 50  # 每次抓取数量
     MAX_COUNT = 1000  # 最多抓取数量
+    FETCH_CONCURRENCY = 3  # 同时在途的分页请求数
+    SYNC_OVERLAP = timedelta(days=1)  # 增量同步时回溯的时间窗口(覆盖同步后才上传或修改的活动)
+    WRITE_BATCH_SIZE = 500  # 每条多行upsert语句写入的记录数
 
-    def __init__(self, email: str, password: str, is_cn: bool = True, db_engine=None):
+    def __init__(self, email: str, password: str, is_cn: bool = True, db_engine=None, client=None):
         """
         初始化Garmin导入器
 
@@ -223,12 +360,17 @@ class GarminDataImporter(BaseImporter):
             password: Garmin账户密码
             is_cn: 是否为中国区账户
             db_engine: SQLAlchemy引擎
+            client: 已就绪的活动客户端(实现get_activities)，传入时跳过登录
         """
         super().__init__(db_engine)
         self.email = email
         self.password = password
         self.is_cn = is_cn
-        self.client = None
+        self.client = client
+        self.fetch_stats = None
+        # 表上是否有activity_id唯一索引，由_prepare_table检查(没有时upsert改为按已存在的id拆分INSERT/UPDATE)
+        self.has_activity_unique_index = True
+        self.SessionLocal = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
 
     def login(self) -> bool:
         """登录Garmin Connect"""
@@ -239,52 +381,62 @@ class GarminDataImporter(BaseImporter):
         except Exception as e:
             raise Exception(f"Garmin登录失败: {e}")
 
-    def fetch_activities(self) -> list:
+    @staticmethod
+    def _parse_gmt(time_str: str) -> datetime:
+        """解析Garmin的GMT时间字符串，格式不合法时抛出ValueError"""
+        try:
+            # Garmin时间格式: "2024-01-20 08:30:00"
+            return datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S')
+        except (TypeError, ValueError):
+            # 尝试其他格式
+            return datetime.fromisoformat(str(time_str).replace('Z', '+00:00'))
+
+    @staticmethod
+    def is_running_activity(act: dict) -> bool:
+        """是否为跑步(含跑步机)活动"""
+        act_type = (act.get('activityType') or {}).get('typeKey', '')
+        return 'running' in act_type or 'treadmill' in act_type
+
+    def create_fetcher(self, since: datetime = None) -> ConcurrentActivityFetcher:
         """
-        抓取训练活动数据
+        创建并发分页抓取器
 
-        Returns:
-            list: 过滤后的跑步活动列表
+        Args:
+            since: 增量同步的起始时间(GMT)，为None时抓取全部(最多MAX_COUNT条)。
+                   Garmin按时间倒序分页返回，遇到早于since的活动即停止翻页
         """
         if not self.client:
             raise Exception("请先登录Garmin")
 
-        all_activities = []
-        start = 0
-
-        while True:
+        def is_synced(act: dict) -> bool:
             try:
-                activities = self.client.get_activities(start, self.BATCH_SIZE)
-
-                if not activities:
-                    break
-
-                count = len(activities)
-                all_activities.extend(activities)
-
-                # 翻页
-                start += count
-
-                # 安全退出机制
-                if count < self.BATCH_SIZE:
-                    break
-                if start >= self.MAX_COUNT:
-                    break
-
-                # 防止请求过快
-                time.sleep(1)
-
-            except Exception as e:
-                break
+                return self._parse_gmt(act.get('startTimeGMT', '')) < since
+            except ValueError:
+                return False
+
+        return ConcurrentActivityFetcher(
+            self.client,
+            page_size=self.BATCH_SIZE,
+            max_count=self.MAX_COUNT,
+            max_workers=self.FETCH_CONCURRENCY,
+            activity_filter=self.is_running_activity,
+            is_synced=is_synced if since is not None else None
+        )
+
+    def fetch_activities(self, since: datetime = None) -> list:
+        """
+        抓取训练活动数据
 
-        # 过滤跑步数据
-        running_activities = []
-        for act in all_activities:
-            act_type = act.get('activityType', {}).get('typeKey', '')
-            if 'running' in act_type or 'treadmill' in act_type:
-                running_activities.append(act)
+        Args:
+            since: 增量同步的起始时间(GMT)，见create_fetcher
 
-        return running_activities
+        Returns:
+            list: 过滤后的跑步活动列表
+        """
+        fetcher = self.create_fetcher(since)
+        activities = [act for batch in fetcher.iter_batches(self.WRITE_BATCH_SIZE) for act in batch]
+        self.fetch_stats = fetcher.stats()
+        return activities
 
     def parse_activity(self, act: dict) -> dict:
         """
@@ -306,16 +458,10 @@ class GarminDataImporter(BaseImporter):
         end_time_str = act.get('endTimeGMT', '')
 
         try:
-            # Garmin时间格式: "2024-01-20 08:30:00"
-            start_time_gmt = datetime.strptime(start_time_str, '%Y-%m-%d %H:%M:%S')
-            end_time_gmt = datetime.strptime(end_time_str, '%Y-%m-%d %H:%M:%S')
-        except:
-            # 尝试其他格式
-            try:
-                start_time_gmt = datetime.fromisoformat(start_time_str.replace('Z', '+00:00'))
-                end_time_gmt = datetime.fromisoformat(end_time_str.replace('Z', '+00:00'))
-            except:
-                return None
+            start_time_gmt = self._parse_gmt(start_time_str)
+            end_time_gmt = self._parse_gmt(end_time_str)
+        except ValueError:
+            return None
 
         # 时长(秒)
         duration_seconds = int(act.get('duration', 0))
@@ -425,88 +571,238 @@ class GarminDataImporter(BaseImporter):
             'data_source': 'garmin_connect'
         }
 
-    def import_to_database(self, activities: list, truncate_first: bool = True) -> dict:
+    def get_sync_start(self) -> datetime:
+        """
+        计算增量同步的起始时间
+
+        以已同步的最新活动开始时间(GMT)为高水位，回溯SYNC_OVERLAP后作为起点，
+        回溯窗口内的活动会重新抓取并按activity_id覆盖更新
+
+        Returns:
+            datetime: 增量同步起点，表中没有Garmin同步数据时返回None(全量抓取)
+        """
+        self.create_table_if_not_exists()
+        session = self.SessionLocal()
+        try:
+            latest = session.query(func.max(TrainingRecordGarmin.start_time_gmt))\
+                .filter(TrainingRecordGarmin.data_source == 'garmin_connect')\
+                .scalar()
+        finally:
+            session.close()
+        return latest - self.SYNC_OVERLAP if latest else None
+
+    def _upsert_batch(self, conn, rows: list) -> tuple:
+        """
+        按activity_id upsert一批记录
+
+        有uk_garmin_activity_id唯一索引时用一条多行INSERT ... ON DUPLICATE KEY UPDATE写入；
+        未迁移的旧表没有该索引，按已存在的activity_id拆成多行INSERT(新活动)和批量UPDATE(已有活动)，
+        重复同步同样不会产生重复记录
+
+        Args:
+            conn: 事务中的数据库连接
+            rows: parse_activity返回的记录字典列表(activity_id不重复)
+
+        Returns:
+            tuple: (新增条数, 更新条数, 被更新记录的原开始时间列表)
+        """
+        table = TrainingRecordGarmin.__table__
+        # 先查出已存在的activity_id，用于统计新增/更新并重算原开始时间所在的周
+        existing = conn.execute(
+            select(table.c.activity_id, table.c.start_time_gmt)
+            .where(table.c.activity_id.in_([row['activity_id'] for row in rows]))
+        ).all()
+        existing_ids = {activity_id for activity_id, _ in existing}
+        update_keys = [key for key in rows[0] if key not in ('activity_id', 'add_ts')]
+
+        if self.has_activity_unique_index:
+            stmt = mysql_insert(table).values(rows)
+            stmt = stmt.on_duplicate_key_update({key: stmt.inserted[key] for key in update_keys})
+            conn.execute(stmt)
+        else:
+            new_rows = [row for row in rows if row['activity_id'] not in existing_ids]
+            updated_rows = [
+                dict({f'b_{key}': row[key] for key in update_keys}, b_activity_id=row['activity_id'])
+                for row in rows if row['activity_id'] in existing_ids
+            ]
+            if new_rows:
+                conn.execute(table.insert().values(new_rows))
+            if updated_rows:
+                conn.execute(
+                    table.update()
+                    .where(table.c.activity_id == bindparam('b_activity_id'))
+                    .values({key: bindparam(f'b_{key}') for key in update_keys}),
+                    updated_rows
+                )
+
+        updated_count = len(existing_ids)
+        return len(rows) - updated_count, updated_count, [start_time for _, start_time in existing]
+
+    def import_to_database(self, activities: list, truncate_first: bool = True, batch_size: int = None) -> dict:
         """
         导入数据到数据库
 
+        按batch_size分批解析活动，每批用一条多行INSERT ... ON DUPLICATE KEY UPDATE按activity_id upsert，
+        每批一个事务，重复导入不会产生重复记录
+
         Args:
             activities: 活动数据列表
             truncate_first: 是否先清空表(覆盖写入)
+            batch_size: 每批写入条数，默认WRITE_BATCH_SIZE
 
         Returns:
-            dict: 导入统计 {'success': int, 'failed': int, 'total': int}
+            dict: 导入统计，见import_batches
         """
-        if not activities:
-            return {'success': 0, 'failed': 0, 'total': 0}
+        batch_size = batch_size or self.WRITE_BATCH_SIZE
+        return self.import_batches(
+            (activities[offset:offset + batch_size] for offset in range(0, len(activities), batch_size)),
+            truncate_first
+        )
 
-        # 创建训练记录管理器
-        record_manager = TrainingRecordManager(data_source='garmin')
-        # 动态获取SessionLocal，确保使用最新的数据库配置
-        SessionLocal = get_session_local()
-        session = SessionLocal()
+    def import_batches(self, batches: Iterable[list], truncate_first: bool = True) -> dict:
+        """
+        逐批写入活动数据(可直接消费ConcurrentActivityFetcher.iter_batches()，边抓取边写库)
 
-        success_count = 0
-        failed_count = 0
+        覆盖写入时在第一批数据到达后才清空表，抓取失败或没有数据时不会清空已有数据
 
-        try:
-            # 是否清空表
-            if truncate_first:
-                Model = record_manager.get_model_class()
-                deleted_count = session.query(Model).delete()
-                session.commit()
+        Args:
+            batches: 活动批次
+            truncate_first: 是否先清空表(覆盖写入)
 
-            # 逐条导入
-            for i, act in enumerate(activities, 1):
+        Returns:
+            dict: 导入统计 {'success': int, 'failed': int, 'total': int, 'inserted': int, 'updated': int,
+                  'batches': [{'rows', 'inserted', 'updated', 'seconds', 'rows_per_second'}]}
+        """
+        inserted_count = 0
+        updated_count = 0
+        failed_count = 0
+        total_count = 0
+        affected_start_times = []
+        batch_stats_list = []
+        prepared = False
+
+        for chunk in batches:
+            if not chunk:
+                continue
+            if not prepared:
+                self._prepare_table(truncate_first)
+                prepared = True
+
+            total_count += len(chunk)
+            batch_start = time.perf_counter()
+
+            # 解析活动数据(批内同一activity_id保留最后一条)
+            rows = {}
+            for act in chunk:
                 try:
-                    # 解析活动数据
                     record_data = self.parse_activity(act)
-                    if not record_data:
-                        failed_count += 1
-                        continue
-
-                    # 创建记录
-                    record = record_manager.create_record(**record_data)
-                    session.add(record)
-                    session.commit()
-
-                    success_count += 1
-
-                except Exception as e:
-                    session.rollback()
+                except Exception:
+                    record_data = None
+                if not record_data or not record_data['activity_id']:
                     failed_count += 1
                     continue
+                rows[record_data['activity_id']] = record_data
+            if not rows:
+                continue
 
-            return {
-                'success': success_count,
-                'failed': failed_count,
-                'total': len(activities)
+            try:
+                with self.engine.begin() as conn:
+                    inserted, updated, old_start_times = self._upsert_batch(conn, list(rows.values()))
+            except Exception as e:
+                print(f"  ❌ 第{len(batch_stats_list) + 1}批写入失败({len(rows)}条): {e}")
+                failed_count += len(rows)
+                continue
+
+            inserted_count += inserted
+            updated_count += updated
+            # 开始时间可能被修改，新旧两个日期所在的周都需要重算
+            affected_start_times.extend(old_start_times)
+            affected_start_times.extend(row['start_time_gmt'] for row in rows.values())
+
+            elapsed = time.perf_counter() - batch_start
+            batch_stats = {
+                'rows': len(rows),
+                'inserted': inserted,
+                'updated': updated,
+                'seconds': round(elapsed, 3),
+                'rows_per_second': round(len(rows) / elapsed, 1) if elapsed > 0 else None
             }
+            batch_stats_list.append(batch_stats)
+            print(f"  → 第{len(batch_stats_list)}批: {len(rows)}条(新增{inserted}, 更新{updated}), "
+                  f"耗时{elapsed:.3f}s, {batch_stats['rows_per_second']}条/秒")
+
+        if prepared:
+            TrainingRecordManager.invalidate_count('garmin')
+            self._maintain_rollups(truncate_first, affected_start_times)
 
+        return {
+            'success': inserted_count + updated_count,
+            'failed': failed_count,
+            'total': total_count,
+            'inserted': inserted_count,
+            'updated': updated_count,
+            'batches': batch_stats_list
+        }
+
+    def _prepare_table(self, truncate_first: bool):
+        """建表、检查唯一索引，覆盖写入时清空表"""
+        # 创建表(如果不存在)
+        self.create_table_if_not_exists()
+        # ON DUPLICATE KEY UPDATE依赖activity_id唯一索引，旧表没有时改为拆分INSERT/UPDATE
+        index_names = {index['name'] for index in inspect(self.engine).get_indexes(TrainingRecordGarmin.__tablename__)}
+        self.has_activity_unique_index = 'uk_garmin_activity_id' in index_names
+        if not self.has_activity_unique_index:
+            print("⚠️ training_records_garmin缺少uk_garmin_activity_id唯一索引，本次按activity_id拆分INSERT/UPDATE写入，"
+                  "建议执行 python scripts/training_index_migration.py 建立索引")
+
+        # 是否清空表
+        if truncate_first:
+            with self.engine.begin() as conn:
+                conn.execute(TrainingRecordGarmin.__table__.delete())
+
+    def _maintain_rollups(self, truncate_first: bool, affected_start_times: list):
+        """维护日/周汇总: 覆盖写入时全量重建，增量写入时只重算涉及的周"""
+        session = self.SessionLocal()
+        try:
+            if truncate_first:
+                rebuild_rollups(session, 'garmin')
+            else:
+                refresh_rollups_for_dates(session, 'garmin', affected_start_times)
+            session.commit()
         except Exception as e:
             session.rollback()
-            return {'success': 0, 'failed': len(activities), 'total': len(activities)}
+            print(f"训练汇总更新失败: {e}")
+            self._invalidate_rollups(session, 'garmin')
         finally:
             session.close()
 
-    def run(self, truncate_first: bool = True) -> dict:
+    def run(self, truncate_first: bool = True, incremental: bool = False) -> dict:
         """
-        执行完整的Garmin数据导入流程
+        执行完整的Garmin数据导入流程(并发抓取，每攒够WRITE_BATCH_SIZE条跑步活动即写库)
 
         Args:
             truncate_first: 是否先清空表(覆盖写入)
+            incremental: 是否增量同步(只抓取高水位之后的活动并upsert，truncate_first为True时忽略)
 
         Returns:
-            dict: 导入统计
+            dict: 导入统计，包含fetch(抓取统计)，增量同步时额外包含since(本次同步起点)
         """
         try:
-            if not self.login():
+            if self.client is None and not self.login():
                 return {'success': 0, 'failed': 0, 'total': 0, 'error': '登录失败'}
 
-            activities = self.fetch_activities()
-            if not activities:
-                return {'success': 0, 'failed': 0, 'total': 0, 'error': '没有可导入的跑步数据'}
-
-            result = self.import_to_database(activities, truncate_first)
+            since = self.get_sync_start() if incremental and not truncate_first else None
+            fetcher = self.create_fetcher(since)
+            result = self.import_batches(fetcher.iter_batches(self.WRITE_BATCH_SIZE), truncate_first)
+            self.fetch_stats = result['fetch'] = fetcher.stats()
+            print(f"  → 抓取{fetcher.pages}页/{fetcher.fetched}条活动, 请求{self.fetch_stats['requests']}次, "
+                  f"限流{self.fetch_stats['rate_limited']}次, 平均响应{self.fetch_stats['avg_latency']}s")
+
+            if incremental:
+                result['since'] = since.strftime('%Y-%m-%d %H:%M:%S') if since else None
+            # 增量同步没有新活动属于正常情况
+            if not result['total'] and since is None:
+                result['error'] = '没有可导入的跑步数据'
             return result
         except Exception as e:
             raise e
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+训练记录表复合索引迁移
+
+为已存在的training_records_keep/training_records_garmin表补建ORM模型中声明的复合索引:
+- (指标, start_time): 距离/负荷/功率范围查询(按该指标排序)
+- (start_time, avg_heart_rate): 心率范围查询(按开始时间倒序取最近N条)
+- training_records_garmin.activity_id唯一索引: Garmin增量同步按activity_id upsert，
+  建索引前会删除重复的activity_id记录(保留id最大的一条)
+
+补建完成后删除已被取代的旧索引(OBSOLETE_INDEXES):
+- 以user_id开头的复合索引: 现有查询都不按用户过滤，用不上这些索引
+- idx_garmin_activity_id: activity_id普通索引，已被唯一索引覆盖
+
+新建的表由Base.metadata.create_all或training_tables.sql直接带上这些索引，无需执行本脚本。
+脚本可重复执行，已存在的索引会跳过，已删除的旧索引不会重复删除。
+
+用法:
+    python scripts/training_index_migration.py
+"""
+
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# 重要: 先导入config,确保数据库配置在创建engine前加载
+import config
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
+from models.training_record import TrainingRecordKeep, TrainingRecordGarmin, get_engine
+from models.training_rollup import rebuild_rollups
+
+MIGRATED_MODELS = [TrainingRecordKeep, TrainingRecordGarmin]
+
+# 表名 -> 已被取代、迁移时删除的旧索引
+OBSOLETE_INDEXES = {
+    TrainingRecordKeep.__tablename__: [
+        'idx_keep_user_start',
+        'idx_keep_user_distance_start',
+        'idx_keep_user_hr_start',
+    ],
+    TrainingRecordGarmin.__tablename__: [
+        'idx_garmin_activity_id',
+        'idx_garmin_user_start',
+        'idx_garmin_user_distance_start',
+        'idx_garmin_user_hr_start',
+        'idx_garmin_user_load_start',
+        'idx_garmin_user_power_start',
+    ],
+}
+
+
+def remove_duplicate_activities(engine) -> int:
+    """删除training_records_garmin中重复的activity_id记录，每个activity_id保留id最大的一条"""
+    table = TrainingRecordGarmin.__tablename__
+    with engine.begin() as conn:
+        result = conn.execute(text(
+            f"DELETE FROM {table} WHERE activity_id IS NOT NULL AND id NOT IN ("
+            f"SELECT max_id FROM (SELECT MAX(id) AS max_id FROM {table} "
+            f"WHERE activity_id IS NOT NULL GROUP BY activity_id) AS keep_ids)"
+        ))
+    return result.rowcount or 0
+
+
+def drop_obsolete_indexes(engine, table_name: str, existing) -> List[str]:
+    """删除表上已被取代的旧索引，返回本次删除的索引名列表"""
+    dropped = []
+    for index_name in OBSOLETE_INDEXES.get(table_name, []):
+        if index_name not in existing:
+            continue
+        print(f"  → 删除旧索引 {table_name}.{index_name} ...")
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP INDEX {index_name} ON {table_name}"))
+        dropped.append(index_name)
+    return dropped
+
+
+def migrate_indexes(engine=None) -> Dict[str, List[str]]:
+    """
+    补建缺失的复合索引，并删除已被取代的旧索引
+
+    新索引全部建好后才删除旧索引，迁移过程中查询始终有索引可用
+
+    Args:
+        engine: SQLAlchemy引擎,为None时按config.py创建
+
+    Returns:
+        表名 -> 本次新建的索引名列表
+    """
+    engine = engine or get_engine()
+    inspector = inspect(engine)
+    created: Dict[str, List[str]] = {}
+
+    for model in MIGRATED_MODELS:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            print(f"⚠️ 表{table.name}不存在，跳过(创建表时会一并建立索引)")
+            continue
+
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        created[table.name] = []
+        for index in table.indexes:
+            # 只处理显式命名的复合索引和唯一索引，单列普通索引沿用建表时的定义
+            if index.name in existing or (len(index.columns) < 2 and not index.unique):
+                continue
+            if index.unique and table.name == TrainingRecordGarmin.__tablename__:
+                removed = remove_duplicate_activities(engine)
+                if removed:
+                    print(f"  → 删除{removed}条重复的activity_id记录，重建garmin汇总")
+                    with Session(engine) as session:
+                        rebuild_rollups(session, 'garmin')
+                        session.commit()
+            columns = ', '.join(column.name for column in index.columns)
+            print(f"  → 创建索引 {table.name}.{index.name} ({columns}) ...")
+            index.create(bind=engine)
+            created[table.name].append(index.name)
+
+        dropped = drop_obsolete_indexes(engine, table.name, existing)
+
+        if created[table.name] or dropped:
+            print(f"✅ {table.name}: 新建{len(created[table.name])}个索引，删除{len(dropped)}个旧索引")
+        else:
+            print(f"✅ {table.name}: 复合索引和唯一索引已齐全")
+
+    return created
+
+
+if __name__ == '__main__':
+    print("=== 训练记录表复合索引迁移 ===")
+    print(f"数据库: {config.DB_HOST}:{config.DB_PORT}/{config.DB_NAME}")
+    migrate_indexes()
@@ -34,7 +34,9 @@ CREATE TABLE `training_records_keep` (
     PRIMARY KEY (`id`),
     KEY `idx_training_user_id` (`user_id`),
     KEY `idx_training_start_time` (`start_time`),
-    KEY `idx_training_exercise_type` (`exercise_type`)
+    KEY `idx_training_exercise_type` (`exercise_type`),
+    KEY `idx_keep_distance_start` (`distance_meters`, `start_time`),
+    KEY `idx_keep_start_hr` (`start_time`, `avg_heart_rate`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='训练记录表 - Keep数据源';
 
 -- ----------------------------
@@ -113,9 +115,33 @@ CREATE TABLE `training_records_garmin` (
     KEY `idx_garmin_user_id` (`user_id`),
     KEY `idx_garmin_start_time` (`start_time_gmt`),
     KEY `idx_garmin_sport_type` (`sport_type`),
-    KEY `idx_garmin_activity_id` (`activity_id`)
+    UNIQUE KEY `uk_garmin_activity_id` (`activity_id`),
+    KEY `idx_garmin_distance_start` (`distance_meters`, `start_time_gmt`),
+    KEY `idx_garmin_start_hr` (`start_time_gmt`, `avg_heart_rate`),
+    KEY `idx_garmin_load_start` (`training_load`, `start_time_gmt`),
+    KEY `idx_garmin_power_start` (`avg_power_watts`, `start_time_gmt`)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='训练记录表 - Garmin数据源';
 
+-- ----------------------------
+-- 训练数据日/周汇总表
+-- 由导入器和/training CRUD路由增量维护 (models/training_rollup.py)
+-- ----------------------------
+DROP TABLE IF EXISTS `training_rollups`;
+CREATE TABLE `training_rollups` (
+    `id` INT NOT NULL AUTO_INCREMENT COMMENT '自增ID',
+    `data_source` VARCHAR(16) NOT NULL COMMENT '数据源 (keep/garmin)',
+    `period_type` VARCHAR(8) NOT NULL COMMENT '周期类型 (day: 自然日, week: ISO周)',
+    `period_start` DATE NOT NULL COMMENT '周期起始日期 (周汇总为周一)',
+    `metric` VARCHAR(64) NOT NULL COMMENT '指标名 (原始列名/sessions/label_*)',
+    `value_sum` DOUBLE NOT NULL DEFAULT 0 COMMENT '非空值之和',
+    `value_count` INT NOT NULL DEFAULT 0 COMMENT '非空值个数',
+    `value_max` DOUBLE DEFAULT NULL COMMENT '非空值最大值',
+    `updated_ts` BIGINT NOT NULL COMMENT '汇总更新时间戳',
+
+    PRIMARY KEY (`id`),
+    UNIQUE KEY `uk_rollup_period_metric` (`data_source`, `period_type`, `period_start`, `metric`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci COMMENT='训练数据日/周汇总表';
+
 -- ----------------------------
 -- 训练统计视图 - Keep数据源
 -- ----------------------------
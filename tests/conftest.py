@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+"""
+pytest公共配置
+
+- 把项目根目录加入sys.path，测试与各应用入口一样按顶层包导入
+- InsightEngine导入时会按config.py创建数据库引擎(不会实际连接)，config.py未填写账号时补上占位值
+"""
+
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+
+for _key, _value in {'DB_USER': 'test_user', 'DB_PASSWORD': 'test_password'}.items():
+    if not getattr(config, _key, ''):
+        setattr(config, _key, _value)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Garmin活动列表测试夹具
+
+FixtureActivityServer在本地提供与Garmin分页接口相同语义的活动列表(可模拟429限流和响应耗时)，
+HttpActivityClient实现get_activities(start, limit)，通过client参数注入GarminDataImporter或
+ConcurrentActivityFetcher，离线验证并发抓取与同步流程
+"""
+
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from scripts.garmin_fetcher import RateLimitedError
+
+
+class HttpActivityClient:
+    """通过HTTP访问活动列表的客户端(对接本地夹具服务)，接口与garminconnect.Garmin.get_activities一致"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def get_activities(self, start: int = 0, limit: int = 20) -> list:
+        url = f"{self.base_url}/activities?{urlencode({'start': start, 'limit': limit})}"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                return json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                retry_after = e.headers.get('Retry-After')
+                raise RateLimitedError(retry_after=float(retry_after) if retry_after else None) from e
+            raise
+
+
+class FixtureActivityServer:
+    """
+    本地活动列表夹具服务
+
+    GET /activities?start=&limit= 返回活动列表切片(活动需按startTimeGMT倒序)，
+    可按rate_limit_every每N个请求返回一次429，latency模拟响应耗时
+    """
+
+    def __init__(self, activities: List[dict], host: str = '127.0.0.1', port: int = 0,
+                 rate_limit_every: int = 0, retry_after: Optional[float] = None, latency: float = 0.0):
+        self.activities = activities
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path != '/activities':
+                    self.send_error(404)
+                    return
+                with fixture._lock:
+                    fixture.request_count += 1
+                    count = fixture.request_count
+                if fixture.latency:
+                    time.sleep(fixture.latency)
+                if fixture.rate_limit_every and count % fixture.rate_limit_every == 0:
+                    self.send_response(429)
+                    if fixture.retry_after is not None:
+                        self.send_header('Retry-After', str(fixture.retry_after))
+                    self.end_headers()
+                    return
+
+                query = parse_qs(parsed.query)
+                start = int(query.get('start', ['0'])[0])
+                limit = int(query.get('limit', ['20'])[0])
+                body = json.dumps(fixture.activities[start:start + limit], ensure_ascii=False).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> 'FixtureActivityServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+InsightEngine检查点与断点续跑测试
+
+用记录调用的节点替身代替LLM节点、用固定结果代替数据库查询，
+在第2个段落的第2次反思时中断，再从检查点恢复，验证已完成的步骤不会重跑
+"""
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from InsightEngine.agent import SportsScientistAgent
+from InsightEngine.state import State
+from InsightEngine.state.state import Paragraph
+
+
+class Interrupted(Exception):
+    pass
+
+
+class FakeSearchNode:
+    def __init__(self, calls, name):
+        self.calls = calls
+        self.name = name
+
+    def run(self, input_data, **kwargs):
+        self.calls.append((self.name, input_data['title']))
+        return {
+            'search_query': f"{input_data['title']}的训练记录",
+            'search_tool': 'search_recent_trainings',
+            'reasoning': '测试',
+            'days': 7,
+        }
+
+
+class FakeSummaryNode:
+    def __init__(self, calls, name, reflection=False, fail_on=None, before_fail=None):
+        self.calls = calls
+        self.name = name
+        self.reflection = reflection
+        self.fail_on = fail_on
+        self.before_fail = before_fail
+
+    def mutate_state(self, input_data, state, paragraph_index, **kwargs):
+        research = state.paragraphs[paragraph_index].research
+        if self.fail_on == (paragraph_index, research.reflection_iteration):
+            if self.before_fail:
+                self.before_fail()
+            raise Interrupted()
+        self.calls.append((self.name, input_data['title']))
+        research.latest_summary = f"{self.name}:{input_data['title']}:{research.reflection_iteration}"
+        if self.reflection:
+            research.increment_reflection()
+        state.update_timestamp()
+        return state
+
+
+class FakeFormattingNode:
+    def run(self, report_data, **kwargs):
+        return "\n\n".join(item['paragraph_latest_state'] for item in report_data)
+
+
+def build_agent(tmp_path, calls, fail_on=None):
+    agent = SportsScientistAgent.__new__(SportsScientistAgent)
+    agent.config = SimpleNamespace(
+        save_intermediate_states=True,
+        max_reflections=2,
+        paragraph_concurrency=1,
+        max_content_length=2000,
+        output_dir=str(tmp_path),
+    )
+    agent.state = State()
+    agent.stream_callback = None
+    agent.checkpoint_path = None
+    agent.first_search_node = FakeSearchNode(calls, 'first_search')
+    agent.first_summary_node = FakeSummaryNode(calls, 'first_summary')
+    agent.reflection_node = FakeSearchNode(calls, 'reflection')
+    agent.reflection_summary_node = FakeSummaryNode(calls, 'reflection_summary', reflection=True, fail_on=fail_on)
+    agent.report_formatting_node = FakeFormattingNode()
+
+    def execute_search_tool(tool_name, query, **kwargs):
+        calls.append(('search', query))
+        return None
+
+    agent.execute_search_tool = execute_search_tool
+    agent._build_search_results = lambda response: [
+        {'title': '训练记录', 'url': 'db://training/1', 'content': '10km 52:30 平均心率152', 'score': None}
+    ]
+    return agent
+
+
+def test_checkpoint_mid_run_and_resume_skips_finished_steps(tmp_path):
+    calls = []
+    agent = build_agent(tmp_path, calls, fail_on=(1, 1))
+    agent.state = State(query="分析最近的训练", report_title="训练分析", paragraphs=[
+        Paragraph(title="有氧基础", content="心率区间分布", order=0),
+        Paragraph(title="训练负荷", content="负荷变化趋势", order=1),
+        Paragraph(title="恢复建议", content="恢复与调整", order=2),
+    ])
+    agent.checkpoint_path = os.path.join(str(tmp_path), 'checkpoint.json')
+    agent._checkpoint()
+
+    with pytest.raises(Interrupted):
+        agent._process_paragraphs()
+
+    # 中断前的每一步都已写入检查点(包含搜索记录)
+    with open(agent.checkpoint_path, 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    first, second, third = saved['paragraphs']
+    assert first['research']['is_completed']
+    assert first['research']['reflection_iteration'] == 2
+    assert len(first['research']['search_history']) == 3
+    assert not second['research']['is_completed']
+    assert second['research']['reflection_iteration'] == 1
+    assert second['research']['latest_summary'] == "reflection_summary:训练负荷:0"
+    # 第2次反思的搜索结果在中断前尚未写入检查点
+    assert len(second['research']['search_history']) == 2
+    assert third['research'] == {'search_history': [], 'latest_summary': '', 'reflection_iteration': 0, 'is_completed': False}
+
+    resumed_calls = []
+    resumed = build_agent(tmp_path, resumed_calls)
+    report = resumed.research("分析最近的训练", save_report=False, resume_from=agent.checkpoint_path)
+
+    # 第1段已完成: 完全跳过；第2段已有初始总结和1次反思: 只补第2次反思；第3段从头开始
+    assert resumed_calls == [
+        ('reflection', '训练负荷'),
+        ('search', '训练负荷的训练记录'),
+        ('reflection_summary', '训练负荷'),
+        ('first_search', '恢复建议'),
+        ('search', '恢复建议的训练记录'),
+        ('first_summary', '恢复建议'),
+        ('reflection', '恢复建议'),
+        ('search', '恢复建议的训练记录'),
+        ('reflection_summary', '恢复建议'),
+        ('reflection', '恢复建议'),
+        ('search', '恢复建议的训练记录'),
+        ('reflection_summary', '恢复建议'),
+    ]
+    assert report.split("\n\n") == [
+        "reflection_summary:有氧基础:1",
+        "reflection_summary:训练负荷:1",
+        "reflection_summary:恢复建议:1",
+    ]
+
+    final = State.load_from_file(agent.checkpoint_path)
+    assert final.is_completed
+    assert all(p.is_completed() for p in final.paragraphs)
+    assert [p.research.reflection_iteration for p in final.paragraphs] == [2, 2, 2]
+
+
+def test_resume_does_not_duplicate_searches_checkpointed_mid_reflection(tmp_path):
+    calls = []
+    agent = build_agent(tmp_path, calls, fail_on=(0, 1))
+    agent.state = State(query="分析最近的训练", report_title="训练分析", paragraphs=[
+        Paragraph(title="有氧基础", content="心率区间分布", order=0),
+    ])
+    agent.checkpoint_path = os.path.join(str(tmp_path), 'checkpoint.json')
+    # 模拟并发的其他段落在本段反思搜索之后、反思总结完成之前写入检查点
+    agent.reflection_summary_node.before_fail = agent._checkpoint
+
+    with pytest.raises(Interrupted):
+        agent._process_paragraphs()
+
+    saved = State.load_from_file(agent.checkpoint_path).paragraphs[0].research
+    assert saved.reflection_iteration == 1
+    assert [search.search_round for search in saved.search_history] == [0, 1, 2]
+
+    resumed = build_agent(tmp_path, [])
+    resumed.research("分析最近的训练", save_report=False, resume_from=agent.checkpoint_path)
+
+    final = State.load_from_file(agent.checkpoint_path).paragraphs[0].research
+    assert final.reflection_iteration == 2
+    assert [search.search_round for search in final.search_history] == [0, 1, 2]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+InsightEngine工具参数整理测试
+
+首次搜索和反思搜索共用_build_search_kwargs，同一份节点输出在两条路径上得到相同的工具调用
+"""
+
+import pytest
+
+from InsightEngine.state import State
+from InsightEngine.state.state import Paragraph
+
+from .test_agent_checkpoint import build_agent
+
+
+@pytest.fixture
+def agent(tmp_path):
+    return build_agent(tmp_path, [])
+
+
+@pytest.mark.parametrize('tool_output, expected', [
+    (
+        {'search_tool': 'analyze_heart_rate_series', 'start_date': '2026-09-01', 'end_date': '2026-09-3x',
+         'max_hr': 190},
+        ('analyze_heart_rate_series',
+         {'start_date': '2026-09-01', 'limit': 50, 'max_hr': 190, 'resting_hr': None}),
+    ),
+    (
+        {'search_tool': 'batch_query', 'queries': [{'tool': 'get_training_stats'}, {'days': 7}, 'bad']},
+        ('batch_query', {'queries': [{'tool': 'get_training_stats'}]}),
+    ),
+    (
+        {'search_tool': 'batch_query', 'queries': []},
+        ('search_recent_trainings', {'days': 30, 'limit': 50}),
+    ),
+    (
+        {'search_tool': 'search_by_date_range', 'start_date': '2026-09-01', 'end_date': '2026-02-30'},
+        ('search_recent_trainings', {'days': 30, 'limit': 50}),
+    ),
+    (
+        {'search_tool': 'search_by_power_zone', 'min_avg_power': 220},
+        ('search_by_power_zone', {'min_avg_power': 220, 'max_avg_power': None, 'limit': 50}),
+    ),
+    (
+        {'search_tool': 'unknown_tool'},
+        ('search_recent_trainings', {'days': 30, 'limit': 50}),
+    ),
+])
+def test_build_search_kwargs(agent, tool_output, expected):
+    assert agent._build_search_kwargs(tool_output['search_tool'], tool_output) == expected
+
+
+def test_first_search_and_reflection_issue_the_same_tool_call(agent):
+    tool_output = {
+        'search_query': '最近的心率序列',
+        'search_tool': 'analyze_heart_rate_series',
+        'reasoning': '测试',
+        'start_date': '2026-09-01',
+        'limit': 20,
+    }
+    agent.first_search_node.run = lambda input_data, **kwargs: dict(tool_output)
+    agent.reflection_node.run = lambda input_data, **kwargs: dict(tool_output)
+    executed = []
+    agent.execute_search_tool = lambda tool_name, query, **kwargs: executed.append((tool_name, kwargs))
+    agent.config.max_reflections = 1
+    agent.state = State(query="心率分析", paragraphs=[Paragraph(title="心率", content="逐秒心率", order=0)])
+
+    agent._initial_search_and_summary(0)
+    agent._reflection_loop(0)
+
+    assert len(executed) == 2
+    assert executed[0] == executed[1] == (
+        'analyze_heart_rate_series',
+        {'start_date': '2026-09-01', 'limit': 20, 'max_hr': None, 'resting_hr': None},
+    )
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+节点流式调用测试
+
+流式调用中途失败时，stream_callback应先收到STREAM_RESET撤回半截输出，
+再收到回退调用的完整结果，不能把两者拼接在一起
+"""
+
+import importlib
+
+import pytest
+
+ENGINES = ['InsightEngine', 'QueryEngine', 'MediaEngine']
+
+
+class FakeLLMClient:
+    def __init__(self, deltas, fail_after=None, fallback=""):
+        self.deltas = deltas
+        self.fail_after = fail_after
+        self.fallback = fallback
+        self.invoke_calls = 0
+
+    def invoke_stream(self, system_prompt, user_prompt, **kwargs):
+        for index, delta in enumerate(self.deltas):
+            if index == self.fail_after:
+                raise ConnectionError("stream closed")
+            yield delta
+
+    def invoke(self, system_prompt, user_prompt, **kwargs):
+        self.invoke_calls += 1
+        return self.fallback
+
+
+def build_node(engine, llm_client):
+    module = importlib.import_module(f'{engine}.nodes.base_node')
+
+    class EchoNode(module.BaseNode):
+        def run(self, input_data, **kwargs):
+            return input_data
+
+    return module, EchoNode(llm_client, "EchoNode")
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_stream_deltas_are_forwarded_in_order(engine):
+    module, node = build_node(engine, FakeLLMClient(["心率", "区间", "分布"]))
+    received = []
+
+    output = node.invoke_llm_streaming("sys", "user", stream_callback=received.append)
+
+    assert output == "心率区间分布"
+    assert received == ["心率", "区间", "分布"]
+    assert node.llm_client.invoke_calls == 0
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_failed_stream_resets_preview_before_fallback(engine):
+    client = FakeLLMClient(["训练", "负荷", "偏高"], fail_after=2, fallback="训练负荷适中")
+    module, node = build_node(engine, client)
+    received = []
+
+    output = node.invoke_llm_streaming("sys", "user", stream_callback=received.append)
+
+    assert output == "训练负荷适中"
+    assert received == ["训练", "负荷", module.STREAM_RESET, "训练负荷适中"]
+    assert client.invoke_calls == 1
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_stream_failing_before_first_delta_skips_reset(engine):
+    client = FakeLLMClient(["恢复"], fail_after=0, fallback="恢复良好")
+    module, node = build_node(engine, client)
+    received = []
+
+    output = node.invoke_llm_streaming("sys", "user", stream_callback=received.append)
+
+    assert output == "恢复良好"
+    assert received == ["恢复良好"]
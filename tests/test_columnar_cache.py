@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+列式缓存排序测试
+
+NULL的排序位置与MySQL一致: 升序排在最前，降序排在最后
+"""
+
+from collections import namedtuple
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from InsightEngine.tools.columnar_cache import ColumnarTrainingCache
+
+Row = namedtuple('Row', ['id', 'distance_meters', 'start_time'])
+
+ROWS = [
+    Row(1, 5000.0, datetime(2026, 9, 1)),
+    Row(2, None, None),
+    Row(3, 10000.0, datetime(2026, 9, 3)),
+    Row(4, 5000.0, datetime(2026, 9, 2)),
+]
+
+
+def build_cache():
+    cache = ColumnarTrainingCache.__new__(ColumnarTrainingCache)
+    cache.refresh = lambda force=False: None
+    cache._snapshot = (ROWS, {
+        'distance_meters': np.array([row.distance_meters for row in ROWS], dtype=np.float64),
+        'start_time': np.array([row.start_time for row in ROWS], dtype='datetime64[us]'),
+    })
+    return cache
+
+
+@pytest.mark.parametrize('order_by, descending, expected', [
+    ('start_time', True, [3, 4, 1, 2]),
+    ('start_time', False, [2, 1, 4, 3]),
+    # 相同距离保持原有顺序
+    ('distance_meters', True, [3, 1, 4, 2]),
+    ('distance_meters', False, [2, 1, 4, 3]),
+])
+def test_nulls_sort_like_mysql(order_by, descending, expected):
+    rows = build_cache().query([], order_by, descending=descending)
+    assert [row.id for row in rows] == expected
+
+
+def test_descending_limit_skips_null_start_time():
+    rows = build_cache().query([], 'start_time', descending=True, limit=2)
+    assert [row.id for row in rows] == [3, 4]
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""
+ForumEngine协调监控测试
+"""
+
+import time
+
+from ForumEngine.monitor import LogMonitor
+from utils.event_bus import EventPublisher, SummaryProduced
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_restarted_monitor_writes_each_summary_once(tmp_path):
+    monitor = LogMonitor(log_dir=str(tmp_path))
+    assert monitor.start_monitoring()
+    monitor.stop_monitoring()
+    assert monitor.start_monitoring()
+    try:
+        publisher = EventPublisher(tmp_path)
+        assert publisher.publish(SummaryProduced(source='insight', node='FirstSummaryNode', content='近四周有氧基础稳步提升'))
+
+        def summary_lines():
+            if not monitor.forum_log_file.exists():
+                return []
+            text = monitor.forum_log_file.read_text(encoding='utf-8')
+            return [line for line in text.splitlines() if '[INSIGHT]' in line]
+
+        assert wait_for(lambda: len(summary_lines()) >= 1)
+        time.sleep(0.5)
+        assert len(summary_lines()) == 1
+    finally:
+        monitor.stop_monitoring()
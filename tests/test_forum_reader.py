@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+forum.log HOST发言索引测试
+"""
+
+from utils.forum_reader import HostSpeechIndex
+
+
+def write_session(path, start_time, lines):
+    # 以'w'打开会保留原inode，模拟删除重建后复用同一inode的情况
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(f"[00:00:00] [SYSTEM] === ForumEngine 协调会话开始 - {start_time} ===\n")
+        for line in lines:
+            f.write(line + "\n")
+
+
+def test_index_follows_appended_host_lines(tmp_path):
+    path = tmp_path / 'forum.log'
+    write_session(path, '2026-10-18 09:00:00', ["[09:00:01] [HOST] 第一次发言"])
+    index = HostSpeechIndex(path)
+    assert index.latest_host_line().endswith("第一次发言")
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("[09:00:02] [INSIGHT] 心率分析\n[09:00:03] [HOST] 第二次发言\n")
+    assert index.latest_host_line().endswith("第二次发言")
+
+
+def test_replaced_log_with_same_inode_and_larger_size_is_rebuilt(tmp_path):
+    path = tmp_path / 'forum.log'
+    write_session(path, '2026-10-18 09:00:00', ["[09:00:01] [HOST] 旧会话发言"])
+    index = HostSpeechIndex(path)
+    assert index.latest_host_line().endswith("旧会话发言")
+    old_inode = path.stat().st_ino
+
+    # 新会话: 同一inode，且在下次读取前已超过旧文件长度，还没有HOST发言
+    write_session(path, '2026-10-18 10:00:00', ["[10:00:01] [QUERY] " + "训练负荷" * 40])
+    assert path.stat().st_ino == old_inode
+    assert index.latest_host_line() is None
+
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write("[10:00:02] [HOST] 新会话发言\n")
+    assert index.latest_host_line() == "[10:00:02] [HOST] 新会话发言"
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Garmin活动并发分页抓取测试(使用tests/garmin_fixture.py中的本地夹具服务)
+"""
+
+from datetime import datetime, timedelta
+
+from scripts.garmin_fetcher import AdaptiveRateLimiter, ConcurrentActivityFetcher, RateLimitedError, rate_limit_info
+from tests.garmin_fixture import FixtureActivityServer, HttpActivityClient
+
+
+def make_activities(count: int) -> list:
+    """按startTimeGMT倒序的活动列表，每3条中有1条骑行"""
+    base = datetime(2024, 1, 1)
+    activities = []
+    for activity_id in range(count, 0, -1):
+        start = base + timedelta(hours=12 * activity_id)
+        activities.append({
+            'activityId': activity_id,
+            'activityType': {'typeKey': 'cycling' if activity_id % 3 == 0 else 'running'},
+            'startTimeGMT': start.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    return activities
+
+
+def is_running(act: dict) -> bool:
+    return act['activityType']['typeKey'] == 'running'
+
+
+def test_fetcher_keeps_page_order_and_retries_rate_limited_pages():
+    activities = make_activities(230)
+    with FixtureActivityServer(activities, rate_limit_every=4, retry_after=0.01) as server:
+        fetcher = ConcurrentActivityFetcher(
+            HttpActivityClient(server.url),
+            page_size=20,
+            max_workers=3,
+            activity_filter=is_running,
+            rate_limiter=AdaptiveRateLimiter(min_interval=0.0)
+        )
+        batches = list(fetcher.iter_batches(batch_size=50))
+
+    fetched = [act['activityId'] for batch in batches for act in batch]
+    assert fetched == [act['activityId'] for act in activities if is_running(act)]
+    assert all(len(batch) >= 50 for batch in batches[:-1])
+    stats = fetcher.stats()
+    assert stats['pages'] == 12
+    assert stats['fetched'] == 230
+    assert stats['rate_limited'] > 0
+
+
+def test_fetcher_stops_at_already_synced_activities():
+    activities = make_activities(200)
+    since = datetime.strptime(activities[30]['startTimeGMT'], '%Y-%m-%d %H:%M:%S')
+    with FixtureActivityServer(activities) as server:
+        fetcher = ConcurrentActivityFetcher(
+            HttpActivityClient(server.url),
+            page_size=20,
+            max_workers=2,
+            is_synced=lambda act: datetime.strptime(act['startTimeGMT'], '%Y-%m-%d %H:%M:%S') < since,
+            rate_limiter=AdaptiveRateLimiter(min_interval=0.0)
+        )
+        fetched = [act for batch in fetcher.iter_batches() for act in batch]
+
+    assert [act['activityId'] for act in fetched] == [act['activityId'] for act in activities[:31]]
+    assert fetcher.pages == 2
+
+
+class GarminConnectTooManyRequestsError(Exception):
+    pass
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, response):
+        super().__init__(f"{response.status_code} error")
+        self.response = response
+
+
+def test_rate_limit_info_uses_status_code_or_exception_type_only():
+    assert rate_limit_info(RateLimitedError(retry_after=3)) == (True, 3)
+    assert rate_limit_info(GarminConnectTooManyRequestsError('slow down')) == (True, None)
+    assert rate_limit_info(HTTPError(FakeResponse(429, {'Retry-After': '2'}))) == (True, 2.0)
+    assert rate_limit_info(HTTPError(FakeResponse(500))) == (False, None)
+    # 消息中恰好包含"429"的其他错误不算限流
+    assert rate_limit_info(ValueError('activity 4291 not found')) == (False, None)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Keep心率明细加载测试
+
+心率明细通过load_heart_rate_data一次查询批量加载原始JSON，首次读取时才解码；
+未加载时读取返回None，不会逐条查询数据库
+"""
+
+from array import array
+from contextlib import contextmanager
+from datetime import datetime
+
+from InsightEngine.tools.keep_search import KeepDataSearch, KeepTrainingRecord
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+class FakeDBManager:
+    """记录查询次数，返回固定的(id, heart_rate_data)行"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    @contextmanager
+    def get_session(self):
+        manager = self
+
+        class Session:
+            def query(self, *columns):
+                manager.queries += 1
+                return FakeQuery(manager.rows)
+
+        yield Session()
+
+
+def make_record(record_id):
+    return KeepTrainingRecord(
+        id=record_id, user_id='default_user', exercise_type='running', duration_seconds=1800,
+        start_time=datetime(2026, 9, 1, 7), end_time=datetime(2026, 9, 1, 7, 30),
+        calories=300, distance_meters=5000.0, avg_heart_rate=150, max_heart_rate=172,
+        add_ts=0, last_modify_ts=0, data_source='keep',
+    )
+
+
+def build_search(rows):
+    search = KeepDataSearch.__new__(KeepDataSearch)
+    search.db_manager = FakeDBManager(rows)
+    return search
+
+
+def test_unloaded_heart_rate_data_returns_none_without_querying():
+    search = build_search([(1, '[120]')])
+    record = make_record(1)
+
+    assert record.heart_rate_data is None
+    assert search.db_manager.queries == 0
+    # 之后仍可批量加载
+    search.load_heart_rate_data([record])
+    assert record.heart_rate_data == array('H', [120])
+
+
+def test_heart_rate_json_is_decoded_on_first_read(monkeypatch):
+    import InsightEngine.tools.keep_search as keep_search
+    decoded = []
+    decode = keep_search.decode_heart_rate_data
+    monkeypatch.setattr(keep_search, 'decode_heart_rate_data', lambda hr_json: decoded.append(hr_json) or decode(hr_json))
+    record = make_record(1)
+
+    record.set_heart_rate_json('["120","121"]')
+    assert decoded == []
+    assert record.heart_rate_data == array('H', [120, 121])
+    assert record.heart_rate_data == array('H', [120, 121])
+    assert decoded == ['["120","121"]']
+
+
+def test_bulk_load_uses_one_query_for_all_records():
+    search = build_search([(1, '["120","121"]'), (2, '[130, 131, 132]')])
+    records = [make_record(1), make_record(2), make_record(3)]
+
+    search.load_heart_rate_data(records)
+    search.load_heart_rate_data(records)
+
+    assert search.db_manager.queries == 1
+    assert records[0].heart_rate_data == array('H', [120, 121])
+    assert records[1].heart_rate_data == array('H', [130, 131, 132])
+    # 数据库中没有心率明细的记录也标记为已加载
+    assert records[2].heart_rate_data is None
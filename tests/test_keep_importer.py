@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Keep数据导入测试(SQLite内存库)
+
+- clean_data按列向量化转换，无效行带Excel行号报告
+- 覆盖写入时，文件有问题或没有有效行不会清空原有数据
+"""
+
+import pytest
+
+pytest.importorskip('garminconnect')
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.dialects.mysql import LONGTEXT
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.pool import StaticPool
+
+from models.training_record import TrainingRecordKeep
+from scripts.training_data_importer import KeepDataImporter
+
+HEADER = '运动类型,运动时长(秒),开始时间,结束时间,卡路里,运动距离(米),平均心率,最大心率\n'
+VALID_ROW = '跑步,1800,2026-09-01 07:00:00,2026-09-01 07:30:00,300,5000,150,172\n'
+
+
+@compiles(LONGTEXT, 'sqlite')
+def _compile_longtext_for_sqlite(element, compiler, **kwargs):
+    return 'TEXT'
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine('sqlite://', poolclass=StaticPool, connect_args={'check_same_thread': False})
+    yield engine
+    engine.dispose()
+
+
+def write_csv(tmp_path, name, body, header=HEADER):
+    path = tmp_path / name
+    path.write_text(header + body, encoding='utf-8')
+    return str(path)
+
+
+def count_rows(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(TrainingRecordKeep.__table__)).scalar()
+
+
+def import_file(engine, path, truncate_first=False, chunk_size=None):
+    importer = KeepDataImporter(path, db_engine=engine)
+    if chunk_size:
+        importer.CHUNK_SIZE = chunk_size
+    return importer.run(truncate_first=truncate_first)
+
+
+def test_invalid_rows_are_reported_with_excel_row_numbers(engine, tmp_path):
+    path = write_csv(tmp_path, 'mixed.csv', (
+        VALID_ROW +
+        '跑步,abc,2026-09-02 07:00:00,2026-09-02 07:30:00,300,5000,150,172\n'
+        ' ,1800,2026-09-03 07:00:00,2026-09-03 07:30:00,300,5000,150,172\n'
+        '跑步,1800,昨天早上,2026-09-04 07:30:00,300,5000,150,172\n'
+        '跑步,,2026-09-05 07:00:00,2026-09-05 07:30:00,,,,\n'
+    ))
+
+    result = import_file(engine, path, chunk_size=2)
+
+    assert (result['success'], result['failed'], result['total']) == (2, 3, 5)
+    assert [(e['row'], e['column'], e['error']) for e in result['errors']] == [
+        (3, '运动时长(秒)', '不是有效数字'),
+        (4, '运动类型', '运动类型为空'),
+        (5, '开始时间', '时间缺失或格式错误'),
+    ]
+    assert result['errors'][0]['value'] == 'abc'
+    assert count_rows(engine) == 2
+    # 数值列的空值按0写入
+    with engine.connect() as conn:
+        calories = conn.execute(select(TrainingRecordKeep.calories).order_by(TrainingRecordKeep.start_time)).scalars().all()
+    assert calories == [300, 0]
+
+
+def test_reported_errors_are_capped(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(KeepDataImporter, 'MAX_REPORTED_ERRORS', 2)
+    path = write_csv(tmp_path, 'bad_rows.csv', '跑步,x,2026-09-01 07:00:00,2026-09-01 07:30:00,,,,\n' * 5)
+
+    result = import_file(engine, path)
+
+    assert result['error_count'] == 5
+    assert [e['row'] for e in result['errors']] == [2, 3]
+
+
+@pytest.mark.parametrize('name, header, body', [
+    ('bad_header.csv', '类型,时长\n', '跑步,1800\n'),
+    ('all_invalid.csv', HEADER, '跑步,x,2026-09-01 07:00:00,2026-09-01 07:30:00,,,,\n'),
+    ('unsupported.txt', HEADER, VALID_ROW),
+], ids=['bad_header', 'all_rows_invalid', 'unsupported_extension'])
+def test_failed_overwrite_keeps_existing_rows(engine, tmp_path, name, header, body):
+    import_file(engine, write_csv(tmp_path, 'existing.csv', VALID_ROW))
+    path = write_csv(tmp_path, name, body, header=header)
+
+    try:
+        result = import_file(engine, path, truncate_first=True)
+    except ValueError:
+        pass
+    else:
+        assert result['success'] == 0
+        assert not result['truncated']
+
+    assert count_rows(engine) == 1
+
+
+def test_overwrite_replaces_existing_rows(engine, tmp_path):
+    import_file(engine, write_csv(tmp_path, 'existing.csv', VALID_ROW * 3))
+
+    result = import_file(engine, write_csv(tmp_path, 'new.csv', VALID_ROW), truncate_first=True)
+
+    assert result['truncated']
+    assert count_rows(engine) == 1
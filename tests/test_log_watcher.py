@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""
+ForumEngine日志监听器测试
+"""
+
+import sys
+import threading
+import time
+
+import pytest
+
+from ForumEngine.log_watcher import LogFileWatcher
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify仅在Linux可用')
+def test_inotify_wait_ignores_unwatched_files_in_same_directory(tmp_path):
+    watched = tmp_path / 'insight.log'
+    forum_log = tmp_path / 'forum.log'
+    watched.write_text('')
+    watcher = LogFileWatcher({'insight': watched})
+    assert watcher.mode == 'inotify'
+    watcher.start_at_end()
+
+    stop = threading.Event()
+
+    def write_forum_log():
+        while not stop.is_set():
+            with open(forum_log, 'a', encoding='utf-8') as f:
+                f.write('[HOST] 总教练决策\n')
+            time.sleep(0.05)
+
+    writer = threading.Thread(target=write_forum_log, daemon=True)
+    writer.start()
+    try:
+        started = time.monotonic()
+        # 同目录其他文件的写入不会提前唤醒
+        assert watcher.wait(0.5) is False
+        assert time.monotonic() - started >= 0.45
+
+        def append_summary():
+            with open(watched, 'a', encoding='utf-8') as f:
+                f.write('FirstSummaryNode 完成\n')
+
+        threading.Timer(0.1, append_summary).start()
+        started = time.monotonic()
+        assert watcher.wait(2.0) is True
+        assert time.monotonic() - started < 1.0
+        assert watcher.poll()['insight'].lines == ['FirstSummaryNode 完成']
+    finally:
+        stop.set()
+        writer.join()
+        watcher.close()
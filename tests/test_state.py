@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+三个引擎State序列化测试
+"""
+
+import importlib
+
+import pytest
+
+ENGINES = ['InsightEngine', 'QueryEngine', 'MediaEngine']
+
+
+def build_state(module):
+    state = module.State(query="最近一个月的跑步训练", report_title="训练分析")
+    for index in range(2):
+        paragraph = module.Paragraph(title=f"段落{index}", content=f"预期内容{index}", order=index)
+        paragraph.research.add_search_results(f"查询{index}", [
+            {"url": f"https://example.com/{index}/a", "title": "结果A", "content": "内容A", "score": 0.9},
+            {"url": f"https://example.com/{index}/b", "title": "结果B", "content": "内容B"},
+        ])
+        paragraph.research.latest_summary = f"总结{index}"
+        paragraph.research.increment_reflection()
+        state.paragraphs.append(paragraph)
+    state.paragraphs[0].research.mark_completed()
+    return state
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_state_with_searches_round_trips_through_file(engine, tmp_path):
+    module = importlib.import_module(f'{engine}.state.state')
+    state = build_state(module)
+    filepath = tmp_path / 'state.json'
+
+    state.save_to_file(str(filepath))
+    loaded = module.State.load_from_file(str(filepath))
+
+    assert loaded.to_dict() == state.to_dict()
+    assert [p.research.get_search_count() for p in loaded.paragraphs] == [2, 2]
+    assert loaded.paragraphs[0].research.search_history[0].url == "https://example.com/0/a"
+    assert loaded.paragraphs[0].is_completed()
+    assert not loaded.paragraphs[1].is_completed()
+    # 临时文件已被原子替换，目录中只剩目标文件
+    assert [p.name for p in tmp_path.iterdir()] == ['state.json']
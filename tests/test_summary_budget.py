@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+总结节点提示词预算测试
+
+多个段落并发共用同一个总结节点时，每次调用拿到的预算报告必须对应自己的输入
+"""
+
+import importlib
+import threading
+
+import pytest
+
+ENGINES = ['InsightEngine', 'QueryEngine', 'MediaEngine']
+
+
+class FakeLLMClient:
+    def __init__(self, barrier):
+        self.barrier = barrier
+
+    def invoke_stream(self, system_prompt, user_prompt, **kwargs):
+        # 两个段落都组装好提示词后再返回，确保两次调用真正交错
+        self.barrier.wait(timeout=5)
+        yield '{"paragraph_latest_state": "总结"}'
+
+    def invoke(self, system_prompt, user_prompt, **kwargs):
+        raise AssertionError("流式调用不应回退")
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_concurrent_paragraphs_get_their_own_budget_report(engine, monkeypatch):
+    summary_module = importlib.import_module(f'{engine}.nodes.summary_node')
+    base_module = importlib.import_module(f'{engine}.nodes.base_node')
+    if not summary_module.PROMPT_BUDGET_AVAILABLE:
+        pytest.skip("prompt_budget不可用")
+    monkeypatch.setattr(summary_module, 'FORUM_READER_AVAILABLE', False)
+    monkeypatch.setattr(base_module, 'EVENT_BUS_AVAILABLE', False)
+
+    node = summary_module.FirstSummaryNode(FakeLLMClient(threading.Barrier(2)))
+    reports = {}
+
+    def summarize(index, result_count):
+        summary, reports[index] = node.run_with_budget({
+            'title': f'段落{index}',
+            'content': '训练负荷变化',
+            'search_query': '最近的训练',
+            'search_results': [f'结果{i}' for i in range(result_count)],
+        })
+        assert summary == '总结'
+
+    threads = [threading.Thread(target=summarize, args=(0, 1)), threading.Thread(target=summarize, args=(1, 3))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert reports[0].search_results_total == 1
+    assert reports[1].search_results_total == 3
+    assert not hasattr(node, 'last_prompt_budget')
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+共享异步LLM客户端
+所有Engine与ForumHost共用的OpenAI兼容异步客户端，提供:
+
+1. 每个Base URL一个复用的httpx连接池(keep-alive，安装h2时启用HTTP/2)
+2. 每个Base URL的在途请求上限，避免并发节点互相挤占
+3. 后台事件循环线程 + 同步门面 complete()/stream()，同步代码无需改写即可共享连接池
+
+可通过环境变量调整:
+- LLM_MAX_CONNECTIONS: 每个Base URL的最大连接数 (默认20)
+- LLM_MAX_KEEPALIVE_CONNECTIONS: 每个Base URL保持的空闲连接数 (默认10)
+- LLM_KEEPALIVE_EXPIRY: 空闲连接保活秒数 (默认60)
+- LLM_MAX_IN_FLIGHT: 每个Base URL同时在途的请求数 (默认8)
+"""
+
+import asyncio
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from openai import AsyncOpenAI
+
+try:
+    import h2  # noqa: F401  httpx的HTTP/2支持依赖h2
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _env_number(key: str, default: float) -> float:
+    """读取数值型环境变量，非法值回退到默认值"""
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+MAX_CONNECTIONS = int(_env_number("LLM_MAX_CONNECTIONS", 20))
+MAX_KEEPALIVE_CONNECTIONS = int(_env_number("LLM_MAX_KEEPALIVE_CONNECTIONS", 10))
+KEEPALIVE_EXPIRY = _env_number("LLM_KEEPALIVE_EXPIRY", 60.0)
+MAX_IN_FLIGHT = int(_env_number("LLM_MAX_IN_FLIGHT", 8))
+
+_DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+
+class _EventLoopThread:
+    """在后台守护线程中运行的事件循环，供同步调用方提交协程"""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    self._thread = threading.Thread(
+                        target=loop.run_forever, name="llm-event-loop", daemon=True
+                    )
+                    self._thread.start()
+                    self._loop = loop
+        return self._loop
+
+    def submit(self, coro) -> Future:
+        """将协程提交到后台事件循环，返回concurrent.futures.Future"""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("不能在LLM事件循环线程内调用同步接口，请直接await异步接口")
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro) -> Any:
+        """在后台事件循环中执行协程并阻塞等待结果"""
+        return self.submit(coro).result()
+
+
+_loop_thread = _EventLoopThread()
+
+
+class _ConnectionPool:
+    """按Base URL划分的httpx连接池与在途请求信号量"""
+
+    def __init__(self):
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+
+    def get_http_client(self, base_url: str) -> httpx.AsyncClient:
+        with self._lock:
+            client = self._http_clients.get(base_url)
+            if client is None:
+                client = httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                        keepalive_expiry=KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=10.0),
+                )
+                self._http_clients[base_url] = client
+            return client
+
+    def get_semaphore(self, base_url: str) -> asyncio.Semaphore:
+        """获取在途请求信号量(只在事件循环线程中调用)"""
+        semaphore = self._semaphores.get(base_url)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(max(1, MAX_IN_FLIGHT))
+            self._semaphores[base_url] = semaphore
+        return semaphore
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """返回每个Base URL的在途请求情况"""
+        result = {}
+        for base_url, semaphore in list(self._semaphores.items()):
+            available = getattr(semaphore, "_value", 0)
+            result[base_url] = {
+                "max_in_flight": MAX_IN_FLIGHT,
+                "in_flight": max(0, MAX_IN_FLIGHT - available),
+                "http2": HTTP2_AVAILABLE,
+            }
+        return result
+
+
+_pool = _ConnectionPool()
+
+
+class AsyncLLMClient:
+    """
+    共享的OpenAI兼容异步客户端
+
+    同一(api_key, base_url)在进程内只有一个实例，底层httpx连接池按Base URL共享。
+    异步代码使用 acomplete()/astream()，同步代码使用 complete()/stream()。
+    """
+
+    _instances: Dict[Tuple[str, str], "AsyncLLMClient"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
+        if not api_key:
+            raise ValueError("LLM API key is required.")
+
+        self.api_key = api_key
+        self.base_url = base_url or _DEFAULT_BASE_URL
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=self.base_url,
+            max_retries=0,
+            http_client=_pool.get_http_client(self.base_url),
+        )
+
+    @classmethod
+    def shared(cls, api_key: str, base_url: Optional[str] = None) -> "AsyncLLMClient":
+        """获取(api_key, base_url)对应的共享实例"""
+        key = (api_key, base_url or _DEFAULT_BASE_URL)
+        with cls._instances_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = cls(api_key=api_key, base_url=base_url)
+                cls._instances[key] = instance
+            return instance
+
+    async def acomplete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **params,
+    ) -> Optional[str]:
+        """
+        异步调用chat completion (需在共享事件循环 get_event_loop() 中await)
+
+        Args:
+            model: 模型名称
+            messages: 消息列表
+            timeout: 请求超时秒数
+            **params: temperature、top_p等采样参数
+
+        Returns:
+            第一个choice的文本内容
+        """
+        params.pop("stream", None)
+        async with _pool.get_semaphore(self.base_url):
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=timeout,
+                **params,
+            )
+
+        if response.choices and response.choices[0].message:
+            return response.choices[0].message.content
+        return None
+
+    def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **params,
+    ) -> Optional[str]:
+        """acomplete()的同步门面，可在任意线程中调用"""
+        return _loop_thread.run(self.acomplete(model, messages, timeout=timeout, **params))
+
+    async def astream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **params,
+    ) -> AsyncIterator[str]:
+        """
+        异步流式调用chat completion，逐段产出增量文本
+
+        整个流式响应期间占用一个在途请求名额。
+        """
+        params.pop("stream", None)
+        async with _pool.get_semaphore(self.base_url):
+            response = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                timeout=timeout,
+                stream=True,
+                **params,
+            )
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                if delta is not None and delta.content:
+                    yield delta.content
+
+    def stream(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        timeout: Optional[float] = None,
+        **params,
+    ) -> Iterator[str]:
+        """
+        astream()的同步门面，返回增量文本的生成器
+
+        调用方提前结束迭代时会取消后台的流式请求。
+        """
+        chunks: "queue.Queue[Any]" = queue.Queue()
+        finished = object()
+
+        async def pump():
+            try:
+                async for delta in self.astream(model, messages, timeout=timeout, **params):
+                    chunks.put(delta)
+            except Exception as e:
+                chunks.put(e)
+            finally:
+                chunks.put(finished)
+
+        future = _loop_thread.submit(pump())
+        try:
+            while True:
+                item = chunks.get()
+                if item is finished:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            if not future.done():
+                future.cancel()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """获取共享LLM事件循环，异步调用方可通过run_coroutine_threadsafe提交任务"""
+    return _loop_thread.loop
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """获取各Base URL的连接池统计"""
+    return _pool.stats()
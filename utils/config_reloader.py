@@ -8,13 +8,16 @@
 - 训练数据源配置(4项): TRAINING_DATA_SOURCE, GARMIN_EMAIL, GARMIN_PASSWORD, GARMIN_IS_CN
 - LLM配置(4项): LLM_API_KEY, LLM_BASE_URL, DEFAULT_MODEL_NAME, REPORT_MODEL_NAME
 - 网络工具配置(2项): TAVILY_API_KEY, BOCHA_WEB_SEARCH_API_KEY
+
+读取配置时只对config.py做一次stat，文件的mtime/inode/大小未变化时直接返回缓存的快照，
+不会重复执行config.py。
 """
 
 import importlib
 import sys
 import os
-from typing import Optional, Dict, Any, Tuple
-from threading import Lock
+from typing import Optional, Dict, Any, Tuple, List, Callable
+from threading import Lock, RLock
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -23,6 +26,11 @@ root_dir = Path(__file__).parent.parent.absolute()
 if str(root_dir) not in sys.path:
     sys.path.insert(0, str(root_dir))
 
+CONFIG_FILE = root_dir / 'config.py'
+
+# 配置变化回调: (旧快照, 新快照, 变化的配置项名称列表)
+ConfigChangeCallback = Callable[['ConfigSnapshot', 'ConfigSnapshot', List[str]], None]
+
 
 @dataclass
 class ConfigSnapshot:
@@ -81,6 +89,13 @@ class ConfigSnapshot:
             BOCHA_WEB_SEARCH_API_KEY=getattr(config_module, 'BOCHA_WEB_SEARCH_API_KEY', ''),
         )
 
+    def changed_fields(self, other: 'ConfigSnapshot') -> List[str]:
+        """返回与另一快照相比值不同的配置项名称"""
+        return [
+            field for field in self.__dataclass_fields__
+            if getattr(self, field) != getattr(other, field)
+        ]
+
     def get_changes(self, other: 'ConfigSnapshot') -> Dict[str, Tuple[Any, Any]]:
         """
         对比两个配置快照，返回变化的配置项
@@ -109,8 +124,8 @@ class ConfigReloader:
 
     特性:
     1. 线程安全的单例模式
-    2. 自动检测config.py变化
-    3. 支持变化追踪和日志记录
+    2. 按config.py的mtime/inode/大小检测变化，未变化时直接返回缓存快照
+    3. 支持变化追踪和日志记录，以及配置变化订阅回调
     4. 包含config.py中的所有20个配置项
     """
 
@@ -130,17 +145,55 @@ class ConfigReloader:
             self._config_module = None
             self._reload_count = 0
             self._last_snapshot: Optional[ConfigSnapshot] = None
+            self._file_signature: Optional[Tuple[int, int, int]] = None
+            self._reload_lock = RLock()
+            self._subscribers: List[ConfigChangeCallback] = []
 
-    def reload_config(self, verbose: bool = True) -> bool:
+    @staticmethod
+    def _read_file_signature() -> Optional[Tuple[int, int, int]]:
+        """读取config.py的(mtime_ns, inode, 大小)，文件不存在时返回None"""
+        try:
+            stat = os.stat(CONFIG_FILE)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def is_stale(self) -> bool:
+        """缓存快照是否需要重新加载"""
+        if self._last_snapshot is None or self._file_signature is None:
+            return True
+        signature = self._read_file_signature()
+        return signature is not None and signature != self._file_signature
+
+    def reload_config(self, verbose: bool = True, force: bool = False) -> bool:
         """
         重载config.py配置文件
 
         Args:
             verbose: 是否打印重载日志
+            force: 是否忽略文件签名强制重新执行config.py
 
         Returns:
-            是否重载成功
+            是否重载成功(配置未变化时直接返回True)
         """
+        with self._reload_lock:
+            if not force and not self.is_stale():
+                return True
+            old_snapshot = self._last_snapshot
+            success = self._reload_locked(verbose)
+            new_snapshot = self._last_snapshot
+
+        # 在锁外通知订阅者，回调中可以安全地再次读取配置
+        if success and old_snapshot is not None and new_snapshot is not old_snapshot:
+            changed = old_snapshot.changed_fields(new_snapshot)
+            if changed:
+                self._notify(old_snapshot, new_snapshot, changed)
+        return success
+
+    def _reload_locked(self, verbose: bool) -> bool:
+        """执行config.py并生成新快照(调用方需持有_reload_lock)"""
+        # 先记录签名再执行，执行期间发生的修改会在下次读取时被发现
+        signature = self._read_file_signature()
         try:
             # 保存旧快照
             old_snapshot = self._last_snapshot
@@ -156,6 +209,7 @@ class ConfigReloader:
                 # 创建新快照
                 new_snapshot = ConfigSnapshot.from_module(root_config)
                 self._last_snapshot = new_snapshot
+                self._file_signature = signature
 
                 if verbose:
                     print(f"🔄 配置热重载成功 (第{self._reload_count}次)")
@@ -179,6 +233,7 @@ class ConfigReloader:
                 import config as root_config
                 self._config_module = root_config
                 self._last_snapshot = ConfigSnapshot.from_module(root_config)
+                self._file_signature = signature
 
                 if verbose:
                     print("✅ 配置模块首次加载")
@@ -188,13 +243,51 @@ class ConfigReloader:
                 return True
 
         except Exception as e:
+            # 保留旧快照；记录签名，避免文件再次变化前每次读取都重复执行出错的config.py
+            if self._last_snapshot is not None:
+                self._file_signature = signature
             if verbose:
                 print(f"❌ 配置重载失败: {str(e)}")
             return False
 
+    def invalidate(self):
+        """标记缓存快照失效，下次读取时强制重新执行config.py(用于写入配置文件之后)"""
+        with self._reload_lock:
+            self._file_signature = None
+
+    def subscribe(self, callback: ConfigChangeCallback) -> Callable[[], None]:
+        """
+        订阅配置变化
+
+        Args:
+            callback: 配置重载且有配置项变化时调用 callback(旧快照, 新快照, 变化的配置项名称列表)
+
+        Returns:
+            取消订阅函数
+        """
+        with self._reload_lock:
+            self._subscribers.append(callback)
+
+        def unsubscribe():
+            with self._reload_lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    def _notify(self, old_snapshot: ConfigSnapshot, new_snapshot: ConfigSnapshot, changed: List[str]):
+        """通知所有订阅者，单个回调失败不影响其他回调"""
+        with self._reload_lock:
+            subscribers = list(self._subscribers)
+        for callback in subscribers:
+            try:
+                callback(old_snapshot, new_snapshot, changed)
+            except Exception as e:
+                print(f"⚠️ 配置变化回调执行失败: {str(e)}")
+
     def get_config_snapshot(self) -> Optional[ConfigSnapshot]:
         """
-        获取当前配置快照(自动重载最新配置)
+        获取当前配置快照(config.py变化时自动重载)
 
         Returns:
             配置快照对象
@@ -204,7 +297,7 @@ class ConfigReloader:
 
     def get_config_value(self, key: str, default: Any = None) -> Any:
         """
-        获取配置值(自动重载最新配置)
+        获取配置值(config.py变化时自动重载)
 
         Args:
             key: 配置项名称(必须是config.py中的20个配置项之一)
@@ -220,7 +313,7 @@ class ConfigReloader:
 
     def get_all_config(self) -> Dict[str, Any]:
         """
-        获取所有配置项(自动重载最新配置)
+        获取所有配置项(config.py变化时自动重载)
 
         Returns:
             配置字典(包含20个配置项)
@@ -238,22 +331,43 @@ class ConfigReloader:
 _config_reloader = ConfigReloader()
 
 
-def reload_config(verbose: bool = True) -> bool:
+def reload_config(verbose: bool = True, force: bool = False) -> bool:
     """
-    便捷函数: 重载配置
+    便捷函数: 重载配置(config.py未变化时不重复执行)
 
     Args:
         verbose: 是否打印重载日志
+        force: 是否强制重新执行config.py
 
     Returns:
         是否重载成功
     """
-    return _config_reloader.reload_config(verbose)
+    return _config_reloader.reload_config(verbose, force)
+
+
+def invalidate_config():
+    """
+    便捷函数: 标记配置缓存失效，下次读取时强制重载
+    """
+    _config_reloader.invalidate()
+
+
+def subscribe_config_changes(callback: ConfigChangeCallback) -> Callable[[], None]:
+    """
+    便捷函数: 订阅配置变化
+
+    Args:
+        callback: callback(旧快照, 新快照, 变化的配置项名称列表)
+
+    Returns:
+        取消订阅函数
+    """
+    return _config_reloader.subscribe(callback)
 
 
 def get_config_snapshot() -> Optional[ConfigSnapshot]:
     """
-    便捷函数: 获取配置快照(自动重载)
+    便捷函数: 获取配置快照(config.py变化时自动重载)
 
     Returns:
         配置快照对象
@@ -263,7 +377,7 @@ def get_config_snapshot() -> Optional[ConfigSnapshot]:
 
 def get_config_value(key: str, default: Any = None) -> Any:
     """
-    便捷函数: 获取配置值(自动重载)
+    便捷函数: 获取配置值(config.py变化时自动重载)
 
     Args:
         key: 配置项名称(必须是以下20个之一):
@@ -281,7 +395,7 @@ def get_config_value(key: str, default: Any = None) -> Any:
 
 def get_all_config() -> Dict[str, Any]:
     """
-    便捷函数: 获取所有配置(自动重载)
+    便捷函数: 获取所有配置(config.py变化时自动重载)
 
     Returns:
         配置字典(包含20个配置项)
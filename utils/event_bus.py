@@ -0,0 +1,280 @@
+# -*- coding: utf-8 -*-
+"""
+Agent与ForumEngine之间的结构化事件总线
+
+各Engine的Streamlit子进程发布事件，Flask主进程中的ForumEngine订阅事件:
+
+1. 优先通过本地Unix数据报套接字 (logs/forum_events.sock) 投递，一条事件一个数据报
+2. 套接字不可用(Windows、无监听方、消息过大等)时追加写入JSON Lines文件 (logs/forum_events.jsonl)，
+   监听方按字节偏移增量读取
+
+事件目录默认为<项目根目录>/logs，可通过环境变量 FORUM_EVENT_DIR 修改。
+"""
+
+import json
+import os
+import select
+import socket
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+_PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+
+EVENT_SOCKET_NAME = "forum_events.sock"
+EVENT_JSONL_NAME = "forum_events.jsonl"
+
+SUMMARY_PRODUCED = "summary_produced"
+
+UNIX_SOCKET_AVAILABLE = hasattr(socket, "AF_UNIX")
+
+
+def get_event_dir() -> Path:
+    """获取事件套接字与JSON Lines文件所在目录"""
+    return Path(os.getenv("FORUM_EVENT_DIR") or (_PROJECT_ROOT / "logs"))
+
+
+@dataclass
+class SummaryProduced:
+    """Agent总结节点产出一段总结"""
+    source: str                     # 来源Agent: insight / media / query
+    node: str                       # 节点名称: FirstSummaryNode / ReflectionSummaryNode
+    content: str                    # 总结正文
+    title: str = ""                 # 段落标题
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+    event_type: str = SUMMARY_PRODUCED
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SummaryProduced":
+        return cls(
+            source=data.get("source", ""),
+            node=data.get("node", ""),
+            content=data.get("content", ""),
+            title=data.get("title", ""),
+            timestamp=data.get("timestamp", datetime.now().isoformat()),
+        )
+
+
+# 事件类型 -> 事件类
+EVENT_TYPES = {
+    SUMMARY_PRODUCED: SummaryProduced,
+}
+
+
+def decode_event(payload: bytes) -> Optional[SummaryProduced]:
+    """解析一条JSON事件，无法识别时返回None"""
+    try:
+        data = json.loads(payload.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict):
+        return None
+    event_class = EVENT_TYPES.get(data.get("event_type"))
+    return event_class.from_dict(data) if event_class else None
+
+
+class EventPublisher:
+    """事件发布方(Agent进程)"""
+
+    def __init__(self, event_dir: Optional[Path] = None):
+        self.event_dir = Path(event_dir) if event_dir else get_event_dir()
+        self._socket: Optional[socket.socket] = None
+        self._lock = threading.Lock()
+
+    def publish(self, event: SummaryProduced) -> bool:
+        """
+        发布事件
+
+        Returns:
+            是否投递成功(套接字或JSON Lines任一成功即为True)
+        """
+        payload = json.dumps(event.to_dict(), ensure_ascii=False).encode("utf-8")
+        with self._lock:
+            if self._send_datagram(payload):
+                return True
+            return self._append_jsonl(payload)
+
+    def _send_datagram(self, payload: bytes) -> bool:
+        if not UNIX_SOCKET_AVAILABLE:
+            return False
+        socket_path = self.event_dir / EVENT_SOCKET_NAME
+        if not socket_path.exists():
+            return False
+        try:
+            if self._socket is None:
+                self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._socket.sendto(payload, str(socket_path))
+            return True
+        except OSError:
+            # 无监听方、消息过大等情况退回JSON Lines
+            return False
+
+    def _append_jsonl(self, payload: bytes) -> bool:
+        try:
+            self.event_dir.mkdir(parents=True, exist_ok=True)
+            # O_APPEND单次写入，多进程追加不会互相穿插
+            fd = os.open(self.event_dir / EVENT_JSONL_NAME, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, payload + b"\n")
+            finally:
+                os.close(fd)
+            return True
+        except OSError as e:
+            print(f"事件总线: 写入事件失败: {e}")
+            return False
+
+
+_publisher: Optional[EventPublisher] = None
+_publisher_lock = threading.Lock()
+
+
+def publish_event(event: SummaryProduced) -> bool:
+    """便捷函数: 通过进程内共享的发布方发布事件"""
+    global _publisher
+    if _publisher is None:
+        with _publisher_lock:
+            if _publisher is None:
+                _publisher = EventPublisher()
+    return _publisher.publish(event)
+
+
+class EventListener:
+    """
+    事件监听方(ForumEngine所在的Flask进程)
+
+    在后台线程中接收套接字数据报并增量读取JSON Lines文件，按到达顺序回调订阅者。
+    """
+
+    def __init__(self, event_dir: Optional[Path] = None, poll_interval: float = 0.5):
+        self.event_dir = Path(event_dir) if event_dir else get_event_dir()
+        self.poll_interval = poll_interval
+        self._subscribers: List[Callable[[SummaryProduced], None]] = []
+        self._socket: Optional[socket.socket] = None
+        self._jsonl_offset = 0
+        self._jsonl_partial = b""
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def socket_path(self) -> Path:
+        return self.event_dir / EVENT_SOCKET_NAME
+
+    @property
+    def jsonl_path(self) -> Path:
+        return self.event_dir / EVENT_JSONL_NAME
+
+    def subscribe(self, callback: Callable[[SummaryProduced], None]):
+        """订阅事件，回调在监听线程中执行(同一回调重复订阅只保留一次)"""
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def start(self) -> bool:
+        """绑定套接字并启动监听线程"""
+        if self._running:
+            return True
+
+        self.event_dir.mkdir(parents=True, exist_ok=True)
+        self._bind_socket()
+
+        # 监听方是JSON Lines的唯一消费者，启动时丢弃上次会话遗留的事件
+        try:
+            with open(self.jsonl_path, "wb"):
+                pass
+        except OSError as e:
+            print(f"事件总线: 初始化{EVENT_JSONL_NAME}失败: {e}")
+        self._jsonl_offset = 0
+        self._jsonl_partial = b""
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="forum-event-listener", daemon=True)
+        self._thread.start()
+        return True
+
+    def _bind_socket(self):
+        if not UNIX_SOCKET_AVAILABLE:
+            return
+        try:
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            sock.bind(str(self.socket_path))
+            self._socket = sock
+        except OSError as e:
+            print(f"事件总线: 无法绑定本地套接字，仅使用{EVENT_JSONL_NAME}: {e}")
+            self._socket = None
+
+    def stop(self):
+        """停止监听并移除套接字文件"""
+        self._running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2)
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+    @property
+    def mode(self) -> str:
+        return "unix-socket+jsonl" if self._socket is not None else "jsonl"
+
+    def _run(self):
+        while self._running:
+            try:
+                if self._socket is not None:
+                    readable, _, _ = select.select([self._socket], [], [], self.poll_interval)
+                    if readable:
+                        self._drain_socket()
+                else:
+                    time.sleep(self.poll_interval)
+                self._read_jsonl()
+            except Exception as e:
+                print(f"事件总线: 处理事件出错: {e}")
+
+    def _drain_socket(self):
+        while True:
+            try:
+                payload = self._socket.recv(1024 * 1024, socket.MSG_DONTWAIT)
+            except (BlockingIOError, InterruptedError):
+                return
+            self._dispatch(payload)
+
+    def _read_jsonl(self):
+        try:
+            size = self.jsonl_path.stat().st_size
+        except OSError:
+            return
+        if size < self._jsonl_offset:
+            self._jsonl_offset = 0
+            self._jsonl_partial = b""
+        if size == self._jsonl_offset:
+            return
+
+        with open(self.jsonl_path, "rb") as f:
+            f.seek(self._jsonl_offset)
+            data = f.read(size - self._jsonl_offset)
+        self._jsonl_offset += len(data)
+
+        data = self._jsonl_partial + data
+        complete, _, self._jsonl_partial = data.rpartition(b"\n")
+        for line in complete.split(b"\n"):
+            if line.strip():
+                self._dispatch(line)
+
+    def _dispatch(self, payload: bytes):
+        event = decode_event(payload)
+        if event is None:
+            return
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"事件总线: 事件回调失败: {e}")
@@ -1,15 +1,189 @@
 """
 Forum日志读取工具
 用于读取forum.log中的最新HOST发言
+
+forum.log在一次协调会话中只会追加，读取时不再整体readlines:
+- 最近的Agent发言: 从文件末尾按块反向读取，取够limit条即停止
+- 最新的HOST发言: 维护HOST行字节偏移的内存索引，每次只扫描上次之后新追加的字节
 """
 
+import os
 import re
+import threading
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Iterator, Optional, List, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 匹配格式: [时间] [HOST] 内容
+HOST_LINE_PATTERN = re.compile(r'\[(\d{2}:\d{2}:\d{2})\]\s*\[HOST\]\s*(.+)')
+# 匹配格式: [时间] [AGENT_NAME] 内容
+AGENT_LINE_PATTERN = re.compile(r'\[(\d{2}:\d{2}:\d{2})\]\s*\[(INSIGHT|MEDIA|QUERY)\]\s*(.+)')
+
+# 反向读取的块大小
+REVERSE_BLOCK_SIZE = 64 * 1024
+# 用于识别文件是否被替换的文件头字节数(新会话的首行是带时间戳的会话开始标记)
+HEAD_FINGERPRINT_SIZE = 256
+
+
+def _decode_line(raw: bytes) -> str:
+    return raw.decode('utf-8', errors='ignore')
+
+
+def iter_lines_reversed(path: Path, block_size: int = REVERSE_BLOCK_SIZE) -> Iterator[Tuple[int, str]]:
+    """
+    从文件末尾按块反向读取，逐行产出(行首字节偏移, 行内容)
+
+    Args:
+        path: 文件路径
+        block_size: 每次向前读取的字节数
+
+    Yields:
+        (offset, line): 行首字节偏移和去除换行符的行内容，顺序为从最后一行到第一行
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            buffer = f.read(read_size) + remainder
+            lines = buffer.split(b'\n')
+            # 第一段可能是被块边界截断的行，留到下一块拼接
+            remainder = lines[0]
+            line_offset = position + len(buffer)
+            for raw in reversed(lines[1:]):
+                line_offset -= len(raw) + 1
+                if raw.strip():
+                    yield line_offset + 1, _decode_line(raw).rstrip('\r')
+        if remainder.strip():
+            yield 0, _decode_line(remainder).rstrip('\r')
+
+
+class HostSpeechIndex:
+    """
+    forum.log中HOST行的增量偏移索引
+
+    首次使用时反向查找最新的HOST行，之后每次只扫描新追加的完整行；
+    文件被清空或替换(新会话)时自动重建: 设备号/inode变化、文件变短或文件头与上次不同都视为替换
+    (删除后重建的文件可能复用同一个inode，因此还要比对文件头)。
+    获取最新HOST发言只需一次stat、一次文件头读取和一次定位读取。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.host_offsets: List[int] = []  # 已发现的HOST行起始字节偏移(按时间顺序)
+        self._scanned_offset = 0           # 已扫描到的字节偏移(总是位于行首)
+        self._identity: Optional[Tuple[int, int]] = None  # (st_dev, st_ino)
+        self._head = b''                   # 已见过的文件头(最多HEAD_FINGERPRINT_SIZE字节)
+        self._lock = threading.Lock()
+
+    def _reset(self):
+        self.host_offsets = []
+        self._scanned_offset = 0
+        self._identity = None
+        self._head = b''
+
+    def _read_head(self, size: int) -> bytes:
+        with open(self.path, 'rb') as f:
+            return f.read(min(size, HEAD_FINGERPRINT_SIZE))
+
+    def refresh(self) -> bool:
+        """
+        同步索引到文件当前内容
+
+        Returns:
+            文件是否存在
+        """
+        try:
+            stat = self.path.stat()
+        except OSError:
+            self._reset()
+            return False
+
+        identity = (stat.st_dev, stat.st_ino)
+        head = self._read_head(stat.st_size)
+        if self._identity is not None and (
+            identity != self._identity
+            or stat.st_size < self._scanned_offset
+            or not head.startswith(self._head)
+        ):
+            # forum.log被清空重建，开始了新的协调会话
+            self._reset()
+        # 文件头随文件增长补齐，之后的比对覆盖更多字节
+        self._head = head
+
+        if self._identity is None:
+            self._build_from_tail(stat.st_size)
+            self._identity = identity
+            return True
+
+        if stat.st_size > self._scanned_offset:
+            self._scan_appended(stat.st_size)
+        return True
+
+    def _build_from_tail(self, size: int):
+        """首次建立索引: 反向找到最新的HOST行即可，不扫描整个历史"""
+        # 只把完整行计入已扫描范围，末尾未写完的行留给下次增量扫描
+        with open(self.path, 'rb') as f:
+            f.seek(max(0, size - 1))
+            ends_with_newline = size == 0 or f.read(1) == b'\n'
+        last_line_start = None
+        for offset, line in iter_lines_reversed(self.path):
+            if last_line_start is None:
+                last_line_start = offset
+                if not ends_with_newline:
+                    continue
+            if HOST_LINE_PATTERN.match(line):
+                self.host_offsets = [offset]
+                break
+        if ends_with_newline or last_line_start is None:
+            self._scanned_offset = size
+        else:
+            self._scanned_offset = last_line_start
+
+    def _scan_appended(self, size: int):
+        """增量扫描上次之后追加的完整行"""
+        with open(self.path, 'rb') as f:
+            f.seek(self._scanned_offset)
+            data = f.read(size - self._scanned_offset)
+        complete_length = data.rfind(b'\n') + 1
+        offset = self._scanned_offset
+        for raw in data[:complete_length].split(b'\n')[:-1]:
+            if b'[HOST]' in raw and HOST_LINE_PATTERN.match(_decode_line(raw)):
+                self.host_offsets.append(offset)
+            offset += len(raw) + 1
+        self._scanned_offset += complete_length
+
+    def _read_line_at(self, offset: int) -> str:
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return _decode_line(f.readline()).rstrip('\r\n')
+
+    def latest_host_line(self) -> Optional[str]:
+        """返回最新的HOST行原文，没有则返回None"""
+        with self._lock:
+            if not self.refresh() or not self.host_offsets:
+                return None
+            return self._read_line_at(self.host_offsets[-1])
+
+
+_host_indexes: Dict[str, HostSpeechIndex] = {}
+_host_indexes_lock = threading.Lock()
+
+
+def _get_host_index(forum_log_path: Path) -> HostSpeechIndex:
+    key = str(forum_log_path.resolve())
+    with _host_indexes_lock:
+        index = _host_indexes.get(key)
+        if index is None:
+            index = HostSpeechIndex(forum_log_path)
+            _host_indexes[key] = index
+        return index
+
 
 def get_latest_host_speech(log_dir: str = "logs") -> Optional[str]:
     """
@@ -27,20 +201,15 @@ def get_latest_host_speech(log_dir: str = "logs") -> Optional[str]:
         if not forum_log_path.exists():
             logger.debug("forum.log文件不存在")
             return None
-            
-        with open(forum_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        
-        # 从后往前查找最新的HOST发言
+
+        # 通过HOST偏移索引直接定位最新的HOST行
         host_speech = None
-        for line in reversed(lines):
-            # 匹配格式: [时间] [HOST] 内容
-            match = re.match(r'\[(\d{2}:\d{2}:\d{2})\]\s*\[HOST\]\s*(.+)', line)
-            if match:
-                _, content = match.groups()
-                # 处理转义的换行符，还原为实际换行
-                host_speech = content.replace('\\n', '\n').strip()
-                break
+        line = _get_host_index(forum_log_path).latest_host_line()
+        match = HOST_LINE_PATTERN.match(line) if line else None
+        if match:
+            _, content = match.groups()
+            # 处理转义的换行符，还原为实际换行
+            host_speech = content.replace('\\n', '\n').strip()
         
         if host_speech:
             logger.info(f"找到最新的HOST发言，长度: {len(host_speech)}字符")
@@ -71,14 +240,12 @@ def get_all_host_speeches(log_dir: str = "logs") -> List[Dict[str, str]]:
             logger.debug("forum.log文件不存在")
             return []
             
-        with open(forum_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        
         host_speeches = []
-        for line in lines:
-            # 匹配格式: [时间] [HOST] 内容
-            match = re.match(r'\[(\d{2}:\d{2}:\d{2})\]\s*\[HOST\]\s*(.+)', line)
-            if match:
+        with open(forum_log_path, 'r', encoding='utf-8', errors='ignore') as f:
+            for line in f:
+                match = HOST_LINE_PATTERN.match(line)
+                if not match:
+                    continue
                 timestamp, content = match.groups()
                 # 处理转义的换行符
                 content = content.replace('\\n', '\n').strip()
@@ -112,13 +279,9 @@ def get_recent_agent_speeches(log_dir: str = "logs", limit: int = 5) -> List[Dic
         if not forum_log_path.exists():
             return []
             
-        with open(forum_log_path, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()
-        
         agent_speeches = []
-        for line in reversed(lines):  # 从后往前读取
-            # 匹配格式: [时间] [AGENT_NAME] 内容
-            match = re.match(r'\[(\d{2}:\d{2}:\d{2})\]\s*\[(INSIGHT|MEDIA|QUERY)\]\s*(.+)', line)
+        for _, line in iter_lines_reversed(forum_log_path):  # 从文件末尾按块反向读取
+            match = AGENT_LINE_PATTERN.match(line)
             if match:
                 timestamp, agent, content = match.groups()
                 # 处理转义的换行符
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+LLM响应缓存
+按内容寻址的SQLite磁盘缓存，包裹在各Engine的LLMClient.invoke()/invoke_stream()外层:
+
+1. 缓存键 = sha256(模型, 系统提示词哈希, 用户提示词哈希, 采样参数)
+2. 条目按TTL过期，超过容量上限时按最近访问时间(LRU)淘汰
+3. 进程内统计命中/未命中/写入/淘汰次数
+
+默认关闭，通过环境变量开启:
+- LLM_CACHE_ENABLED: 设为 1/true/yes 开启缓存
+- LLM_CACHE_PATH: SQLite文件路径 (默认 <项目根目录>/cache/llm_responses.sqlite3)
+- LLM_CACHE_TTL: 条目有效期秒数 (默认86400，<=0表示永不过期)
+- LLM_CACHE_MAX_ENTRIES: 最多保留的条目数 (默认5000)
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_CACHE_PATH = os.path.join(_PROJECT_ROOT, "cache", "llm_responses.sqlite3")
+
+
+def _env_flag(key: str) -> bool:
+    return os.getenv(key, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_number(key: str, default: float) -> float:
+    """读取数值型环境变量，非法值回退到默认值"""
+    try:
+        return float(os.getenv(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    基于SQLite的LLM响应缓存
+
+    同一进程内多个线程共享一个连接，读写由锁串行化；
+    多个进程可共享同一个缓存文件(WAL模式)。
+    """
+
+    def __init__(self, path: str = _DEFAULT_CACHE_PATH, ttl: float = 86400.0, max_entries: int = 5000):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                cache_key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses (last_access)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, system_prompt: str, user_prompt: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        计算缓存键
+
+        Args:
+            model: 模型名称
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            params: 影响输出的采样参数(temperature、top_p等)
+
+        Returns:
+            十六进制sha256缓存键
+        """
+        payload = {
+            "model": model,
+            "system": _sha256(system_prompt or ""),
+            "user": _sha256(user_prompt or ""),
+            "params": {key: params[key] for key in sorted(params or {})},
+        }
+        return _sha256(json.dumps(payload, ensure_ascii=False, sort_keys=True, default=str))
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，过期条目视为未命中并删除"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            response, created_at = row
+            if self.ttl > 0 and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_responses WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_responses SET last_access = ? WHERE cache_key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+            return response
+
+    def set(self, key: str, response: str, model: str = ""):
+        """写入缓存，超过容量上限时淘汰最久未访问的条目"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (cache_key, model, response, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, response, now, now),
+            )
+            self.stores += 1
+            self._evict_locked(now)
+            self._conn.commit()
+
+    def _evict_locked(self, now: float):
+        """清理过期条目并按LRU裁剪到容量上限(调用方需持有锁)"""
+        if self.ttl > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        count = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_responses WHERE cache_key IN ("
+                "SELECT cache_key FROM llm_responses ORDER BY last_access ASC LIMIT ?)",
+                (overflow,),
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        """返回命中统计与当前条目数"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+        }
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """
+    获取进程内共享的LLM响应缓存
+
+    Returns:
+        未开启(LLM_CACHE_ENABLED)或初始化失败时返回None
+    """
+    global _cache, _cache_failed
+    if not _env_flag("LLM_CACHE_ENABLED") or _cache_failed:
+        return None
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = LLMResponseCache(
+                        path=os.getenv("LLM_CACHE_PATH") or _DEFAULT_CACHE_PATH,
+                        ttl=_env_number("LLM_CACHE_TTL", 86400.0),
+                        max_entries=int(_env_number("LLM_CACHE_MAX_ENTRIES", 5000)),
+                    )
+                    print(f"LLM响应缓存已启用: {_cache.path}")
+                except (sqlite3.Error, OSError) as e:
+                    print(f"LLM响应缓存初始化失败，已禁用: {str(e)}")
+                    _cache_failed = True
+                    return None
+    return _cache
+
+
+def get_cache_stats() -> Optional[Dict[str, Any]]:
+    """获取缓存统计，未启用缓存时返回None"""
+    return _cache.stats() if _cache is not None else None
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+总结节点提示词的token预算分配
+三个Engine的FirstSummaryNode/ReflectionSummaryNode在组装提示词前调用fit_prompt_budget():
+
+1. 标题、段落说明、搜索查询等固定字段原样保留，先从预算中扣除
+2. HOST发言与上一轮总结各有占比上限(默认15%/30%)，超出部分按token截断
+3. 剩余预算按排名依次分配给搜索结果(排名即传入顺序，靠前的价值更高):
+   单条结果不超过搜索结果预算的一半；放不下时截断最后一条可容纳的结果，其余低排名结果丢弃
+
+token计数优先使用tiktoken(cl100k_base)，未安装时按字符估算(ASCII约4字符/token，中文约1字/token)。
+
+环境变量:
+- PROMPT_TOKEN_BUDGET: 单次总结请求的token预算 (默认32000)
+"""
+
+import json
+import os
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+    TIKTOKEN_AVAILABLE = True
+except Exception:
+    _ENCODING = None
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_PROMPT_TOKEN_BUDGET = 32000
+
+# 截断后追加的标记
+TRUNCATION_MARK = "...[已截断]"
+
+
+def count_tokens(text: str) -> int:
+    """
+    统计文本token数(总结节点的提示词预算和InsightEngine的训练记录编码共用)
+
+    tiktoken不可用时估算: ASCII字符约4个一个token，中文等非ASCII字符约1个字一个token，
+    通过UTF-8字节数推算非ASCII字符数(按每字符3字节)，避免逐字符遍历
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text, disallowed_special=()))
+    non_ascii = (len(text.encode('utf-8')) - len(text)) // 2
+    return (len(text) - non_ascii) // 4 + non_ascii + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """将文本截断到不超过max_tokens个token(含截断标记)"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    mark_tokens = count_tokens(TRUNCATION_MARK)
+    keep = max(max_tokens - mark_tokens, 0)
+    if _ENCODING is not None:
+        return _ENCODING.decode(_ENCODING.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARK
+
+    # 估算模式: 按比例截取，仍超出时逐步缩短
+    end = int(len(text) * keep / max(count_tokens(text), 1))
+    while end > 0 and count_tokens(text[:end]) > keep:
+        end = int(end * 0.9)
+    return text[:end] + TRUNCATION_MARK
+
+
+def get_prompt_token_budget() -> int:
+    try:
+        return int(os.getenv("PROMPT_TOKEN_BUDGET", DEFAULT_PROMPT_TOKEN_BUDGET))
+    except ValueError:
+        return DEFAULT_PROMPT_TOKEN_BUDGET
+
+
+@dataclass
+class PromptBudgetReport:
+    """一次提示词预算分配的结果(实际token数)"""
+    budget: int
+    fixed_tokens: int = 0
+    host_speech_tokens: int = 0
+    previous_summary_tokens: int = 0
+    search_results_tokens: int = 0
+    search_results_total: int = 0
+    search_results_kept: int = 0
+    truncated_fields: List[str] = field(default_factory=list)
+    message_tokens: Optional[int] = None   # 最终消息的token数，由调用方在组装完成后填写
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def describe(self) -> str:
+        text = (
+            f"提示词token: 合计{self.message_tokens if self.message_tokens is not None else '-'}/{self.budget}, "
+            f"固定字段{self.fixed_tokens}, 搜索结果{self.search_results_tokens}"
+            f"({self.search_results_kept}/{self.search_results_total}条), "
+            f"HOST发言{self.host_speech_tokens}, 上轮总结{self.previous_summary_tokens}"
+        )
+        if self.truncated_fields:
+            text += f", 已截断: {', '.join(self.truncated_fields)}"
+        return text
+
+
+def _json_tokens(value: Any) -> int:
+    return count_tokens(json.dumps(value, ensure_ascii=False))
+
+
+def fit_prompt_budget(
+    data: Dict[str, Any],
+    budget: Optional[int] = None,
+    host_share: float = 0.15,
+    summary_share: float = 0.3,
+    max_result_share: float = 0.5,
+    min_result_tokens: int = 200,
+    overhead_share: float = 0.05
+) -> Tuple[Dict[str, Any], PromptBudgetReport]:
+    """
+    按token预算裁剪总结节点的输入数据
+
+    Args:
+        data: 节点输入(search_results为字符串列表，可含host_speech、paragraph_latest_state)
+        budget: token预算，默认读取PROMPT_TOKEN_BUDGET
+        host_share: HOST发言最多占用的预算比例
+        summary_share: 上一轮总结最多占用的预算比例
+        max_result_share: 单条搜索结果最多占用搜索结果预算的比例
+        min_result_tokens: 截断保留一条结果时至少需要的token数，不足则丢弃
+        overhead_share: 为JSON键名、转义和HOST发言格式化前缀预留的预算比例
+
+    Returns:
+        (裁剪后的数据副本, 预算分配报告)
+    """
+    budget = budget or get_prompt_token_budget()
+    data = dict(data)
+    report = PromptBudgetReport(budget=budget)
+
+    results = [str(r) for r in (data.get("search_results") or [])]
+    report.search_results_total = len(results)
+
+    fixed = {k: v for k, v in data.items() if k not in ("search_results", "host_speech", "paragraph_latest_state")}
+    report.fixed_tokens = _json_tokens(fixed)
+    available = max(int(budget * (1 - overhead_share)) - report.fixed_tokens, 0)
+
+    # HOST发言同时出现在JSON字段和消息前缀中，按两份计入
+    host_speech = data.get("host_speech")
+    if host_speech:
+        host_cap = int(available * host_share) // 2
+        if count_tokens(host_speech) > host_cap:
+            data["host_speech"] = truncate_to_tokens(host_speech, host_cap)
+            report.truncated_fields.append("host_speech")
+        report.host_speech_tokens = count_tokens(data["host_speech"]) * 2
+
+    previous = data.get("paragraph_latest_state")
+    if previous:
+        summary_cap = int(available * summary_share)
+        if count_tokens(previous) > summary_cap:
+            data["paragraph_latest_state"] = truncate_to_tokens(previous, summary_cap)
+            report.truncated_fields.append("paragraph_latest_state")
+        report.previous_summary_tokens = count_tokens(data["paragraph_latest_state"])
+
+    # 剩余预算按排名分配给搜索结果
+    remaining = available - report.host_speech_tokens - report.previous_summary_tokens
+    per_result_cap = max(int(remaining * max_result_share), min_result_tokens)
+    kept: List[str] = []
+    for result in results:
+        if remaining < min_result_tokens:
+            break
+        tokens = count_tokens(result)
+        limit = min(per_result_cap, remaining)
+        if tokens > limit:
+            result = truncate_to_tokens(result, limit)
+            tokens = count_tokens(result)
+            if "search_results" not in report.truncated_fields:
+                report.truncated_fields.append("search_results")
+        kept.append(result)
+        remaining -= tokens
+        report.search_results_tokens += tokens
+
+    if len(kept) < len(results) and "search_results" not in report.truncated_fields:
+        report.truncated_fields.append("search_results")
+    data["search_results"] = kept
+    report.search_results_kept = len(kept)
+    return data, report